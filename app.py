@@ -6,9 +6,12 @@ Enhanced version with proper indentation and debug routes
 
 import os
 import sys
+import time
 from pathlib import Path
 from flask import Flask, render_template, jsonify, request, redirect, url_for
-import pandas as pd
+
+# Hidegindítás mérése: folyamat indulás -> app kész (a port megnyitható)
+boot_started = time.perf_counter()
 
 # Project path setup
 project_root = Path(__file__).parent
@@ -20,10 +23,15 @@ def create_app():
     app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-for-development')
     
     # User study import
+    readiness = None
     try:
-        from user_study.user_study import user_study_bp
+        from user_study.user_study import user_study_bp, start_warmup, readiness
         app.register_blueprint(user_study_bp)
         print("✅ User study blueprint registered")
+        
+        # Adatok betöltése háttérszálban; USER_STUDY_WARMUP=0 esetén első kéréskor
+        if os.environ.get('USER_STUDY_WARMUP', '1') != '0':
+            start_warmup()
     except ImportError as e:
         print(f"⚠️ User study import failed: {e}")
     
@@ -38,9 +46,18 @@ def create_app():
         return jsonify({
             "status": "healthy",
             "service": "sustainable-recipe-recommender",
-            "version": "2.0"
+            "version": "2.0",
+            "ready": readiness()['ready'] if readiness else False,
+            "boot_ms": app.config.get('BOOT_MS')
         })
     
+    @app.route('/ready')
+    def ready():
+        """Készenléti ellenőrzés: 503, amíg a bemelegítés nem fejeződött be"""
+        status = readiness() if readiness else {'ready': False, 'resources': {}}
+        status['boot_ms'] = app.config.get('BOOT_MS')
+        return jsonify(status), 200 if status['ready'] else 503
+    
     @app.route('/debug/system')
     def debug_system():
         """Rendszer debug információk"""
@@ -77,23 +94,25 @@ def create_app():
         try:
             result = "<h2>Recipe Debug Info:</h2>"
             
-            # Processed recipes ellenőrzés
+            # Processed recipes ellenőrzés (a betöltött oszlopos recept tárból)
             if os.path.exists('data/processed_recipes.csv'):
-                df = pd.read_csv('data/processed_recipes.csv')
-                result += f"✅ Processed recipes: {len(df)} darab<br>"
-                result += f"Oszlopok: {list(df.columns)}<br><br>"
+                from user_study.user_study import recommender
+                store = recommender.store
+                result += f"✅ Processed recipes: {recommender.recipe_count} darab<br>"
                 
-                result += "<h3>Első 3 recept:</h3>"
-                for i in range(min(3, len(df))):
-                    recipe = df.iloc[i]
-                    result += f"<b>{recipe['title']}:</b><br>"
-                    result += f"Kép: {recipe.get('images', 'NINCS')}<br><br>"
+                if store is not None:
+                    result += f"Oszlopok: {store.columns}<br><br>"
+                    result += "<h3>Első 3 recept:</h3>"
+                    for recipe in store.views(range(min(3, len(store)))):
+                        result += f"<b>{recipe.title}:</b><br>"
+                        result += f"Kép: {recipe.images or 'NINCS'}<br><br>"
             else:
                 result += "❌ processed_recipes.csv nem található<br>"
             
             # Original CSV ellenőrzés
             if os.path.exists('hungarian_recipes_github.csv'):
                 try:
+                    import pandas as pd
                     csv_df = pd.read_csv('hungarian_recipes_github.csv')
                     result += f"<h3>✅ Original CSV:</h3>"
                     result += f"Sorok: {len(csv_df)}<br>"
@@ -112,6 +131,7 @@ def create_app():
         except Exception as e:
             return f"Recipe debug error: {e}"
     
+    app.config['BOOT_MS'] = round((time.perf_counter() - boot_started) * 1000, 1)
     return app
 
 def create_fallback_app():
@@ -174,7 +194,7 @@ def create_fallback_app():
 # App inicializálás
 try:
     app = create_app()
-    print("✅ App successfully created")
+    print(f"✅ App successfully created ({app.config['BOOT_MS']:.0f} ms)")
 except Exception as e:
     print(f"❌ App creation failed: {e}")
     app = create_fallback_app()
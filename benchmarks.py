@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Teljesítmény mérések a user study alkalmazáshoz
+Használat: python benchmarks.py <mérés> [opciók]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+COLD_START_PROBE = """
+import json, time
+started = time.perf_counter()
+import app as app_module
+app_ready = time.perf_counter()
+client = app_module.app.test_client()
+while client.get('/ready').status_code != 200 and time.perf_counter() - started < {timeout}:
+    time.sleep(0.01)
+warm = time.perf_counter()
+print(json.dumps({{
+    'app_created_ms': (app_ready - started) * 1000,
+    'boot_ms': app_module.app.config.get('BOOT_MS'),
+    'warm_ms': (warm - started) * 1000,
+    'ready': client.get('/ready').get_json(),
+}}))
+"""
+
+
+def bench_cold_start(args):
+    """Hidegindítás: mennyi idő után jön létre az app (port), és mikor lesz kész a bemelegítés"""
+    print(f"🧊 Hidegindítás mérése ({args.runs} futás, friss Python folyamatokban)")
+
+    results = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, '-c', COLD_START_PROBE.format(timeout=args.timeout)],
+            cwd=project_root, capture_output=True, text=True, check=True,
+            env={**os.environ, 'USER_STUDY_WARMUP': '1'},
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for key in ('app_created_ms', 'warm_ms'):
+        values = sorted(result[key] for result in results)
+        print(f"   {key}: medián {values[len(values) // 2]:.0f} ms (min {values[0]:.0f}, max {values[-1]:.0f})")
+    print(f"   Erőforrások: {results[-1]['ready']['resources']}")
+    return results
+
+
+def _legacy_connection(db_path):
+    """Korábbi viselkedés: hívásonként új kapcsolat, alapértelmezett rollback napló"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _run_rate_recipe_load(threads, requests_per_thread, db_factory):
+    """/rate_recipe terhelés párhuzamos szálakból (gthread worker szimuláció)"""
+    import user_study.user_study as us
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.secret_key = 'benchmark'
+    app.register_blueprint(us.user_study_bp)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = db_factory(str(Path(tmp) / 'bench.db'))
+        user_id = database.create_user('25-34', 'MSc', 'daily', 4, 'v1')
+        us.db = us.LazyResource('Benchmark adatbázis', lambda: database)
+
+        barrier = threading.Barrier(threads + 1)
+        errors = []
+        latencies = []
+
+        def worker():
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess['user_id'] = user_id
+            timings = []
+            barrier.wait()
+            for i in range(requests_per_thread):
+                started = time.perf_counter()
+                response = client.post('/rate_recipe', json={'recipe_id': i % 50 + 1, 'rating': i % 5 + 1,
+                                                             'interaction_order': i})
+                timings.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+            latencies.extend(timings)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        # A pufferelt sorok kiírása is a mért időbe tartozik
+        database.flush()
+        elapsed = time.perf_counter() - started
+
+        rows = database.get_connection().execute('SELECT COUNT(*) FROM interactions').fetchone()[0]
+        database.close()
+        return rows / elapsed, rows, errors, latencies
+
+
+def _run_log_interaction_load(threads, calls_per_thread, db_factory):
+    """Csak a log_interaction hívás késleltetése (Flask nélkül)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        database = db_factory(str(Path(tmp) / 'bench.db'))
+        latencies = []
+        barrier = threading.Barrier(threads)
+
+        def worker():
+            timings = []
+            barrier.wait()
+            for i in range(calls_per_thread):
+                started = time.perf_counter()
+                database.log_interaction(1, i % 50 + 1, i % 5 + 1, interaction_order=i)
+                timings.append(time.perf_counter() - started)
+            latencies.extend(timings)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        database.close()
+        return np.asarray(latencies) * 1000
+
+
+def bench_db_inserts(args):
+    """/rate_recipe insert/s: pool + WAL vs. hívásonként új kapcsolat"""
+    from user_study.user_study import UserStudyDatabase
+
+    class LegacyDatabase(UserStudyDatabase):
+        def get_connection(self):
+            return _legacy_connection(self.db_path)
+
+    variants = [
+        ('új kapcsolat / rollback napló', lambda path: LegacyDatabase(path, write_behind=False)),
+        ('kapcsolat pool / WAL', lambda path: UserStudyDatabase(path, write_behind=False)),
+        ('pool / WAL + write-behind', lambda path: UserStudyDatabase(path, write_behind=True)),
+    ]
+
+    print(f"🗄️ /rate_recipe insert/s és késleltetés ({args.threads} szál × {args.requests} kérés)")
+    for label, factory in variants:
+        rate, rows, errors, latencies = _run_rate_recipe_load(args.threads, args.requests, factory)
+        latencies_ms = np.sort(np.asarray(latencies)) * 1000
+        p50, p99 = np.percentile(latencies_ms, [50, 99])
+        print(f"   {label}: {rate:.0f} insert/s, p50 {p50:.2f} ms, p99 {p99:.2f} ms "
+              f"({rows} sor, {len(errors)} hiba)")
+
+    print("   log_interaction hívás (Flask nélkül):")
+    for label, factory in variants:
+        p50, p99 = np.percentile(_run_log_interaction_load(args.threads, args.requests, factory), [50, 99])
+        print(f"      {label}: p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+
+def _populate_study_db(database, participants, interactions, seed=0):
+    """Szintetikus résztvevők, interakciók és kérdőívek (közvetlen executemany)"""
+    rng = np.random.default_rng(seed)
+    versions = rng.choice(['v1', 'v2', 'v3'], size=participants)
+    completed = rng.random(participants) < 0.7
+
+    with database.get_connection() as conn:
+        conn.executemany(
+            'INSERT INTO participants (age_group, education, cooking_frequency, sustainability_awareness, '
+            'version, is_completed) VALUES (?, ?, ?, ?, ?, ?)',
+            [('25-34', 'MSc', 'daily', 3, str(v), bool(c)) for v, c in zip(versions, completed)])
+        user_ids = rng.integers(1, participants + 1, size=interactions)
+        conn.executemany(
+            'INSERT INTO interactions (user_id, recipe_id, rating, interaction_order) VALUES (?, ?, ?, ?)',
+            zip(user_ids.tolist(), rng.integers(1, 51, size=interactions).tolist(),
+                rng.integers(1, 6, size=interactions).tolist(), rng.integers(1, 6, size=interactions).tolist()))
+        conn.executemany(
+            'INSERT INTO questionnaire (user_id, system_usability, recommendation_quality, trust_level, '
+            'explanation_clarity, overall_satisfaction) VALUES (?, ?, ?, ?, ?, ?)',
+            [(int(user_id), *rng.integers(1, 6, size=5).tolist()) for user_id in np.flatnonzero(completed) + 1])
+
+
+def bench_query_plans(args):
+    """Statisztika lekérdezések terve és ideje nagy adatbázison (a terv ellenőrzés: tests/test_query_plans.py)
+
+    Az /admin/stats lekérdezései (összesítő táblák) mellett a nyers ellenőrző aggregátumok is
+    mérésre kerülnek - ezek szándékosan a teljes táblákat olvassák.
+    """
+    from user_study.user_study import UserStudyDatabase, STATS_PAGE_QUERIES, STATS_QUERIES
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = UserStudyDatabase(str(Path(tmp) / 'bench.db'), write_behind=False)
+        _populate_study_db(database, args.participants, args.interactions)
+        conn = database.get_connection()
+
+        print(f"🔬 Lekérdezés tervek ({args.participants} résztvevő, {args.interactions} interakció, "
+              f"séma v{database.schema_version})")
+        for name, sql in {**STATS_PAGE_QUERIES, **{f'raw.{key}': sql for key, sql in STATS_QUERIES.items()}}.items():
+            plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+            started = time.perf_counter()
+            conn.execute(sql).fetchall()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"   {name} ({elapsed_ms:.1f} ms): {' | '.join(plan)}")
+
+        offenders = database.check_query_plans()
+        database.close()
+
+    if offenders:
+        print(f"❌ Teljes tábla / index bejárás: {offenders}")
+        sys.exit(1)
+    print("✅ Az /admin/stats lekérdezései csak index kereséssel (vagy engedélyezett bejárással) olvasnak")
+
+
+def bench_resampling(args):
+    """Bootstrap CI + permutációs tesztek ideje mind az öt kérdőív mutatóra"""
+    import pandas as pd
+    from user_study.migrations import QUESTIONNAIRE_METRICS
+    from user_study.resampling import resampling_comparison
+
+    rng = np.random.default_rng(0)
+    merged = pd.DataFrame({'version': rng.choice(['v1', 'v2', 'v3'], size=args.participants)})
+    for metric in QUESTIONNAIRE_METRICS:
+        merged[metric] = rng.integers(1, 6, size=args.participants)
+
+    print(f"🎲 Újramintavételezés ({args.participants} kérdőív, {args.resamples} minta, "
+          f"{len(QUESTIONNAIRE_METRICS)} mutató)")
+    for jobs in sorted({1, args.jobs}):
+        started = time.perf_counter()
+        resampling_comparison(merged, QUESTIONNAIRE_METRICS, n_resamples=args.resamples, jobs=jobs)
+        print(f"   jobs={jobs}: {time.perf_counter() - started:.2f} s")
+
+
+def _legacy_clean_text(series):
+    """Korábbi viselkedés: soronkénti apply strip"""
+    return series.astype(str).apply(lambda x: x.strip() if isinstance(x, str) else str(x))
+
+
+def _legacy_first_image_url(images_string):
+    """Korábbi viselkedés (recipe_preprocessor): soronkénti split / strip / print"""
+    import pandas as pd
+
+    if pd.isna(images_string) or not images_string:
+        return '/static/images/recipe_placeholder.jpg'
+    if isinstance(images_string, str):
+        first_url = images_string.split(',')[0].strip().strip('"').strip("'")
+        if first_url.startswith('http'):
+            print(f"   🖼️ Kép URL: {first_url[:60]}...")
+            return first_url
+    return '/static/images/recipe_placeholder.jpg'
+
+
+def _legacy_image_url(images_string, fallback):
+    """Korábbi viselkedés (setup_database): soronkénti split / strip / print"""
+    import pandas as pd
+
+    if pd.isna(images_string) or not images_string:
+        return fallback()
+    img_str = str(images_string).strip()
+    if not img_str or img_str.lower() in ['nan', '', 'null']:
+        return fallback()
+    img_str = img_str.strip('"').strip("'")
+    first_url = img_str.split(',')[0].strip().strip('"').strip("'") if ',' in img_str else img_str
+    if first_url.startswith('http'):
+        if first_url.startswith('http://'):
+            first_url = first_url.replace('http://', 'https://')
+        print(f"   ✅ Valid image URL: {first_url[:60]}...")
+        return first_url
+    elif first_url.startswith('www.'):
+        print(f"   🔧 Fixed www URL: https://{first_url[:60]}...")
+        return f"https://{first_url}"
+    print(f"   ⚠️ Invalid URL format: {first_url[:60]}...")
+    return fallback()
+
+
+def _synthetic_recipes(rows, seed=0):
+    """Nyers recept DataFrame a forrás CSV oszlopaival (vegyes kép URL formátumok, hiányzó értékek)"""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    urls = np.array(['https://img.example.com/{}.jpg', '"http://img.example.com/{}.jpg","https://x.hu/b.jpg"',
+                     'www.example.hu/{}.png', '', 'nincs kép'])
+    images = pd.Series([template.format(i) for i, template in enumerate(rng.choice(urls, size=rows))],
+                       dtype=object)
+    images[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        'name': pd.Series(rng.choice(['  Gulyás ', 'Lecsó', ' Pörkölt\t'], size=rows), dtype=object),
+        'ingredients': 'hagyma, paprika ',
+        'instructions': ' Főzd meg.',
+        'images': images,
+        'env_score': rng.gamma(2.0, 60.0, size=rows),
+        'nutri_score': rng.uniform(0, 100, size=rows),
+        'meal_score': rng.integers(0, 101, size=rows),
+    })
+
+
+def _synthetic_ingredients(rows, seed=0, n_vocab=3000, n_topics=300):
+    """Összetevő szövegek témák szerint csoportosítva (a receptek ~70%-a a saját téma szavaiból)
+
+    Témák nélkül minden recept egyformán távol lenne a többitől, és a legközelebbi szomszéd
+    keresés nem lenne értelmes mérce.
+    """
+    rng = np.random.default_rng(seed)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyzáéíóöőúüű'))
+    vocabulary = np.array([''.join(rng.choice(letters, size=7)) for _ in range(n_vocab)])
+    # Zipf-szerű szógyakoriság, mint a valódi összetevő listákban
+    frequency = 1.0 / np.arange(1, n_vocab + 1) ** 1.1
+    frequency /= frequency.sum()
+    topics = [rng.choice(n_vocab, size=25, replace=False, p=frequency) for _ in range(n_topics)]
+
+    texts = []
+    for topic, size in zip(rng.integers(0, n_topics, size=rows), rng.integers(6, 15, size=rows)):
+        core = rng.choice(topics[topic], size=int(size * 0.7), replace=False)
+        noise = rng.choice(n_vocab, size=size - len(core), p=frequency)
+        texts.append(', '.join(vocabulary[np.concatenate([core, noise])]))
+    return texts
+
+
+def bench_text_cleaning(args):
+    """Szöveg tisztítás és kép URL kinyerés: korábbi soronkénti apply (print-ekkel) vs jelenlegi"""
+    import contextlib
+    import pandas as pd
+    import setup_database
+    from recipe_preprocessor import HungarianRecipeProcessor
+
+    frame = _synthetic_recipes(args.rows)
+    processor = HungarianRecipeProcessor()
+
+    print(f"🧹 Szöveg tisztítás + kép URL-ek ({args.rows} sor, a soronkénti print-ek /dev/null-ba)")
+    timings = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        steps = {
+            'clean_text': (
+                lambda df: [_legacy_clean_text(df[col]) for col in ('name', 'ingredients', 'instructions')],
+                lambda df: [df[col].astype(str).str.strip() for col in ('name', 'ingredients', 'instructions')]),
+            'image_urls (preprocessor)': (
+                lambda df: df['images'].apply(_legacy_first_image_url),
+                lambda df: processor.process_image_urls(df, verbose=False)),
+            'image_urls (setup_database)': (
+                lambda df: df['images'].apply(lambda value: _legacy_image_url(value, setup_database.get_fallback_image)),
+                lambda df: setup_database.process_image_urls(df.rename(columns={'name': 'title'}))),
+        }
+        for name, (legacy, current) in steps.items():
+            timings[name] = []
+            for function in (legacy, current):
+                df = frame.copy()
+                started = time.perf_counter()
+                function(df)
+                timings[name].append(time.perf_counter() - started)
+
+    for name, (legacy_s, current_s) in timings.items():
+        print(f"   {name}: apply {legacy_s:.2f} s -> jelenlegi {current_s:.2f} s "
+              f"({legacy_s / current_s:.1f}x)")
+    return timings
+
+
+def bench_ann_recall(args):
+    """ANN index: recall@k a pontos TF-IDF kereséshez képest és lekérdezési idő n_probe szerint"""
+    from user_study.ann_index import IVFIndex, N_PROBE_CANDIDATES
+    from user_study.recipe_retrieval import IngredientSimilarityEngine
+
+    texts = _synthetic_ingredients(args.rows)
+    print(f"🧭 ANN index ({args.rows} szintetikus recept, {args.queries} lekérdezés, k={args.k})")
+
+    started = time.perf_counter()
+    index = IVFIndex.build(texts, np.arange(1, args.rows + 1), k=args.k)
+    print(f"   Építés: {time.perf_counter() - started:.1f} s, {len(index.centroids)} lista, "
+          f"hangolt n_probe: {index.n_probe}")
+
+    engine = IngredientSimilarityEngine(texts)
+    reports = [index.evaluate_recall(engine, n_queries=args.queries, k=args.k, n_probe=n_probe)
+               for n_probe in N_PROBE_CANDIDATES if n_probe <= len(index.centroids)]
+    for report in reports:
+        print(f"   n_probe={report['n_probe']}: recall@{args.k} {report['recall_at_k']:.3f}, "
+              f"{report['avg_query_ms']:.2f} ms (pontos: {report['avg_exact_ms']:.2f} ms)")
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    cold_start = subparsers.add_parser('cold-start', help='App létrehozás és bemelegítés ideje')
+    cold_start.add_argument('--runs', type=int, default=5)
+    cold_start.add_argument('--timeout', type=float, default=120.0)
+    cold_start.set_defaults(func=bench_cold_start)
+
+    db_inserts = subparsers.add_parser('db-inserts', help='/rate_recipe insert/s párhuzamos szálakkal')
+    db_inserts.add_argument('--threads', type=int, default=8)
+    db_inserts.add_argument('--requests', type=int, default=250)
+    db_inserts.set_defaults(func=bench_db_inserts)
+
+    query_plans = subparsers.add_parser('query-plans', help='Statisztika lekérdezések terve (teljes bejárás ellenőrzés)')
+    query_plans.add_argument('--participants', type=int, default=20000)
+    query_plans.add_argument('--interactions', type=int, default=100000)
+    query_plans.set_defaults(func=bench_query_plans)
+
+    resampling = subparsers.add_parser('resampling', help='Bootstrap és permutációs tesztek ideje')
+    resampling.add_argument('--participants', type=int, default=3000)
+    resampling.add_argument('--resamples', type=int, default=10000)
+    resampling.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    resampling.set_defaults(func=bench_resampling)
+
+    text_cleaning = subparsers.add_parser('text-cleaning', help='Szöveg tisztítás és kép URL-ek: korábbi apply vs jelenlegi')
+    text_cleaning.add_argument('--rows', type=int, default=1_000_000)
+    text_cleaning.set_defaults(func=bench_text_cleaning)
+
+    ann = subparsers.add_parser('ann-recall', help='ANN index recall a pontos TF-IDF kereséshez képest')
+    ann.add_argument('--rows', type=int, default=1_000_000)
+    ann.add_argument('--queries', type=int, default=200)
+    ann.add_argument('-k', type=int, default=10)
+    ann.set_defaults(func=bench_ann_recall)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,26 @@ DataFrame API kompatibilitási fix
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import argparse
 import os
 import sys
 import re
 import json
 
+from user_study.ann_index import IVFIndex
+from user_study.recipe_store import write_recipe_snapshot, read_snapshot_manifest, catalogue_fingerprint
+from user_study.csv_loading import read_csv, iter_csv_chunks, detect_encoding
+
 class HungarianRecipeProcessor:
     """Magyar receptek feldolgozása és normalizálása külső képekkel"""
     
+    # Kötelező és opcionális forrás oszlopok
+    REQUIRED_COLUMNS = ['name', 'ingredients', 'env_score', 'nutri_score', 'meal_score']
+    OPTIONAL_COLUMNS = ['instructions', 'images']
+    SCORE_COLUMNS = ['env_score', 'nutri_score', 'meal_score']
+    QUARTILE_LABELS = ['low', 'medium', 'high', 'very_high']
+    PLACEHOLDER_IMAGE = '/static/images/recipe_placeholder.jpg'
+    
     def __init__(self, csv_file_path="hungarian_recipes_github.csv"):
         self.csv_path = csv_file_path
         self.processed_data = None
@@ -24,28 +36,16 @@ class HungarianRecipeProcessor:
         try:
             print(f"📊 Betöltés: {self.csv_path}")
             
-            # Többféle encoding próbálása
-            encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-            df = None
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(self.csv_path, encoding=encoding)
-                    print(f"✅ Sikeres betöltés {encoding} encoding-gal")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if df is None:
-                print("❌ Nem sikerült betölteni egyik encoding-gal sem")
-                return None
+            # Encoding felismerés bájt mintából, egyetlen parse (mojibake javítással)
+            df, encoding = read_csv(self.csv_path)
+            print(f"✅ Sikeres betöltés {encoding} encoding-gal")
             
             print(f"✅ Sikeresen betöltve: {len(df)} recept")
             print(f"📋 Oszlopok: {list(df.columns)}")
             
             # Kötelező oszlopok ellenőrzése
-            required_columns = ['name', 'ingredients', 'env_score', 'nutri_score', 'meal_score']
-            optional_columns = ['instructions', 'images']
+            required_columns = self.REQUIRED_COLUMNS
+            optional_columns = self.OPTIONAL_COLUMNS
             
             missing_required = [col for col in required_columns if col not in df.columns]
             if missing_required:
@@ -73,55 +73,81 @@ class HungarianRecipeProcessor:
             print(f"❌ Betöltési hiba: {e}")
             return None
     
-    def normalize_environmental_scores(self, df):
-        """Környezeti pontszámok normalizálása"""
-        print("🌱 Környezeti pontszámok normalizálása...")
+    def normalize_environmental_scores(self, df, bounds=None):
+        """Környezeti pontszámok normalizálása
+        
+        bounds: előre (pl. az első streaming menetben) számolt {oszlop: (min, max)} -
+        ilyenkor a darab saját tartománya helyett a teljes adathalmazé számít.
+        """
+        verbose = bounds is None
+        if verbose:
+            print("🌱 Környezeti pontszámok normalizálása...")
         
         # Környezeti score normalizálása (magasabb érték = rosszabb környezetileg)
         # Invertáljuk hogy magasabb = jobb legyen
-        env_min = df['env_score'].min()
-        env_max = df['env_score'].max()
+        if bounds is None:
+            env_min = df['env_score'].min()
+            env_max = df['env_score'].max()
+        else:
+            env_min, env_max = bounds['env_score']
         
-        print(f"   Eredeti env_score tartomány: {env_min:.2f} - {env_max:.2f}")
+        if verbose:
+            print(f"   Eredeti env_score tartomány: {env_min:.2f} - {env_max:.2f}")
         
         # Normalizálás 0-100 skálára (invertálva)
         df['ESI'] = 100 - ((df['env_score'] - env_min) / (env_max - env_min) * 100)
         
-        print(f"   Normalizált env_score tartomány: {df['ESI'].min():.2f} - {df['ESI'].max():.2f}")
+        if verbose:
+            print(f"   Normalizált env_score tartomány: {df['ESI'].min():.2f} - {df['ESI'].max():.2f}")
         
         return df
     
-    def normalize_other_scores(self, df):
-        """Egyéb pontszámok normalizálása"""
-        print("📊 Egyéb pontszámok normalizálása...")
+    def normalize_other_scores(self, df, bounds=None):
+        """Egyéb pontszámok normalizálása (bounds: mint normalize_environmental_scores-nál)"""
+        verbose = bounds is None
+        if verbose:
+            print("📊 Egyéb pontszámok normalizálása...")
         
         # Nutri_score (már 0-100 skálán kellene lennie)
-        nutri_min, nutri_max = df['nutri_score'].min(), df['nutri_score'].max()
-        print(f"   nutri_score tartomány: {nutri_min:.2f} - {nutri_max:.2f}")
+        if bounds is None:
+            nutri_min, nutri_max = df['nutri_score'].min(), df['nutri_score'].max()
+        else:
+            nutri_min, nutri_max = bounds['nutri_score']
+        if verbose:
+            print(f"   nutri_score tartomány: {nutri_min:.2f} - {nutri_max:.2f}")
         
         if nutri_max <= 100:
             df['HSI'] = df['nutri_score']  # Health Score Index
-            print("   nutri_score már normalizált")
+            if verbose:
+                print("   nutri_score már normalizált")
         else:
             df['HSI'] = (df['nutri_score'] / nutri_max) * 100
-            print("   nutri_score normalizálva")
+            if verbose:
+                print("   nutri_score normalizálva")
         
         # Meal_score (népszerűség/ízletesség)
-        meal_min, meal_max = df['meal_score'].min(), df['meal_score'].max()
-        print(f"   meal_score tartomány: {meal_min:.2f} - {meal_max:.2f}")
+        if bounds is None:
+            meal_min, meal_max = df['meal_score'].min(), df['meal_score'].max()
+        else:
+            meal_min, meal_max = bounds['meal_score']
+        if verbose:
+            print(f"   meal_score tartomány: {meal_min:.2f} - {meal_max:.2f}")
         
         if meal_max <= 100:
             df['PPI'] = df['meal_score']  # Popularity/Preference Index
-            print("   meal_score már normalizált")
+            if verbose:
+                print("   meal_score már normalizált")
         else:
             df['PPI'] = (df['meal_score'] / meal_max) * 100
-            print("   meal_score normalizálva")
+            if verbose:
+                print("   meal_score normalizálva")
         
         return df
     
-    def calculate_composite_score(self, df):
+    def calculate_composite_score(self, df, verbose=True):
         """Kompozit pontszám számítása"""
-        print("🔢 Kompozit pontszám számítása...")
+        if verbose:
+            print("🔢 Kompozit pontszám számítása...")
         
         # Súlyozott átlag: Környezet 40%, Egészség 40%, Népszerűség 20%
         df['composite_score'] = (
@@ -130,14 +156,16 @@ class HungarianRecipeProcessor:
             df['PPI'] * 0.2      # Popularity/Preference Index
         )
         
-        print(f"   Kompozit score tartomány: {df['composite_score'].min():.2f} - {df['composite_score'].max():.2f}")
-        print(f"   Átlagos kompozit score: {df['composite_score'].mean():.2f}")
+        if verbose:
+            print(f"   Kompozit score tartomány: {df['composite_score'].min():.2f} - {df['composite_score'].max():.2f}")
+            print(f"   Átlagos kompozit score: {df['composite_score'].mean():.2f}")
         
         return df
     
-    def clean_text_data(self, df):
-        """Szöveges adatok tisztítása - JAVÍTOTT VERZIÓ"""
-        print("🧹 Adatok tisztítása...")
+    def clean_text_data(self, df, start_id=1, verbose=True):
+        """Szöveges adatok tisztítása - JAVÍTOTT VERZIÓ (start_id: az első recept azonosítója)"""
+        if verbose:
+            print("🧹 Adatok tisztítása...")
         
         try:
             # JAVÍTÁS: .str accessor helyett direct pandas műveletek
@@ -148,57 +176,55 @@ class HungarianRecipeProcessor:
             df['instructions'] = df['instructions'].fillna('Nincs útmutató')
             df['images'] = df['images'].fillna('')
             
-            # Szöveges mezők tisztítása (biztonságos módszer)
+            # Szöveges mezők tisztítása: astype(str) után a .str accessor minden sorra biztonságos
             for col in ['name', 'ingredients', 'instructions']:
                 if col in df.columns:
-                    # Pandas Series.str helyett apply használata
-                    df[col] = df[col].astype(str).apply(lambda x: x.strip() if isinstance(x, str) else str(x))
+                    df[col] = df[col].astype(str).str.strip()
             
             # Recipe ID hozzáadása
-            df['recipeid'] = range(1, len(df) + 1)
+            df['recipeid'] = range(start_id, start_id + len(df))
             
             # Oszlop átnevezés
             df = df.rename(columns={'name': 'title'})
             
-            print(f"✅ Tisztítva: {len(df)} recept készenléti állapotban")
+            if verbose:
+                print(f"✅ Tisztítva: {len(df)} recept készenléti állapotban")
             
             return df
             
         except Exception as e:
             print(f"⚠️ Tisztítási hiba: {e}")
             # Fallback: alapvető tisztítás
-            df['recipeid'] = range(1, len(df) + 1)
+            df['recipeid'] = range(start_id, start_id + len(df))
             df = df.rename(columns={'name': 'title'})
             return df
     
-    def process_image_urls(self, df):
-        """Kép URL-ek feldolgozása"""
-        print("🖼️ Kép URL-ek feldolgozása...")
-        
-        def process_single_image_url(images_string):
-            """Egy kép URL feldolgozása"""
-            if pd.isna(images_string) or not images_string:
-                return '/static/images/recipe_placeholder.jpg'
-            
-            # Ha string, akkor split by comma és első URL
+    def process_image_urls(self, df, verbose=True):
+        """Kép URL-ek feldolgozása: az első (vesszővel elválasztott) http URL, különben placeholder"""
+        if verbose:
+            print("🖼️ Kép URL-ek feldolgozása...")
+        
+        placeholder = self.PLACEHOLDER_IMAGE
+        
+        def first_image_url(images_string):
+            """Az első vesszővel elválasztott érték, ha http URL (NaN, szám, üres -> placeholder)"""
             if isinstance(images_string, str):
-                urls = images_string.split(',')
-                first_url = urls[0].strip().strip('"').strip("'")
-                
-                # Ellenőrzés hogy valós URL-e
+                first_url = images_string.partition(',')[0].strip().strip('"').strip("'")
                 if first_url.startswith('http'):
-                    print(f"   🖼️ Kép URL: {first_url[:60]}...")
                     return first_url
-            
-            # Fallback
-            return '/static/images/recipe_placeholder.jpg'
+            return placeholder
         
-        # Biztonságos apply művelet
         try:
-            df['images'] = df['images'].apply(process_single_image_url)
+            # Soronkénti print és pd.isna nélküli list comprehension: pandas string dtype (pyarrow)
+            # nélkül a .str műveletek is elemenkénti ciklusok, soronként több menettel (lassabb)
+            df['images'] = [first_image_url(value) for value in df['images'].tolist()]
+            
+            if verbose:
+                placeholders = int((df['images'] == placeholder).sum())
+                print(f"   🖼️ Kép URL: {len(df) - placeholders}, placeholder: {placeholders}")
         except Exception as e:
             print(f"⚠️ Kép feldolgozási hiba: {e}")
-            df['images'] = '/static/images/recipe_placeholder.jpg'
+            df['images'] = placeholder
         
         return df
     
@@ -269,8 +295,251 @@ class HungarianRecipeProcessor:
         if 'instructions' in df.columns:
             print(f"   Hiányzó instrukciók: {df['instructions'].isna().sum()}")
     
-    def process_all(self, output_path="data/processed_recipes.csv", sample_size=50):
-        """Teljes feldolgozási pipeline"""
+    def build_ann_index(self, catalogue_path, index_path="data/recipe_ann_index.npz"):
+        """ANN index (IVF a TF-IDF vektorokon) építése a teljes katalógusra és mentése
+        
+        A katalógus CSV visszaolvasásával épül, így a sorok és recipeid-k pontosan azok, amiket
+        az app RECIPE_CATALOGUE-ként betölt. Az n_probe a pontos TF-IDF kereséshez mért recall@k
+        alapján hangolódik; a mentett index visszatöltése is ellenőrzésre kerül.
+        """
+        print(f"🧭 ANN index építése: {catalogue_path}")
+        
+        try:
+            catalogue = pd.read_csv(catalogue_path, usecols=['recipeid', 'ingredients'])
+            index = IVFIndex.build(catalogue['ingredients'].tolist(), catalogue['recipeid'].to_numpy())
+            index.save(index_path)
+            
+            tuning = index.tuning
+            print(f"   {index.n_recipes} recept, listák: {len(index.centroids)}, n_probe: {index.n_probe}")
+            print(f"   Recall@{tuning['k']:.0f} (pontos TF-IDF kereséshez képest): {tuning['recall_at_k']:.3f}")
+            print(f"   Átlagos lekérdezési idő: {tuning['avg_query_ms']:.2f} ms "
+                  f"(pontos keresés: {tuning['avg_exact_ms']:.2f} ms)")
+            
+            if not self.verify_ann_index(index, index_path, catalogue['recipeid'].to_numpy()):
+                return False
+            print(f"   Mentve: {index_path}")
+            return True
+            
+        except Exception as e:
+            print(f"⚠️ ANN index hiba: {e}")
+            return False
+    
+    def verify_ann_index(self, index, index_path, recipe_ids, n_queries=20):
+        """A mentett index visszatöltése: a katalógus recipeid-ihez illeszkedik és ugyanazt adja"""
+        loaded = IVFIndex.load(index_path)
+        problems = []
+        if not np.array_equal(loaded.recipe_ids, recipe_ids):
+            problems.append("a recipeid-k nem egyeznek a katalógussal")
+        if loaded.catalogue != catalogue_fingerprint(recipe_ids):
+            problems.append("a mentett katalógus azonosító nem egyezik")
+        if loaded.n_probe != index.n_probe or loaded.tuning != index.tuning:
+            problems.append("a hangolási adatok nem egyeznek")
+        
+        rows = np.random.default_rng(0).choice(index.n_recipes, size=min(n_queries, index.n_recipes), replace=False)
+        for row in rows:
+            expected, _ = index.search_by_row(int(row), k=10)
+            actual, _ = loaded.search_by_row(int(row), k=10)
+            if not np.array_equal(expected, actual):
+                problems.append(f"eltérő találatok a(z) {row}. sorra")
+                break
+        
+        if problems:
+            print(f"❌ A mentett ANN index hibás ({index_path}): {'; '.join(problems)}")
+            return False
+        print(f"   ✅ Visszatöltés ellenőrizve ({len(rows)} lekérdezés)")
+        return True
+    
+    def build_snapshot(self, csv_path, snapshot_dir="data/recipe_snapshot"):
+        """Bináris recept snapshot (memmap) a mentett CSV-ből - gyors worker indításhoz"""
+        print("📦 Recept snapshot írása...")
+        
+        try:
+            # A mentett CSV visszaolvasása: a snapshot pontosan azt tükrözi, amit a worker látna
+            df = pd.read_csv(csv_path)
+            write_recipe_snapshot(df, snapshot_dir, source_path=csv_path)
+            size_kb = sum(f.stat().st_size for f in Path(snapshot_dir).iterdir()) / 1024
+            print(f"   Mentve: {snapshot_dir} ({size_kb:.1f} KB)")
+            return True
+            
+        except Exception as e:
+            print(f"⚠️ Snapshot hiba: {e}")
+            return False
+    
+    def report_catalogue_pairing(self, index_path, snapshot_dir, catalogue_path):
+        """Snapshot és ANN index katalógus azonosítójának összevetése (az app eltérés esetén nem párosítja őket)"""
+        manifest = read_snapshot_manifest(snapshot_dir)
+        if manifest is None or not Path(index_path).exists():
+            return
+        index_catalogue = IVFIndex.load(index_path).catalogue
+        if manifest.get('catalogue') == index_catalogue:
+            print(f"   🔗 A snapshot és az ANN index ugyanahhoz a katalógushoz tartozik ({index_catalogue['rows']} recept)")
+        else:
+            print(f"   ℹ️ A snapshot a mintához ({manifest['n_recipes']} recept), az ANN index a teljes "
+                  f"katalógushoz ({index_catalogue['rows']} recept) épült - az index csak "
+                  f"RECIPE_CATALOGUE={catalogue_path} beállítással töltődik be")
+    
+    def save_outputs(self, output_path, index_path, snapshot_dir, catalogue_path):
+        """A user study minta mentése, ANN index (a teljes katalógusra) és snapshot építése"""
+        try:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            self.processed_data.to_csv(output_path, index=False, encoding='utf-8')
+            
+            print(f"\n💾 Feldolgozott adatok mentve: {output_path}")
+            print(f"📁 Fájlméret: {os.path.getsize(output_path) / 1024:.1f} KB")
+            
+            # ANN index a teljes katalógusra (a mintán az app úgysem használná)
+            self.build_ann_index(catalogue_path, index_path)
+            
+            # Bináris snapshot a workerek memmap betöltéséhez
+            self.build_snapshot(output_path, snapshot_dir)
+            self.report_catalogue_pairing(index_path, snapshot_dir, catalogue_path)
+            
+            # 10. Mintaadatok kiírása
+            print(f"\n📋 MINTA RECEPTEK:")
+            for i in range(min(3, len(self.processed_data))):
+                recipe = self.processed_data.iloc[i]
+                print(f"   {i+1}. {recipe['title']}")
+                print(f"      Kép: {recipe['images'][:60]}...")
+                print(f"      Scores: HSI={recipe['HSI']:.1f}, ESI={recipe['ESI']:.1f}, PPI={recipe['PPI']:.1f}")
+            
+            return True
+            
+        except Exception as e:
+            print(f"❌ Mentési hiba: {e}")
+            return False
+    
+    def scan_source(self, chunksize=50000, reservoir_size=100000, seed=42):
+        """Streaming 1. menet: encoding, oszlopok, score tartományok és kvartilis határok
+        
+        Csak a score oszlopok kerülnek beolvasásra. A kompozit score kvartiliseihez egy
+        reservoir minta (Algorithm R, darabonként vektorizálva) tárolja a nyers score hármasokat,
+        így a memória a fájl méretétől független.
+        """
+        print(f"📊 1. menet (tartományok, kvartilisek): {self.csv_path}")
+        
+        encoding = detect_encoding(self.csv_path)
+        columns = read_csv(self.csv_path, encoding=encoding, nrows=0)[0].columns
+        missing_required = [col for col in self.REQUIRED_COLUMNS if col not in columns]
+        if missing_required:
+            print(f"❌ Hiányzó kötelező oszlopok: {missing_required}")
+            return None
+        
+        rng = np.random.default_rng(seed)
+        reservoir = np.empty((reservoir_size, len(self.SCORE_COLUMNS)))
+        lows = np.full(len(self.SCORE_COLUMNS), np.inf)
+        highs = np.full(len(self.SCORE_COLUMNS), -np.inf)
+        rows = 0
+        
+        for chunk in iter_csv_chunks(self.csv_path, chunksize, encoding=encoding, usecols=self.SCORE_COLUMNS):
+            values = chunk[self.SCORE_COLUMNS].to_numpy(dtype=float)
+            lows = np.fmin(lows, np.nanmin(values, axis=0, initial=np.inf))
+            highs = np.fmax(highs, np.nanmax(values, axis=0, initial=-np.inf))
+            
+            positions = np.arange(rows, rows + len(values))
+            fill = positions < reservoir_size
+            reservoir[positions[fill]] = values[fill]
+            # Az i. sor (i >= k) k / (i + 1) valószínűséggel cserél le egy véletlen elemet
+            slots = rng.integers(0, positions[~fill] + 1) if (~fill).any() else np.empty(0, dtype=int)
+            replace = slots < reservoir_size
+            reservoir[slots[replace]] = values[~fill][replace]
+            rows += len(values)
+        
+        print(f"✅ {rows} recept ({encoding} encoding)")
+        
+        if rows == 0:
+            print("❌ Üres forrás fájl")
+            return None
+        
+        bounds = {col: (lows[i], highs[i]) for i, col in enumerate(self.SCORE_COLUMNS)}
+        for col, (low, high) in bounds.items():
+            print(f"   {col} tartomány: {low:.2f} - {high:.2f}")
+        
+        # Kompozit score a mintán, ugyanazokkal a lépésekkel, mint a 2. menetben
+        sample = pd.DataFrame(reservoir[:min(rows, reservoir_size)], columns=self.SCORE_COLUMNS)
+        sample = self.normalize_environmental_scores(sample, bounds)
+        sample = self.normalize_other_scores(sample, bounds)
+        sample = self.calculate_composite_score(sample, verbose=False)
+        quartile_edges = np.nanquantile(sample['composite_score'], [0.25, 0.5, 0.75])
+        print(f"   Kompozit score kvartilis határok (~{len(sample)} elemű mintából): "
+              f"{', '.join(f'{edge:.2f}' for edge in quartile_edges)}")
+        
+        return {'encoding': encoding, 'columns': list(columns), 'rows': rows,
+                'bounds': bounds, 'quartile_edges': quartile_edges}
+    
+    def process_streaming(self, output_path="data/processed_recipes.csv", sample_size=50,
+                          index_path="data/recipe_ann_index.npz", snapshot_dir="data/recipe_snapshot",
+                          full_output_path="data/processed_recipes_full.csv", chunksize=50000, seed=42):
+        """Korlátos memóriájú pipeline nagy forrás fájlokhoz (két menet, chunksize soros darabok)
+        
+        1. menet: scan_source (tartományok + kvartilis határok)
+        2. menet: darabonként normalizálás, tisztítás, kép URL-ek, hozzáírás a full_output_path
+        fájlhoz; közben kvartilisenként egyenletes véletlen minta (legkisebb véletlen kulcsú
+        sorok) a user study mintához.
+        """
+        print("🚀 MAGYAR RECEPTEK FELDOLGOZÁSA (streaming)")
+        print("=" * 50)
+        
+        scan = self.scan_source(chunksize=chunksize, seed=seed)
+        if scan is None:
+            return False
+        
+        # Kvartilisenkénti mintaméret - mint create_user_study_sample-ben
+        targets = [sample_size // 4 + (1 if i < sample_size % 4 else 0) for i in range(4)]
+        kept = [None] * 4
+        rng = np.random.default_rng(seed)
+        
+        print(f"🔁 2. menet ({chunksize} soros darabok) -> {full_output_path}")
+        os.makedirs(os.path.dirname(full_output_path) or '.', exist_ok=True)
+        written = 0
+        with open(full_output_path, 'w', encoding='utf-8', newline='') as output:
+            for chunk in iter_csv_chunks(self.csv_path, chunksize, encoding=scan['encoding']):
+                for col in self.OPTIONAL_COLUMNS:
+                    if col not in chunk.columns:
+                        chunk[col] = ''
+                
+                chunk = self.normalize_environmental_scores(chunk, scan['bounds'])
+                chunk = self.normalize_other_scores(chunk, scan['bounds'])
+                chunk = self.calculate_composite_score(chunk, verbose=False)
+                chunk = self.clean_text_data(chunk, start_id=written + 1, verbose=False)
+                chunk = self.process_image_urls(chunk, verbose=False)
+                
+                chunk.to_csv(output, header=written == 0, index=False)
+                written += len(chunk)
+                
+                # Kvartilisenként a legkisebb véletlen kulcsú sorok maradnak (egyenletes minta)
+                quartiles = np.digitize(chunk['composite_score'].to_numpy(), scan['quartile_edges'])
+                keys = rng.random(len(chunk))
+                for q in range(4):
+                    candidates = chunk[quartiles == q].assign(_sample_key=keys[quartiles == q])
+                    if kept[q] is not None:
+                        candidates = pd.concat([kept[q], candidates])
+                    kept[q] = candidates.nsmallest(targets[q], '_sample_key')
+                
+                print(f"   {written}/{scan['rows']} recept feldolgozva")
+        
+        print(f"💾 Teljes feldolgozott adat: {full_output_path} "
+              f"({os.path.getsize(full_output_path) / 1024 / 1024:.1f} MB)")
+        
+        print(f"🎯 User study minta ({sample_size} recept, kvartilisenként)...")
+        sampled_dfs = []
+        for label, target, sampled in zip(self.QUARTILE_LABELS, targets, kept):
+            sampled = sampled.drop(columns='_sample_key').assign(score_quartile=label)
+            print(f"   {label}: {len(sampled)} recept")
+            sampled_dfs.append(sampled)
+        self.processed_data = pd.concat(sampled_dfs, ignore_index=True)
+        
+        self.generate_statistics_report(self.processed_data)
+        
+        return self.save_outputs(output_path, index_path, snapshot_dir, full_output_path)
+    
+    def process_all(self, output_path="data/processed_recipes.csv", sample_size=50,
+                    index_path="data/recipe_ann_index.npz", snapshot_dir="data/recipe_snapshot",
+                    streaming=False, chunksize=50000, full_output_path="data/processed_recipes_full.csv"):
+        """Teljes feldolgozási pipeline (streaming=True: korlátos memóriájú, kétmenetes változat)"""
+        if streaming:
+            return self.process_streaming(output_path, sample_size, index_path, snapshot_dir,
+                                          full_output_path=full_output_path, chunksize=chunksize)
+        
         print("🚀 MAGYAR RECEPTEK FELDOLGOZÁSA")
         print("=" * 50)
         
@@ -297,39 +566,37 @@ class HungarianRecipeProcessor:
         # 7. User study minta létrehozása
         self.processed_data = self.create_user_study_sample(df, sample_size)
         
+        # A teljes katalógus is mentésre kerül (ebből épül az ANN index, RECIPE_CATALOGUE-ként betölthető)
+        os.makedirs(os.path.dirname(full_output_path) or '.', exist_ok=True)
+        df.to_csv(full_output_path, index=False, encoding='utf-8')
+        print(f"💾 Teljes feldolgozott adat: {full_output_path} ({len(df)} recept)")
+        
         # 8. Statisztikák
         self.generate_statistics_report(self.processed_data)
         
         # 9. Mentés
-        try:
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            self.processed_data.to_csv(output_path, index=False, encoding='utf-8')
-            
-            print(f"\n💾 Feldolgozott adatok mentve: {output_path}")
-            print(f"📁 Fájlméret: {os.path.getsize(output_path) / 1024:.1f} KB")
-            
-            # 10. Mintaadatok kiírása
-            print(f"\n📋 MINTA RECEPTEK:")
-            for i in range(min(3, len(self.processed_data))):
-                recipe = self.processed_data.iloc[i]
-                print(f"   {i+1}. {recipe['title']}")
-                print(f"      Kép: {recipe['images'][:60]}...")
-                print(f"      Scores: HSI={recipe['HSI']:.1f}, ESI={recipe['ESI']:.1f}, PPI={recipe['PPI']:.1f}")
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Mentési hiba: {e}")
-            return False
+        return self.save_outputs(output_path, index_path, snapshot_dir, full_output_path)
 
 def main():
     """Fő feldolgozási script"""
-    processor = HungarianRecipeProcessor("hungarian_recipes_github.csv")
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--input', default="hungarian_recipes_github.csv", help='Forrás CSV')
+    parser.add_argument('--stream', action='store_true',
+                        help='Kétmenetes, darabonkénti feldolgozás korlátos memóriával (nagy fájlokhoz)')
+    parser.add_argument('--chunksize', type=int, default=50000, help='Sorok száma darabonként (--stream)')
+    parser.add_argument('--full-output', default="data/processed_recipes_full.csv",
+                        help='Az összes feldolgozott recept (ebből épül az ANN index)')
+    args = parser.parse_args()
+    
+    processor = HungarianRecipeProcessor(args.input)
     
     # Teljes feldolgozás 50 recepttel a user study-hoz
     success = processor.process_all(
         output_path="data/processed_recipes.csv",
-        sample_size=50
+        sample_size=50,
+        streaming=args.stream,
+        chunksize=args.chunksize,
+        full_output_path=args.full_output
     )
     
     if success:
@@ -10,6 +10,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from user_study.csv_loading import read_csv
+
 def setup_csv_for_heroku():
     """CSV setup Heroku-hoz optimalizálva"""
     print("🚀 Heroku CSV Setup - Processing hungarian_recipes_github.csv")
@@ -31,22 +33,12 @@ def setup_csv_for_heroku():
         # CSV betöltése
         print("📋 Loading hungarian_recipes_github.csv...")
         
-        # Encoding detection
-        encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-        df = None
-        used_encoding = None
-        
-        for encoding in encodings:
-            try:
-                df = pd.read_csv(original_csv, encoding=encoding)
-                used_encoding = encoding
-                print(f"✅ Successfully loaded with {encoding} encoding")
-                break
-            except (UnicodeDecodeError, pd.errors.EmptyDataError):
-                continue
-        
-        if df is None:
-            print("❌ Failed to load CSV with any encoding")
+        # Encoding detection from a byte sample, then a single parse
+        try:
+            df, used_encoding = read_csv(original_csv)
+            print(f"✅ Successfully loaded with {used_encoding} encoding")
+        except pd.errors.EmptyDataError:
+            print("❌ Failed to load CSV: empty file")
             return create_fallback_csv(output_csv)
         
         print(f"📊 Loaded {len(df)} recipes")
@@ -122,54 +114,47 @@ def process_hungarian_csv(df):
         df = clean_text_data(df)
         
         # Process images
-       def process_image_urls(df):
-    """Process image URLs - JAVÍTOTT verzió idézőjelek és többszörös URL-ek kezelésével"""
-    print("🖼️ Processing image URLs...")
-    
-    def clean_image_url(img_string):
-        """Clean image URL - eltávolítja az idézőjeleket és veszi az első URL-t"""
-        
-        if pd.isna(img_string) or not img_string:
-            return get_fallback_image()
-        
-        # String-gé konvertálás
-        img_str = str(img_string).strip()
-        
-        # Üres ellenőrzés
-        if not img_str or img_str.lower() in ['nan', '', 'null']:
-            return get_fallback_image()
+        df = process_image_urls(df)
         
-        # KULCS FIX: Idézőjelek eltávolítása
-        img_str = img_str.strip('"').strip("'")
+        print(f"✅ Processed {len(df)} recipes")
+        return df
         
-        # Többszörös URL kezelése - vesszővel elválasztott
-        if ',' in img_str:
-            urls = img_str.split(',')
-            first_url = urls[0].strip().strip('"').strip("'")
-        else:
-            first_url = img_str
-        
-        # URL validálás és javítás
-        if first_url.startswith('http'):
-            # HTTPS biztosítása
-            if first_url.startswith('http://'):
-                first_url = first_url.replace('http://', 'https://')
-            
-            print(f"   ✅ Valid image URL: {first_url[:60]}...")
-            return first_url
-        
-        elif first_url.startswith('www.'):
-            clean_url = f"https://{first_url}"
-            print(f"   🔧 Fixed www URL: {clean_url[:60]}...")
-            return clean_url
-        
-        else:
-            print(f"   ⚠️ Invalid URL format: {first_url[:60]}...")
-            return get_fallback_image()
-    
-    # Apply image processing
+    except Exception as e:
+        print(f"❌ Processing error: {e}")
+        return None
+
+def process_image_urls(df):
+    """Process image URLs - JAVÍTOTT verzió idézőjelek és többszörös URL-ek kezelésével (vektorizált)"""
+    print("🖼️ Processing image URLs...")
     print(f"🔍 Processing {len(df)} image URLs...")
-    df['images'] = df['images'].apply(clean_image_url)
+    
+    # String-gé konvertálás (NaN / üres / 'nan' / 'null' -> lent fallback, mert nem URL)
+    img_str = df['images'].fillna('').astype(str).str.strip()
+    
+    # KULCS FIX: Idézőjelek eltávolítása
+    img_str = img_str.str.strip('"').str.strip("'")
+    
+    # Többszörös URL kezelése - vesszővel elválasztott: csak ezekben a sorokban az első URL, újra tisztítva
+    first_url = img_str.copy()
+    has_comma = img_str.str.contains(',', regex=False)
+    first_url[has_comma] = (img_str[has_comma].str.extract('^([^,]*)', expand=False)
+                            .str.strip().str.strip('"').str.strip("'"))
+    
+    # URL validálás és javítás: http:// -> https://, www. -> https://www., minden más fallback
+    is_http = first_url.str.startswith('http')
+    is_www = pd.Series(False, index=first_url.index)
+    is_www[~is_http] = first_url[~is_http].str.startswith('www.')
+    is_invalid = ~(is_http | is_www)
+    
+    plain_http = is_http & first_url.str.startswith('http://')
+    first_url[plain_http] = first_url[plain_http].str.replace('http://', 'https://', regex=False)
+    first_url[is_www] = 'https://' + first_url[is_www]
+    first_url[is_invalid] = get_fallback_images(int(is_invalid.sum()))
+    df['images'] = first_url
+    
+    print(f"   ✅ Valid image URLs: {int(is_http.sum())}")
+    print(f"   🔧 Fixed www URLs: {int(is_www.sum())}")
+    print(f"   ⚠️ Invalid URL format: {int(is_invalid.sum())}")
     
     # Debug: első 5 kép ellenőrzése
     print(f"🖼️ Processed image URLs (first 5):")
@@ -179,7 +164,7 @@ def process_hungarian_csv(df):
         print(f"      Image: {recipe['images']}")
     
     # Statisztika
-    valid_images = sum(1 for img in df['images'] if img.startswith('http') and 'fallback' not in img)
+    valid_images = int((df['images'].str.startswith('http') & ~df['images'].str.contains('fallback', regex=False)).sum())
     fallback_images = len(df) - valid_images
     
     print(f"📊 Image processing results:")
@@ -188,40 +173,29 @@ def process_hungarian_csv(df):
     
     return df
 
+# Garantáltan működő Unsplash képek
+FALLBACK_IMAGES = [
+    'https://images.unsplash.com/photo-1547592180-85f173990554?w=400&h=300&fit=crop&auto=format',
+    'https://images.unsplash.com/photo-1565299624946-b28f40a0ca4b?w=400&h=300&fit=crop&auto=format', 
+    'https://images.unsplash.com/photo-1544943910-4c1dc44aab44?w=400&h=300&fit=crop&auto=format',
+    'https://images.unsplash.com/photo-1558030006-450675393462?w=400&h=300&fit=crop&auto=format',
+    'https://images.unsplash.com/photo-1572441713132-51c75654db73?w=400&h=300&fit=crop&auto=format'
+]
+
 def get_fallback_image():
     """Get fallback image URL"""
-    # Garantáltan működő Unsplash képek
-    fallback_images = [
-        'https://images.unsplash.com/photo-1547592180-85f173990554?w=400&h=300&fit=crop&auto=format',
-        'https://images.unsplash.com/photo-1565299624946-b28f40a0ca4b?w=400&h=300&fit=crop&auto=format', 
-        'https://images.unsplash.com/photo-1544943910-4c1dc44aab44?w=400&h=300&fit=crop&auto=format',
-        'https://images.unsplash.com/photo-1558030006-450675393462?w=400&h=300&fit=crop&auto=format',
-        'https://images.unsplash.com/photo-1572441713132-51c75654db73?w=400&h=300&fit=crop&auto=format'
-    ]
-    return np.random.choice(fallback_images)
+    return np.random.choice(FALLBACK_IMAGES)
+
+def get_fallback_images(count):
+    """Get `count` fallback image URLs at once (ugyanaz a véletlen sorozat, mint egyenként)"""
+    return np.random.choice(FALLBACK_IMAGES, size=count)
 
 def process_original_csv(original_path, output_path):
     """Eredeti CSV feldolgozása - ENCODING FIX-szel"""
     try:
-        # TÖBB ENCODING PRÓBÁLÁSA
-        encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1', 'windows-1252']
-        df = None
-        used_encoding = None
-        
-        for encoding in encodings:
-            try:
-                print(f"🔄 Próbálkozás {encoding} encoding-gal...")
-                df = pd.read_csv(original_path, encoding=encoding)
-                used_encoding = encoding
-                print(f"✅ Sikeres betöltés {encoding} encoding-gal!")
-                break
-            except (UnicodeDecodeError, pd.errors.EmptyDataError) as e:
-                print(f"   ❌ {encoding} sikertelen: {str(e)[:50]}...")
-                continue
-        
-        if df is None:
-            print("❌ CSV betöltés minden encoding-gal sikertelen!")
-            return CSVProcessor.create_sample_csv(output_path)
+        # Encoding felismerés bájt mintából, egyetlen parse
+        df, used_encoding = read_csv(original_path)
+        print(f"✅ Sikeres betöltés {used_encoding} encoding-gal!")
         
         print(f"📋 Eredeti CSV betöltve: {len(df)} recept, encoding: {used_encoding}")
         print(f"📋 Oszlopok: {list(df.columns)}")
@@ -327,50 +301,6 @@ def clean_text_data(df):
     
     return df
 
-def process_image_urls(df):
-    """Process image URLs"""
-    print("🖼️ Processing image URLs...")
-    
-    def clean_image_url(img_string):
-        if pd.isna(img_string) or not img_string or img_string.strip() == '':
-            return get_fallback_image()
-        
-        # If it's a string with multiple URLs, take the first one
-        if isinstance(img_string, str):
-            urls = str(img_string).split(',')
-            first_url = urls[0].strip().strip('"').strip("'")
-            
-            # Check if it's a valid URL
-            if first_url.startswith('http'):
-                return first_url
-            elif first_url.startswith('www.'):
-                return f"https://{first_url}"
-        
-        return get_fallback_image()
-    
-    # Apply image processing
-    df['images'] = df['images'].apply(clean_image_url)
-    
-    # Count external vs fallback images
-    external_count = sum(1 for img in df['images'] if img.startswith('http') and 'unsplash' not in img)
-    fallback_count = len(df) - external_count
-    
-    print(f"   External images: {external_count}")
-    print(f"   Fallback images: {fallback_count}")
-    
-    return df
-
-def get_fallback_image():
-    """Get fallback image URL"""
-    fallback_images = [
-        'https://images.unsplash.com/photo-1547592180-85f173990554?w=400&h=300&fit=crop',
-        'https://images.unsplash.com/photo-1565299624946-b28f40a0ca4b?w=400&h=300&fit=crop',
-        'https://images.unsplash.com/photo-1544943910-4c1dc44aab44?w=400&h=300&fit=crop',
-        'https://images.unsplash.com/photo-1558030006-450675393462?w=400&h=300&fit=crop',
-        'https://images.unsplash.com/photo-1572441713132-51c75654db73?w=400&h=300&fit=crop'
-    ]
-    return np.random.choice(fallback_images)
-
 def create_fallback_csv(output_path):
     """Create fallback CSV if original processing fails"""
     print("🔧 Creating fallback CSV with sample Hungarian recipes...")
@@ -0,0 +1,46 @@
+"""/admin/export: nyers résztvevői adatok csak érvényes ADMIN_TOKEN-nel"""
+
+import pytest
+from flask import Flask
+
+from user_study import user_study as us
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    database = us.UserStudyDatabase(str(tmp_path / 'study.db'), write_behind=False)
+    monkeypatch.setattr(us, 'db', database)
+    app = Flask(__name__)
+    app.register_blueprint(us.user_study_bp)
+    yield app.test_client()
+    database.close()
+
+
+def test_export_without_configured_token_is_forbidden(client, monkeypatch):
+    monkeypatch.delenv('ADMIN_TOKEN', raising=False)
+    assert client.get('/admin/export/participants').status_code == 403
+    assert client.get('/admin/export/participants', headers={'X-Admin-Token': ''}).status_code == 403
+
+
+@pytest.mark.parametrize('headers', [
+    {},
+    {'X-Admin-Token': 'rossz'},
+    {'Authorization': 'Bearer rossz'},
+    {'Authorization': 'titok'},
+])
+def test_export_with_missing_or_wrong_token_is_forbidden(client, monkeypatch, headers):
+    monkeypatch.setenv('ADMIN_TOKEN', 'titok')
+    response = client.get('/admin/export/participants', headers=headers)
+    assert response.status_code == 403
+    assert b'user_id' not in response.data
+
+
+@pytest.mark.parametrize('headers', [
+    {'X-Admin-Token': 'titok'},
+    {'Authorization': 'Bearer titok'},
+])
+def test_export_with_valid_token_streams_table(client, monkeypatch, headers):
+    monkeypatch.setenv('ADMIN_TOKEN', 'titok')
+    response = client.get('/admin/export/participants?format=csv', headers=headers)
+    assert response.status_code == 200
+    assert response.data.decode('utf-8').splitlines()[0].startswith('user_id')
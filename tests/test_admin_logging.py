@@ -0,0 +1,50 @@
+"""/admin/logging: csak admin tokennel, hibás érték esetén 400 és változatlan beállítás"""
+
+import pytest
+from flask import Flask
+
+from user_study import logging_utils
+from user_study import user_study as us
+
+ADMIN = {'X-Admin-Token': 'titok'}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', 'titok')
+    before = logging_utils.logging_config()
+    app = Flask(__name__)
+    app.register_blueprint(us.user_study_bp)
+    yield app.test_client()
+    logging_utils.set_log_level(before['level'])
+    logging_utils.set_debug_sample_rate(before['debug_sample_rate'])
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Admin-Token': 'rossz'}])
+def test_logging_requires_admin_token(client, headers):
+    before = logging_utils.logging_config()
+    assert client.get('/admin/logging', headers=headers).status_code == 403
+    response = client.post('/admin/logging', json={'level': 'DEBUG', 'debug_sample_rate': 1.0}, headers=headers)
+    assert response.status_code == 403
+    assert logging_utils.logging_config() == before
+
+
+def test_logging_applies_valid_values_and_clamps_rate(client):
+    response = client.post('/admin/logging', json={'level': 'debug', 'debug_sample_rate': 1.0}, headers=ADMIN)
+    assert response.status_code == 200
+    assert response.get_json()['level'] == 'DEBUG'
+    assert response.get_json()['debug_sample_rate'] == logging_utils.MAX_DEBUG_SAMPLE_RATE
+
+
+@pytest.mark.parametrize('payload', [
+    {'level': 'VERBOSE'},
+    {'level': 'DEBUG', 'debug_sample_rate': 'sok'},
+    {'level': 'DEBUG', 'debug_sample_rate': 'nan'},
+    {'debug_sample_rate': -0.1},
+    {'debug_sample_rate': 'inf'},
+])
+def test_logging_rejects_bad_values_without_applying_any(client, payload):
+    before = logging_utils.logging_config()
+    response = client.post('/admin/logging', json=payload, headers=ADMIN)
+    assert response.status_code == 400
+    assert logging_utils.logging_config() == before
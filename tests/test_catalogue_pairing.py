@@ -0,0 +1,67 @@
+"""Recept snapshot + ANN index: csak azonos katalógusból épült pár töltődik be együtt"""
+
+import logging
+import random
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from user_study.ann_index import IVFIndex
+from user_study.recipe_store import RecipeStore, catalogue_fingerprint
+from user_study.user_study import EnhancedRecipeRecommender
+
+WORDS = ['hagyma', 'paprika', 'tojás', 'liszt', 'tej', 'vaj', 'só', 'bors', 'fokhagyma', 'csirke',
+         'burgonya', 'rizs', 'sajt', 'tejföl', 'cukor', 'alma', 'répa', 'káposzta', 'gomba', 'bab']
+
+
+def _recipes(n, first_id=1, seed=0):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'recipeid': range(first_id, first_id + n),
+        'title': [f'Recept {i}' for i in range(n)],
+        'ingredients': [', '.join(rng.sample(WORDS, 5)) for _ in range(n)],
+        'HSI': 50.0, 'ESI': 50.0, 'PPI': 50.0, 'composite_score': 50.0,
+    })
+
+
+def _load_ann_index(store, index_path):
+    recommender = SimpleNamespace(store=store, ANN_MIN_RECIPES=0, ANN_MIN_RECALL=0.0)
+    return EnhancedRecipeRecommender.load_ann_index(recommender, index_path), recommender
+
+
+def test_snapshot_and_index_store_the_same_fingerprint(tmp_path):
+    catalogue = _recipes(300)
+    store = RecipeStore.from_dataframe(catalogue)
+    store.save_snapshot(tmp_path / 'snapshot')
+    index = IVFIndex.build(catalogue['ingredients'].tolist(), catalogue['recipeid'].to_numpy())
+    index.save(tmp_path / 'index.npz')
+
+    expected = catalogue_fingerprint(catalogue['recipeid'])
+    assert expected['rows'] == 300
+    assert RecipeStore.load_snapshot(tmp_path / 'snapshot').catalogue == expected
+    assert IVFIndex.load(tmp_path / 'index.npz').catalogue == expected
+
+
+def test_index_from_other_catalogue_is_not_loaded(tmp_path, caplog):
+    catalogue = _recipes(300)
+    IVFIndex.build(catalogue['ingredients'].tolist(), catalogue['recipeid'].to_numpy()).save(tmp_path / 'index.npz')
+    # A minta: a katalógus első 50 receptje (az ID-k mind megvannak az indexben)
+    sample_store = RecipeStore.from_dataframe(catalogue.head(50))
+
+    module_logger = logging.getLogger('user_study.user_study')
+    module_logger.addHandler(caplog.handler)
+    try:
+        index, _ = _load_ann_index(sample_store, tmp_path / 'index.npz')
+    finally:
+        module_logger.removeHandler(caplog.handler)
+
+    assert index is None
+    assert any('más katalógushoz' in record.getMessage() for record in caplog.records)
+
+
+@pytest.mark.parametrize('first_id', [1, 1001])
+def test_same_size_different_ids_changes_fingerprint(first_id):
+    left = catalogue_fingerprint(_recipes(100)['recipeid'])
+    right = catalogue_fingerprint(_recipes(100, first_id=first_id)['recipeid'])
+    assert (left == right) == (first_id == 1)
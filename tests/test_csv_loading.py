@@ -0,0 +1,96 @@
+"""repair_text: a forrás CSV '?'-re cserélt ő / ű / ü betűinek javítása"""
+
+import logging
+
+import pytest
+
+from user_study.csv_loading import RepairingTextReader, detect_encoding, repair_text
+
+
+@pytest.mark.parametrize('damaged, expected', [
+    # '?'-re végződő tövek
+    ('s?r?', 'sűrű'),
+    ('egyszer?', 'egyszerű'),
+    ('h?t?', 'hűtő'),
+    ('méret?', 'méretű'),
+    ('szegf?', 'szegfű'),
+    ('kakukkf?', 'kakukkfű'),
+    # '?' a szó elején vagy végén
+    ('Egyszer?', 'Egyszerű'),
+    ('el?', 'elő'),
+    ('?ket', 'őket'),
+    ('?rölt', 'őrölt'),
+    ('?szibarack', 'őszibarack'),
+    # több '?' egy szóban
+    ('Leny?göz?', 'Lenyűgöző'),
+])
+def test_repairs_damaged_words(damaged, expected):
+    assert repair_text(damaged) == expected
+
+
+@pytest.mark.parametrize('damaged, expected', [
+    ('Melegítsd el? a sütőt 180 fokra.', 'Melegítsd elő a sütőt 180 fokra.'),
+    ('Keverd össze az els? 4 hozzávalót.', 'Keverd össze az első 4 hozzávalót.'),
+    ('só, kakukkf?, bors', 'só, kakukkfű, bors'),
+    ('Egyszer? Mini Húspogácsák', 'Egyszerű Mini Húspogácsák'),
+    ('?rölt fekete bors', 'őrölt fekete bors'),
+    ('Tálald ?ket melegen.', 'Tálald őket melegen.'),
+    ('amíg a burgonya meg nem f?.', 'amíg a burgonya meg nem fő.'),
+    ('Leny?göz? vacsora', 'Lenyűgöző vacsora'),
+    ('puha-csip?s', 'puha-csipős'),
+])
+def test_repairs_words_in_context(damaged, expected):
+    assert repair_text(damaged) == expected
+
+
+@pytest.mark.parametrize('text', [
+    'Szereted a sok babot a chilidben? Adj hozzá egy másik konzervet.',
+    'Nem szereted a babot?\nHagyd ki.',
+    'Mi ez?',
+    'Miért nem erre gondoltam?! Imádom.',
+    'Kész? ',
+    'https://example.com/kep.jpg?w=300&h=200',
+    'https://example.com/recept-nev?utm=1',
+    ' ? ',
+])
+def test_keeps_real_question_marks_and_urls(text):
+    assert repair_text(text) == text
+
+
+def test_reader_matches_whole_text_repair_across_block_boundaries(tmp_path):
+    text = ('Melegítsd el? a sütőt. Szereted a babot? Hagyd ki. Tedd a hűt?be, '
+            'majd ?ket is. Keverd össze az els? 3 hozzávalót.\n') * 50
+    path = tmp_path / 'recipes.csv'
+    path.write_bytes(text.encode('utf-8'))
+    for block_size in (7, 64, 1000):
+        with RepairingTextReader(str(path), block_size=block_size) as stream:
+            assert stream.read() == repair_text(text)
+
+
+def test_invalid_bytes_outside_samples_decode_as_cp1250(tmp_path, caplog):
+    # UTF-8 fájl, a mintákon (eleje / közepe / vége) kívül egy cp1250 kódolású sorral
+    line = 'Gulyás,"hagyma, paprika",Főzd meg.\n'.encode('utf-8')
+    path = tmp_path / 'mixed.csv'
+    path.write_bytes(line * 3000 + 'Lecsó,tűzről,kész\n'.encode('cp1250') + line * 9000)
+    assert detect_encoding(path) == 'utf-8'
+
+    module_logger = logging.getLogger('user_study.csv_loading')
+    module_logger.addHandler(caplog.handler)
+    try:
+        with RepairingTextReader(path) as stream:
+            text = stream.read()
+    finally:
+        module_logger.removeHandler(caplog.handler)
+
+    assert 'Lecsó,tűzről,kész\n' in text
+    assert '�' not in text
+    assert stream.fallback_bytes == 4  # ó, ű, ő, é
+    assert any('cp1250' in record.getMessage() for record in caplog.records)
+
+
+def test_valid_file_has_no_fallback_bytes(tmp_path):
+    path = tmp_path / 'clean.csv'
+    path.write_text('name,ingredients\nLecsó,"paprika, hagyma"\n', encoding='utf-8')
+    with RepairingTextReader(path) as stream:
+        stream.read()
+    assert stream.fallback_bytes == 0
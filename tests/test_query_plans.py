@@ -0,0 +1,52 @@
+"""Az /admin/stats lekérdezései nagy adatbázison sem járják be a nyers táblákat (csak SEARCH)"""
+
+import random
+
+import pytest
+
+from user_study.migrations import full_table_scans
+from user_study.user_study import STATS_QUERIES, UserStudyDatabase
+
+
+@pytest.fixture(scope='module')
+def database(tmp_path_factory):
+    """20 000 résztvevő, 100 000 interakció, kérdőívek a befejezett résztvevőknek"""
+    rng = random.Random(0)
+    database = UserStudyDatabase(str(tmp_path_factory.mktemp('plans') / 'study.db'), write_behind=False)
+    participants = [(rng.choice(['v1', 'v2', 'v3']), rng.random() < 0.7) for _ in range(20000)]
+    with database.get_connection() as conn:
+        conn.executemany(
+            'INSERT INTO participants (age_group, education, cooking_frequency, sustainability_awareness, '
+            'version, is_completed) VALUES (?, ?, ?, ?, ?, ?)',
+            [('25-34', 'MSc', 'daily', 3, version, completed) for version, completed in participants])
+        conn.executemany(
+            'INSERT INTO interactions (user_id, recipe_id, rating, interaction_order) VALUES (?, ?, ?, ?)',
+            [(rng.randint(1, 20000), rng.randint(1, 50), rng.randint(1, 5), rng.randint(1, 5))
+             for _ in range(100000)])
+        conn.executemany(
+            'INSERT INTO questionnaire (user_id, system_usability, recommendation_quality, trust_level, '
+            'explanation_clarity, overall_satisfaction) VALUES (?, ?, ?, ?, ?, ?)',
+            [(user_id, *(rng.randint(1, 5) for _ in range(5)))
+             for user_id, (_, completed) in enumerate(participants, start=1) if completed])
+        conn.execute('ANALYZE')
+    yield database
+    database.close()
+
+
+def test_stats_page_queries_only_search(database):
+    assert database.check_query_plans() == {}
+
+
+def test_covering_index_scan_is_reported(database):
+    # A COUNT(*) a teljes indexet bejárja - a nyers ellenőrző aggregátum szándékosan O(N)
+    scans = full_table_scans(database.get_connection(), STATS_QUERIES['total_participants'])
+    assert scans and all(' USING COVERING INDEX ' in scan for scan in scans)
+    assert database.check_query_plans({'raw': STATS_QUERIES['total_participants']}) == {'raw': scans}
+
+
+def test_allowlisted_scan_is_accepted(database):
+    conn = database.get_connection()
+    sql = 'SELECT * FROM version_stats ORDER BY version'
+    assert full_table_scans(conn, sql)
+    assert full_table_scans(conn, sql, allowed_scans=('version_stats',)) == []
+    assert full_table_scans(conn, 'SELECT * FROM participants WHERE user_id = ?', (1,)) == []
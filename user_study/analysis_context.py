@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Elemzési pillanatkép - az adatbázis egyszeri, konzisztens beolvasása
+Az összes elemzés ugyanazokon a DataFrame-eken dolgozik, a származtatott
+táblák (pl. résztvevő-kérdőív merge) egyszer számolódnak
+"""
+
+import sqlite3
+from functools import cached_property
+
+import pandas as pd
+
+SNAPSHOT_TABLES = ('participants', 'interactions', 'questionnaire')
+
+
+class AnalysisSnapshot:
+    """A három tanulmány tábla egy időpontbeli állapota + memoizált származtatott adatok"""
+
+    def __init__(self, participants, interactions, questionnaire, taken_at=None):
+        self.participants = participants
+        self.interactions = interactions
+        self.questionnaire = questionnaire
+        self.taken_at = taken_at if taken_at is not None else pd.Timestamp.now()
+        self._derived = {}
+
+    @classmethod
+    def load(cls, db_path, use_backup=False):
+        """Pillanatkép betöltése
+
+        use_backup=False: egy olvasó tranzakció alatt mindhárom tábla (WAL mellett
+        az írókat nem blokkolja, és a három lekérdezés ugyanazt az állapotot látja).
+        use_backup=True: SQLite backup API-val memóriába másolás, majd onnan olvasás
+        (a forrás fájlon a lehető legrövidebb ideig tart a zárolás).
+        """
+        source = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            if use_backup:
+                conn = sqlite3.connect(':memory:')
+                source.backup(conn)
+            else:
+                conn = source
+                conn.execute('BEGIN')
+            frames = {table: pd.read_sql_query(f'SELECT * FROM {table}', conn) for table in SNAPSHOT_TABLES}
+            if conn is source:
+                conn.execute('COMMIT')
+            else:
+                conn.close()
+        finally:
+            source.close()
+        return cls(**frames)
+
+    @cached_property
+    def participant_questionnaire(self):
+        """Résztvevők és kérdőívek inner join-ja user_id szerint"""
+        return pd.merge(self.participants, self.questionnaire, on='user_id', how='inner')
+
+    @cached_property
+    def completed_participants(self):
+        return self.participants[self.participants['is_completed'] == True]
+
+    def derive(self, name, compute):
+        """Tetszőleges származtatott eredmény memoizálása a pillanatkép élettartamára"""
+        if name not in self._derived:
+            self._derived[name] = compute()
+        return self._derived[name]
+
+    def __repr__(self):
+        return (f"AnalysisSnapshot(participants={len(self.participants)}, interactions={len(self.interactions)}, "
+                f"questionnaire={len(self.questionnaire)}, taken_at={self.taken_at:%Y-%m-%d %H:%M:%S})")
@@ -6,53 +6,100 @@ Statisztikai kiértékelés és vizualizáció
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from scipy import stats
 from pathlib import Path
-import sqlite3
 from typing import Dict, List, Tuple
+import argparse
 import json
+import sys
+import time
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from user_study.analysis_context import AnalysisSnapshot
+from user_study.incremental_stats import IncrementalVersionStats
+from user_study.resampling import resampling_comparison
+from user_study.figures import FIGURE_DPI, figure_specs, render_figures
 
 class UserStudyAnalyzer:
     """Felhasználói tanulmány elemzési eszközei"""
     
-    def __init__(self, db_path: str = "user_study.db"):
+    def __init__(self, db_path: str = "user_study.db", use_backup: bool = False):
         self.db_path = db_path
+        self.use_backup = use_backup
         self.results_dir = Path("results")
         self.results_dir.mkdir(exist_ok=True)
+        self._snapshot = None
+    
+    @property
+    def snapshot(self) -> AnalysisSnapshot:
+        """Egyszer betöltött, konzisztens pillanatkép - minden elemzés ezt használja"""
+        if self._snapshot is None:
+            self._snapshot = AnalysisSnapshot.load(self.db_path, use_backup=self.use_backup)
+        return self._snapshot
+    
+    def refresh(self):
+        """Új pillanatkép a következő elemzéshez (pl. további adatgyűjtés után)"""
+        self._snapshot = None
     
     def load_data(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-        """Adatok betöltése az adatbázisból"""
-        conn = sqlite3.connect(self.db_path)
-        
-        participants = pd.read_sql_query('SELECT * FROM participants', conn)
-        interactions = pd.read_sql_query('SELECT * FROM interactions', conn)
-        questionnaire = pd.read_sql_query('SELECT * FROM questionnaire', conn)
-        
-        conn.close()
-        return participants, interactions, questionnaire
+        """Adatok a közös pillanatképből (nem olvas újra az adatbázisból)"""
+        snapshot = self.snapshot
+        return snapshot.participants, snapshot.interactions, snapshot.questionnaire
     
     def basic_statistics(self) -> Dict:
         """Alapvető statisztikák"""
+        return self.snapshot.derive('basic_statistics', self._basic_statistics)
+    
+    def _basic_statistics(self) -> Dict:
         participants, interactions, questionnaire = self.load_data()
+        completed = self.snapshot.completed_participants
         
         stats = {
             'total_participants': len(participants),
-            'completed_participants': len(participants[participants['is_completed'] == True]),
-            'completion_rate': len(participants[participants['is_completed'] == True]) / len(participants) if len(participants) > 0 else 0,
+            'completed_participants': len(completed),
+            'completion_rate': len(completed) / len(participants) if len(participants) > 0 else 0,
             'version_distribution': participants['version'].value_counts().to_dict(),
             'avg_interactions_per_user': len(interactions) / len(participants) if len(participants) > 0 else 0
         }
         
         return stats
     
-    def compare_versions(self) -> Dict:
-        """Verziók összehasonlítása"""
-        participants, interactions, questionnaire = self.load_data()
+    def compare_versions(self, incremental: bool = False, resamples: int = 0, jobs: int = None) -> Dict:
+        """Verziók összehasonlítása (incremental=True: csak az előző futás óta érkezett sorok)
         
+        resamples > 0: bootstrap konfidencia intervallumok és páronkénti permutációs tesztek is.
+        """
+        if incremental:
+            comparison = self.compare_versions_incremental()
+        else:
+            comparison = self.snapshot.derive('compare_versions', self._compare_versions)
+        if resamples > 0:
+            comparison = {**comparison, **self.resampling_tests(resamples, jobs)}
+        return comparison
+    
+    def resampling_tests(self, resamples: int = 10000, jobs: int = None) -> Dict:
+        """Bootstrap CI-k (verziónként) és permutációs tesztek (verzió páronként) minden mutatóra"""
+        metrics = ['system_usability', 'recommendation_quality', 'trust_level', 
+                  'explanation_clarity', 'overall_satisfaction']
+        return self.snapshot.derive(
+            f'resampling_tests:{resamples}',
+            lambda: resampling_comparison(self.snapshot.participant_questionnaire, metrics,
+                                          n_resamples=resamples, jobs=jobs))
+    
+    def compare_versions_incremental(self) -> Dict:
+        """Futó összesítők frissítése a vízállásjel után, majd mentése a results mappába"""
+        running = IncrementalVersionStats(self.results_dir / "incremental_state.json")
+        running.load()
+        new_rows = running.update_from_db(self.db_path)
+        running.save()
+        print(f"🔁 Inkrementális frissítés: {new_rows} új kérdőív (vízállásjel: {running.watermark})")
+        return running.comparison()
+    
+    def _compare_versions(self) -> Dict:
         # Questionnaire eredmények verzió szerint
-        merged = pd.merge(participants, questionnaire, on='user_id', how='inner')
+        merged = self.snapshot.participant_questionnaire
         
         version_comparison = {}
         metrics = ['system_usability', 'recommendation_quality', 'trust_level', 
@@ -82,53 +129,38 @@ class UserStudyAnalyzer:
             'statistical_tests': statistical_tests
         }
     
-    def generate_plots(self):
-        """Vizualizációk generálása"""
+    def generate_plots(self, preview: bool = False, jobs: int = None, force: bool = False) -> Dict:
+        """Vizualizációk generálása: mutatónként külön ábra, csak a változottak renderelődnek újra
+        
+        preview=True: alacsony felbontás (admin felülethez) külön mappába.
+        """
         participants, interactions, questionnaire = self.load_data()
         
         if len(questionnaire) == 0:
             print("Nincs elegendő adat a vizualizációhoz")
-            return
+            return {}
         
         # Merged dataset
-        merged = pd.merge(participants, questionnaire, on='user_id', how='inner')
-        
-        plt.style.use('seaborn-v0_8')
-        fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-        fig.suptitle('User Study Results - Version Comparison', fontsize=16)
+        merged = self.snapshot.participant_questionnaire
         
         metrics = ['system_usability', 'recommendation_quality', 'trust_level', 
                   'explanation_clarity', 'overall_satisfaction']
         
-        for i, metric in enumerate(metrics):
-            row = i // 3
-            col = i % 3
-            
-            # Box plot verzió szerint
-            merged.boxplot(column=metric, by='version', ax=axes[row, col])
-            axes[row, col].set_title(f'{metric.replace("_", " ").title()}')
-            axes[row, col].set_xlabel('Version')
-            axes[row, col].set_ylabel('Rating (1-5)')
-        
-        # Version distribution
-        participants['version'].value_counts().plot(kind='bar', ax=axes[1, 2])
-        axes[1, 2].set_title('Version Distribution')
-        axes[1, 2].set_xlabel('Version')
-        axes[1, 2].set_ylabel('Count')
-        
-        plt.tight_layout()
-        plot_path = self.results_dir / "user_study_analysis.png"
-        plt.savefig(plot_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        print(f"Plot saved to: {plot_path}")
+        mode = 'preview' if preview else 'full'
+        figures_dir = self.results_dir / "figures" / mode
+        started = time.perf_counter()
+        figures = render_figures(figure_specs(merged, participants, metrics), figures_dir,
+                                 dpi=FIGURE_DPI[mode], jobs=jobs, force=force)
+        
+        rendered = sum(1 for _, status in figures.values() if status == 'rendered')
+        print(f"Plots saved to: {figures_dir} ({rendered} rendered, {len(figures) - rendered} unchanged, "
+              f"{time.perf_counter() - started:.1f} s)")
+        return {name: str(path) for name, (path, _) in figures.items()}
     
     def export_spss_format(self):
         """SPSS kompatibilis formátum exportálása"""
-        participants, interactions, questionnaire = self.load_data()
-        
         # Merged dataset SPSS-hez
-        merged = pd.merge(participants, questionnaire, on='user_id', how='inner')
+        merged = self.snapshot.participant_questionnaire
         
         # Változók átnevezése SPSS konvenciók szerint
         spss_data = merged.rename(columns={
@@ -153,10 +185,10 @@ class UserStudyAnalyzer:
         spss_path = self.results_dir / "spss_export"
         spss_path.mkdir(exist_ok=True)
         
-       spss_data.to_csv(spss_path / "user_study_data.csv", index=False)
-       
-       # SPSS syntax fájl generálása
-       syntax_content = f"""
+        spss_data.to_csv(spss_path / "user_study_data.csv", index=False)
+        
+        # SPSS syntax fájl generálása
+        syntax_content = f"""
 * SPSS Syntax for User Study Analysis
 * Generated automatically
 
@@ -225,18 +257,19 @@ ONEWAY OverallSatisfaction BY Version_Numeric
  /STATISTICS DESCRIPTIVES
  /POSTHOC TUKEY.
 """
-       
-       with open(spss_path / "analysis_syntax.sps", 'w', encoding='utf-8') as f:
-           f.write(syntax_content)
-       
-       print(f"SPSS data exported to: {spss_path}")
-   
-   def generate_report(self) -> str:
-       """HTML riport generálása"""
-       basic_stats = self.basic_statistics()
-       version_comparison = self.compare_versions()
-       
-       html_content = f"""
+        
+        with open(spss_path / "analysis_syntax.sps", 'w', encoding='utf-8') as f:
+            f.write(syntax_content)
+        
+        print(f"SPSS data exported to: {spss_path}")
+    
+    def generate_report(self, resamples: int = 0, jobs: int = None) -> str:
+        """HTML riport generálása"""
+        basic_stats = self.basic_statistics()
+        version_comparison = self.compare_versions(resamples=resamples, jobs=jobs)
+        bootstrap_ci = version_comparison.get('bootstrap_ci', {})
+        
+        html_content = f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -270,71 +303,83 @@ ONEWAY OverallSatisfaction BY Version_Numeric
        <table>
            <tr><th>Version</th><th>Count</th><th>Percentage</th></tr>
 """
-       
-       total = sum(basic_stats['version_distribution'].values())
-       for version, count in basic_stats['version_distribution'].items():
-           percentage = count / total * 100 if total > 0 else 0
-           html_content += f"<tr><td>{version}</td><td>{count}</td><td>{percentage:.1f}%</td></tr>"
-       
-       html_content += """
+        
+        total = sum(basic_stats['version_distribution'].values())
+        for version, count in basic_stats['version_distribution'].items():
+            percentage = count / total * 100 if total > 0 else 0
+            html_content += f"<tr><td>{version}</td><td>{count}</td><td>{percentage:.1f}%</td></tr>"
+        
+        html_content += """
        </table>
    </div>
    
    <div class="section">
        <h2>🔍 Version Comparison</h2>
 """
-       
-       for metric, data in version_comparison['version_comparison'].items():
-           html_content += f"""
+        
+        for metric, data in version_comparison['version_comparison'].items():
+            html_content += f"""
        <div class="metric">
            <h3>{metric.replace('_', ' ').title()}</h3>
            <table>
-               <tr><th>Version</th><th>Mean</th><th>Std Dev</th><th>Count</th></tr>
+               <tr><th>Version</th><th>Mean</th><th>Std Dev</th><th>Count</th>{'<th>95% Bootstrap CI</th>' if bootstrap_ci else ''}</tr>
 """
-           for version, stats in data.items():
-               html_content += f"""
-               <tr><td>{version}</td><td>{stats['mean']:.2f}</td><td>{stats['std']:.2f}</td><td>{stats['count']}</td></tr>
+            for version, stats in data.items():
+                ci = bootstrap_ci.get(metric, {}).get(version)
+                ci_cell = f"<td>[{ci['ci_low']:.2f}, {ci['ci_high']:.2f}]</td>" if ci else ("<td>-</td>" if bootstrap_ci else "")
+                html_content += f"""
+               <tr><td>{version}</td><td>{stats['mean']:.2f}</td><td>{stats['std']:.2f}</td><td>{stats['count']}</td>{ci_cell}</tr>
 """
-           html_content += "</table>"
-           
-           # Statisztikai teszt eredmény
-           if metric in version_comparison['statistical_tests']:
-               test_result = version_comparison['statistical_tests'][metric]
-               significance = "significant" if test_result['significant'] else ""
-               html_content += f"""
+            html_content += "</table>"
+            
+            # Statisztikai teszt eredmény
+            if metric in version_comparison['statistical_tests']:
+                test_result = version_comparison['statistical_tests'][metric]
+                significance = "significant" if test_result['significant'] else ""
+                html_content += f"""
            <p class="{significance}">
                <strong>Statistical Test:</strong> F = {test_result['f_statistic']}, p = {test_result['p_value']}
                {' (Significant!)' if test_result['significant'] else ' (Not significant)'}
            </p>
 """
-           html_content += "</div>"
-       
-       html_content += """
+            
+            # Permutációs tesztek verzió páronként
+            for pair, test_result in version_comparison.get('permutation_tests', {}).get(metric, {}).items():
+                significance = "significant" if test_result['significant'] else ""
+                html_content += f"""
+           <p class="{significance}">
+               <strong>Permutation Test ({pair.replace('_vs_', ' vs ')}):</strong>
+               Δ mean = {test_result['mean_difference']}, p = {test_result['p_value']}
+           </p>
+"""
+            html_content += "</div>"
+        
+        html_content += """
    </div>
    
    <div class="section">
        <h2>📈 Key Findings</h2>
        <ul>
 """
-       
-       # Automatikus insights generálása
-       if 'trust_level' in version_comparison['version_comparison']:
-           trust_data = version_comparison['version_comparison']['trust_level']
-           best_version = max(trust_data.keys(), key=lambda x: trust_data[x]['mean'])
-           html_content += f"<li>Highest trust level: <strong>{best_version}</strong> (Mean: {trust_data[best_version]['mean']:.2f})</li>"
-       
-       if 'overall_satisfaction' in version_comparison['version_comparison']:
-           satisfaction_data = version_comparison['version_comparison']['overall_satisfaction']
-           best_version = max(satisfaction_data.keys(), key=lambda x: satisfaction_data[x]['mean'])
-           html_content += f"<li>Highest satisfaction: <strong>{best_version}</strong> (Mean: {satisfaction_data[best_version]['mean']:.2f})</li>"
-       
-       # Szignifikáns különbségek
-       significant_metrics = [metric for metric, test in version_comparison['statistical_tests'].items() 
+        
+        # Automatikus insights generálása
+        if 'trust_level' in version_comparison['version_comparison']:
+            trust_data = version_comparison['version_comparison']['trust_level']
+            best_version = max(trust_data.keys(), key=lambda x: trust_data[x]['mean'])
+            html_content += f"<li>Highest trust level: <strong>{best_version}</strong> (Mean: {trust_data[best_version]['mean']:.2f})</li>"
+        
+        if 'overall_satisfaction' in version_comparison['version_comparison']:
+            satisfaction_data = version_comparison['version_comparison']['overall_satisfaction']
+            best_version = max(satisfaction_data.keys(), key=lambda x: satisfaction_data[x]['mean'])
+            html_content += f"<li>Highest satisfaction: <strong>{best_version}</strong> (Mean: {satisfaction_data[best_version]['mean']:.2f})</li>"
+        
+        # Szignifikáns különbségek
+        significant_metrics = [metric for metric, test in version_comparison['statistical_tests'].items() 
                             if test['significant']]
-       if significant_metrics:
-           html_content += f"<li>Statistically significant differences found in: <strong>{', '.join(significant_metrics)}</strong></li>"
-       
-       html_content += """
+        if significant_metrics:
+            html_content += f"<li>Statistically significant differences found in: <strong>{', '.join(significant_metrics)}</strong></li>"
+        
+        html_content += """
        </ul>
    </div>
    
@@ -342,15 +387,15 @@ ONEWAY OverallSatisfaction BY Version_Numeric
        <h2>💡 Recommendations</h2>
        <ul>
 """
-       
-       # Automatikus ajánlások
-       if len(significant_metrics) > 0:
-           html_content += f"<li>Focus on metrics with significant differences: {', '.join(significant_metrics)}</li>"
-       
-       if basic_stats['completion_rate'] < 0.8:
-           html_content += f"<li>Consider improving user experience to increase completion rate (currently {basic_stats['completion_rate']:.1%})</li>"
-       
-       html_content += """
+        
+        # Automatikus ajánlások
+        if len(significant_metrics) > 0:
+            html_content += f"<li>Focus on metrics with significant differences: {', '.join(significant_metrics)}</li>"
+        
+        if basic_stats['completion_rate'] < 0.8:
+            html_content += f"<li>Consider improving user experience to increase completion rate (currently {basic_stats['completion_rate']:.1%})</li>"
+        
+        html_content += """
            <li>Continue data collection for stronger statistical power</li>
            <li>Analyze qualitative feedback from comments</li>
            <li>Consider A/B testing specific features that showed differences</li>
@@ -363,60 +408,79 @@ ONEWAY OverallSatisfaction BY Version_Numeric
 </body>
 </html>
 """
-       
-       # Riport mentése
-       report_path = self.results_dir / "user_study_report.html"
-       with open(report_path, 'w', encoding='utf-8') as f:
-           f.write(html_content)
-       
-       print(f"Report generated: {report_path}")
-       return str(report_path)
+        
+        # Riport mentése
+        report_path = self.results_dir / "user_study_report.html"
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        
+        print(f"Report generated: {report_path}")
+        return str(report_path)
 
 def main():
-   """Fő elemzési script"""
-   analyzer = UserStudyAnalyzer()
-   
-   print("🔍 User Study Analysis Starting...")
-   print("=" * 50)
-   
-   # Alapstatisztikák
-   basic_stats = analyzer.basic_statistics()
-   print(f"📊 Total participants: {basic_stats['total_participants']}")
-   print(f"✅ Completed: {basic_stats['completed_participants']}")
-   print(f"📈 Completion rate: {basic_stats['completion_rate']:.2%}")
-   
-   # Verziók összehasonlítása
-   if basic_stats['completed_participants'] > 0:
-       print("\n🔍 Comparing versions...")
-       version_comparison = analyzer.compare_versions()
-       
-       # Szignifikáns eredmények kiírása
-       significant_metrics = [metric for metric, test in version_comparison['statistical_tests'].items() 
+    """Fő elemzési script"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default="user_study.db", help='Tanulmány adatbázis')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Verzió összehasonlítás csak az előző futás óta érkezett adatokból')
+    parser.add_argument('--preview', action='store_true', help='Alacsony felbontású ábrák (admin felülethez)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Párhuzamos folyamatok száma (ábrák, újramintavételezés)')
+    parser.add_argument('--resamples', type=int, default=0,
+                        help='Bootstrap / permutációs újramintavételezések száma (0: kikapcsolva)')
+    args = parser.parse_args()
+    
+    analyzer = UserStudyAnalyzer(args.db)
+    
+    print("🔍 User Study Analysis Starting...")
+    print("=" * 50)
+    print(f"📸 {analyzer.snapshot}")
+    
+    # Alapstatisztikák
+    basic_stats = analyzer.basic_statistics()
+    print(f"📊 Total participants: {basic_stats['total_participants']}")
+    print(f"✅ Completed: {basic_stats['completed_participants']}")
+    print(f"📈 Completion rate: {basic_stats['completion_rate']:.2%}")
+    
+    # Verziók összehasonlítása
+    if basic_stats['completed_participants'] > 0:
+        print("\n🔍 Comparing versions...")
+        version_comparison = analyzer.compare_versions(incremental=args.incremental,
+                                                       resamples=args.resamples, jobs=args.jobs)
+        
+        # Szignifikáns eredmények kiírása
+        significant_metrics = [metric for metric, test in version_comparison['statistical_tests'].items() 
                             if test['significant']]
-       
-       if significant_metrics:
-           print(f"🎯 Significant differences found: {', '.join(significant_metrics)}")
-       else:
-           print("📊 No statistically significant differences yet")
-       
-       # Vizualizációk
-       print("\n📈 Generating plots...")
-       analyzer.generate_plots()
-       
-       # SPSS export
-       print("\n📋 Exporting SPSS data...")
-       analyzer.export_spss_format()
-       
-       # HTML riport
-       print("\n📄 Generating HTML report...")
-       report_path = analyzer.generate_report()
-       
-       print("=" * 50)
-       print("🎉 Analysis complete!")
-       print(f"📊 View results: {report_path}")
-   
-   else:
-       print("⚠️ No completed participants yet. Continue data collection.")
+        
+        if significant_metrics:
+            print(f"🎯 Significant differences found: {', '.join(significant_metrics)}")
+        else:
+            print("📊 No statistically significant differences yet")
+
+        significant_pairs = [f"{metric} ({pair})"
+                             for metric, pairs in version_comparison.get('permutation_tests', {}).items()
+                             for pair, test in pairs.items() if test['significant']]
+        if significant_pairs:
+            print(f"🎲 Significant permutation tests: {', '.join(significant_pairs)}")
+        
+        # Vizualizációk
+        print("\n📈 Generating plots...")
+        analyzer.generate_plots(preview=args.preview, jobs=args.jobs)
+        
+        # SPSS export
+        print("\n📋 Exporting SPSS data...")
+        analyzer.export_spss_format()
+        
+        # HTML riport
+        print("\n📄 Generating HTML report...")
+        report_path = analyzer.generate_report(resamples=args.resamples, jobs=args.jobs)
+        
+        print("=" * 50)
+        print("🎉 Analysis complete!")
+        print(f"📊 View results: {report_path}")
+    
+    else:
+        print("⚠️ No completed participants yet. Continue data collection.")
 
 if __name__ == "__main__":
-   main()
+    main()
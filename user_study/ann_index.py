@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Közelítő legközelebbi szomszéd (ANN) index recept vektorokhoz - NumPy + SciPy
+IVF durva klaszterezés (gömbi k-means) közvetlenül a ritka TF-IDF vektorokon; a vizsgált
+listák jelöltjei a pontos koszinusszal rangsorolódnak (a CSR sorokon), így a találatok
+pontszáma megegyezik az IngredientSimilarityEngine pontos keresésével.
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from user_study.recipe_retrieval import IngredientSimilarityEngine, top_k_indices
+from user_study.recipe_store import catalogue_fingerprint
+
+DEFAULT_INDEX_PATH = Path(__file__).parent.parent / "data" / "recipe_ann_index.npz"
+# Építéskor a legkisebb n_probe, amellyel a recall@k eléri a célt (a pontos TF-IDF rangsorhoz képest)
+N_PROBE_CANDIDATES = (8, 16, 32, 64, 128)
+DEFAULT_TARGET_RECALL = 0.9
+# Az építéskori mérés mentett mezői (a betöltő ezek alapján dönt az ANN használatáról)
+TUNING_KEYS = ('recall_at_k', 'k', 'avg_query_ms', 'avg_exact_ms')
+
+
+def _normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (vectors / norms).astype(np.float32)
+
+
+def _spherical_kmeans(matrix, n_lists, n_iter, rng):
+    """Gömbi k-means (koszinusz) ritka, L2-normalizált sorokon; a centroidok sűrűek"""
+    n_rows = matrix.shape[0]
+    centroids = _normalize_rows(matrix[rng.choice(n_rows, size=n_lists, replace=False)].toarray())
+    for _ in range(n_iter):
+        assignment = np.asarray((matrix @ centroids.T).argmax(axis=1)).ravel()
+        # Klaszterenkénti összeg egy ritka (lista x sor) indikátor mátrixszal
+        members = sparse.csr_matrix((np.ones(n_rows, dtype=np.float32), (assignment, np.arange(n_rows))),
+                                    shape=(n_lists, n_rows))
+        sums = np.asarray((members @ matrix).todense())
+        empty = ~np.any(sums, axis=1)
+        # Üres klaszter: új véletlen középpont
+        if empty.any():
+            sums[empty] = matrix[rng.choice(n_rows, size=int(empty.sum()))].toarray()
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """IVF index: a TF-IDF sorok klaszterenként folytonosan (CSR), lekérdezéskor n_probe lista vizsgálata"""
+
+    def __init__(self, vocabulary, idf, centroids, list_offsets, matrix, positions, recipe_ids,
+                 n_probe=N_PROBE_CANDIDATES[0], tuning=None, catalogue=None):
+        self.vocabulary = {token: i for i, token in enumerate(vocabulary)}
+        self.idf = idf
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.matrix = matrix              # klaszter szerint rendezett TF-IDF sorok (CSR)
+        self.positions = positions        # rendezett sor -> eredeti sorindex
+        self.recipe_ids = recipe_ids      # eredeti sorindex -> recipeid
+        self.n_probe = int(n_probe)       # alapértelmezett n_probe (építéskor hangolva)
+        self.tuning = tuning              # építéskori mérés ezzel az n_probe-bal (evaluate_recall)
+        # A katalógus, amelyhez az index épült (a recept snapshot manifestjében ugyanez szerepel)
+        self.catalogue = catalogue if catalogue is not None else catalogue_fingerprint(recipe_ids)
+        self._engine = IngredientSimilarityEngine()
+        self._engine.vocabulary, self._engine.idf = self.vocabulary, idf
+        self._slot_of_row = np.empty(len(positions), dtype=np.int64)
+        self._slot_of_row[positions] = np.arange(len(positions))
+
+    @property
+    def n_recipes(self):
+        return len(self.positions)
+
+    @classmethod
+    def build(cls, ingredient_texts, recipe_ids, n_lists=None, n_iter=10, train_size=50000, seed=42,
+              target_recall=DEFAULT_TARGET_RECALL, k=10):
+        """Index építése összetevő szövegekből, n_probe hangolással a pontos kereséshez mérve"""
+        rng = np.random.default_rng(seed)
+        engine = IngredientSimilarityEngine(ingredient_texts)
+        n_recipes = engine.matrix.shape[0]
+
+        if n_lists is None:
+            n_lists = max(1, int(np.sqrt(n_recipes)))
+        n_lists = min(n_lists, n_recipes)
+
+        train = engine.matrix
+        if n_recipes > train_size:
+            train = engine.matrix[rng.choice(n_recipes, size=train_size, replace=False)]
+        centroids = _spherical_kmeans(train, n_lists, n_iter, rng)
+
+        # Hozzárendelés darabokban (memória korlát)
+        assignment = np.empty(n_recipes, dtype=np.int64)
+        for start in range(0, n_recipes, 65536):
+            block = engine.matrix[start:start + 65536]
+            assignment[start:start + 65536] = np.asarray((block @ centroids.T).argmax(axis=1)).ravel()
+
+        positions = np.argsort(assignment, kind='stable')
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        list_offsets[1:] = np.cumsum(np.bincount(assignment, minlength=n_lists))
+
+        vocabulary = np.empty(len(engine.vocabulary), dtype=object)
+        for token, i in engine.vocabulary.items():
+            vocabulary[i] = token
+
+        index = cls(vocabulary.astype(str), engine.idf, centroids, list_offsets, engine.matrix[positions],
+                    positions, np.asarray(recipe_ids, dtype=np.int64))
+        index.tune_n_probe(engine, target_recall, k=min(k, max(1, n_recipes - 1)))
+        return index
+
+    def tune_n_probe(self, engine, target_recall=DEFAULT_TARGET_RECALL, k=10, n_queries=200):
+        """A legkisebb n_probe, amellyel a recall@k eléri a célt; visszatér a jelöltek méréseivel"""
+        reports = []
+        for n_probe in N_PROBE_CANDIDATES:
+            n_probe = min(n_probe, len(self.centroids))
+            reports.append(self.evaluate_recall(engine, n_queries=n_queries, k=k, n_probe=n_probe))
+            if reports[-1]['recall_at_k'] >= target_recall or n_probe == len(self.centroids):
+                break
+        self.n_probe = reports[-1]['n_probe']
+        self.tuning = {key: float(reports[-1][key]) for key in TUNING_KEYS}
+        return reports
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        """Index mentése egyetlen .npz fájlba"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        vocabulary = np.empty(len(self.vocabulary), dtype=object)
+        for token, i in self.vocabulary.items():
+            vocabulary[i] = token
+        np.savez(path, vocabulary=vocabulary.astype(str), idf=self.idf, centroids=self.centroids,
+                 list_offsets=self.list_offsets, shape=np.asarray(self.matrix.shape, dtype=np.int64),
+                 csr_data=self.matrix.data, csr_indices=self.matrix.indices, csr_indptr=self.matrix.indptr,
+                 positions=self.positions, recipe_ids=self.recipe_ids, n_probe=self.n_probe,
+                 catalogue_rows=self.catalogue['rows'], catalogue_hash=self.catalogue['hash'],
+                 **{f'tuning_{key}': (self.tuning or {}).get(key, np.nan) for key in TUNING_KEYS})
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        """Mentett index betöltése"""
+        with np.load(path, allow_pickle=False) as data:
+            matrix = sparse.csr_matrix((data['csr_data'], data['csr_indices'], data['csr_indptr']),
+                                       shape=tuple(int(v) for v in data['shape']))
+            tuning = {key: float(data[f'tuning_{key}']) for key in TUNING_KEYS}
+            catalogue = ({'rows': int(data['catalogue_rows']), 'hash': str(data['catalogue_hash'])}
+                         if 'catalogue_hash' in data.files else None)
+            return cls(data['vocabulary'], data['idf'], data['centroids'], data['list_offsets'], matrix,
+                       data['positions'], data['recipe_ids'], n_probe=int(data['n_probe']),
+                       tuning=None if np.isnan(tuning['recall_at_k']) else tuning, catalogue=catalogue)
+
+    def query_vector(self, ingredients):
+        """Összetevő lekérdezés TF-IDF vektora (term indexek, L2-normalizált súlyok)"""
+        return self._engine.query_vector(ingredients)
+
+    def query_for_row(self, row_index):
+        """Egy recept (eredeti sorindex) saját TF-IDF vektora lekérdezésként"""
+        row = self.matrix.getrow(self._slot_of_row[row_index])
+        return row.indices.astype(np.int64), row.data
+
+    def search(self, term_ids, weights, k=5, n_probe=None, exclude_row=None):
+        """Közelítő top-k pontos koszinusz pontszámmal: (eredeti sorindexek, pontszámok)"""
+        n_probe = min(self.n_probe if n_probe is None else n_probe, len(self.centroids))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # Csak a lekérdezés szavainak oszlopai számítanak a centroid pontszámban
+        probes = top_k_indices(self.centroids[:, term_ids] @ weights, n_probe)
+        query = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        query[term_ids] = weights
+
+        # A listák folytonos CSR sor szeletek: a nem nulla elemeik egy menetben szorzódnak,
+        # soronként bincount összegzi (pontos koszinusz, a sorok másolása nélkül)
+        indptr = self.matrix.indptr
+        slots = np.concatenate([np.arange(self.list_offsets[c], self.list_offsets[c + 1]) for c in probes])
+        nonzeros = np.concatenate([np.arange(indptr[self.list_offsets[c]], indptr[self.list_offsets[c + 1]])
+                                   for c in probes])
+        products = self.matrix.data[nonzeros] * query[self.matrix.indices[nonzeros]]
+        row_of_nonzero = np.repeat(np.arange(len(slots)), indptr[slots + 1] - indptr[slots])
+        scores = np.bincount(row_of_nonzero, weights=products, minlength=len(slots)).astype(np.float32)
+        if exclude_row is not None:
+            scores[slots == self._slot_of_row[exclude_row]] = -np.inf
+
+        top = top_k_indices(scores, k)
+        top = top[np.isfinite(scores[top])]
+        return self.positions[slots[top]], scores[top]
+
+    def search_by_ingredients(self, ingredients, k=5, n_probe=None):
+        return self.search(*self.query_vector(ingredients), k, n_probe)
+
+    def search_by_row(self, row_index, k=5, n_probe=None):
+        return self.search(*self.query_for_row(row_index), k, n_probe, exclude_row=row_index)
+
+    def evaluate_recall(self, engine, n_queries=200, k=10, n_probe=None, seed=0):
+        """Recall@k a pontos TF-IDF kereséshez (engine.top_k_by_recipe) képest és átlagos idő (ms)
+
+        engine ugyanazokra a receptekre épült (eredeti sorrendben). Holtversenynél a pontos
+        top-k határán bármelyik egyenlő pontszámú recept találatnak számít.
+        """
+        n_probe = self.n_probe if n_probe is None else n_probe
+        rng = np.random.default_rng(seed)
+        rows = rng.choice(self.n_recipes, size=min(n_queries, self.n_recipes), replace=False)
+
+        hits = 0
+        total = 0
+        elapsed = 0.0
+        exact_elapsed = 0.0
+        for row in rows:
+            started = time.perf_counter()
+            exact, exact_scores = engine.top_k_by_recipe(int(row), k)
+            exact_elapsed += time.perf_counter() - started
+
+            started = time.perf_counter()
+            _, scores = self.search_by_row(int(row), k, n_probe)
+            elapsed += time.perf_counter() - started
+
+            if len(exact):
+                hits += min(int(np.sum(scores >= exact_scores[-1] - 1e-6)), len(exact))
+            total += len(exact)
+
+        return {
+            'recall_at_k': hits / total if total else 1.0,
+            'k': k,
+            'n_probe': n_probe,
+            'n_queries': len(rows),
+            'avg_query_ms': elapsed / max(len(rows), 1) * 1000,
+            'avg_exact_ms': exact_elapsed / max(len(rows), 1) * 1000,
+        }
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Közös CSV betöltő: encoding felismerés egyszer, bájt mintákból, utána egyetlen pd.read_csv
+BOM ellenőrzés, majd inkrementális dekóderrel a fájl eleje / közepe / vége mintázva.
+Dekódoláskor a forrás CSV ismert mojibake hibái is javulnak (feltételes kötőjel, ő/ű -> '?').
+A mintákon kívüli érvénytelen bájtok cp1250-ként (magyar ő / ű) dekódolódnak, figyelmeztetéssel.
+"""
+
+import codecs
+import functools
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# BOM -> encoding (a hosszabb BOM előbb, az UTF-32 LE az UTF-16 LE előtagja)
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+# BOM nélkül ebben a sorrendben; a latin-1 minden bájtsort elfogad, ezért az utolsó
+FALLBACK_ENCODINGS = ['utf-8', 'cp1252', 'latin-1']
+SAMPLE_SIZE = 64 * 1024
+READ_BLOCK_SIZE = 1024 * 1024
+# A felismert encodinggal nem dekódolható bájtok (pl. UTF-8 fájlba keveredett cp1250 sorok)
+FALLBACK_DECODE_ENCODING = 'cp1250'
+FALLBACK_ERRORS = 'csv_loading.cp1250_fallback'
+
+SOFT_HYPHEN = '\u00ad'
+
+# A forrásban az ő, ű (és néhol az ü) '?'-re cserélődött. Alapból ő (jóval gyakoribb), ezekben a
+# szótövekben más betű - a hosszabb tő előbb, mert pl. 's?r?' (sűrű) a 's?r'-t is tartalmazza.
+# A '?'-re végződő tövek mondat végén is javulnak (pl. 'Egyszer? Mini', 'Melegítsd el?.').
+QUESTION_MARK_STEMS = {
+    's?r?': 'sűrű',
+    'egyszer?': 'egyszerű',
+    'nagyszer?': 'nagyszerű',
+    'gyönyör?': 'gyönyörű',
+    'leny?göz': 'lenyűgöz',
+    'keser?': 'keserű',
+    'könny?': 'könnyű',
+    'méret?': 'méretű',
+    'szín?': 'színű',
+    'szem?': 'szemű',
+    'f?szer': 'fűszer',
+    'f?zér': 'fűzér',
+    'szegf?': 'szegfű',
+    'kakukkf?': 'kakukkfű',
+    'm?anyag': 'műanyag',
+    'm?köd': 'működ',
+    't?nik': 'tűnik',
+    'kih?l': 'kihűl',
+    'h?ln': 'hűln',
+    'h?lt': 'hűlt',
+    'h?t?': 'hűtő',
+    'h?ts': 'hűts',
+    'sz?r': 'szűr',
+    'sz?z': 'szűz',
+    's?r': 'sűr',
+    't?z': 'tűz',
+    'el?': 'elő',
+    # ü
+    'nélk?l': 'nélkül',
+    'f?stöl': 'füstöl',
+    's?lt': 'sült',
+    's?t': 'süt',
+}
+_STEMS_BY_LENGTH = sorted(QUESTION_MARK_STEMS, key=len, reverse=True)
+_STEM_PATTERN = re.compile('|'.join(re.escape(stem) for stem in _STEMS_BY_LENGTH), re.IGNORECASE)
+_TRAILING_STEM = re.compile('(?:' + '|'.join(re.escape(stem) for stem in _STEMS_BY_LENGTH if stem.endswith('?'))
+                            + r')\Z', re.IGNORECASE)
+# Betűkből és betűket érintő '?'-ekből álló szó (a '?' lehet elöl, belül vagy a végén is);
+# URL-ek (pl. '.jpg?w=') és az önálló '?' kimarad
+_LETTER = r'[^\W\d_]'
+_DAMAGED_WORD = re.compile(rf'(?<![\w/.:=&%?])(?=\?{_LETTER}|{_LETTER}+\?)'
+                           rf'\??{_LETTER}+(?:\?{_LETTER}+)*\??(?![\w/=&%?])')
+
+
+def _restore_case(original, replacement):
+    return replacement.upper() if original.isupper() else (
+        replacement[0].upper() + replacement[1:] if original[0].isupper() else replacement)
+
+
+@functools.lru_cache(maxsize=65536)
+def _repair_word(word):
+    # Ugyanaz a néhány ezer szó ismétlődik, ezért gyorsítótárazva
+    word = _STEM_PATTERN.sub(lambda stem: _restore_case(stem.group(0), QUESTION_MARK_STEMS[stem.group(0).lower()]),
+                             word)
+    return word.replace('?', 'ő')
+
+
+def _is_sentence_end(text, position):
+    """A szó utáni rész mondatvéget jelez: sor/szöveg vége, '!', vagy szóköz és nagybetű"""
+    rest = text[position:position + 2]
+    return (not rest or rest[0] in '\r\n!' or
+            (rest[0].isspace() and (len(rest) == 1 or rest[1].isupper() or rest[1] in '\r\n')))
+
+
+def _repair_match(match):
+    word = match.group(0)
+    # Valódi kérdőjel: ép szó a mondat végén ('Szereted a babot? Hagyd ki.') - ha a szóban
+    # máshol nincs '?' és nem ismert, '?'-re végződő tőre végződik, változatlan marad
+    if (word.endswith('?') and '?' not in word[:-1] and not _TRAILING_STEM.search(word)
+            and _is_sentence_end(match.string, match.end())):
+        return word
+    return _repair_word(word)
+
+
+def repair_text(text):
+    """Mojibake javítás: feltételes kötőjel törlése, '?' -> ő / ű / ü (pl. t?zr?l -> tűzről, el? -> elő)"""
+    if SOFT_HYPHEN in text:
+        text = text.replace(SOFT_HYPHEN, '')
+    if '?' in text:
+        text = _DAMAGED_WORD.sub(_repair_match, text)
+    return text
+
+
+def _sample_blocks(path, sample_size):
+    """A fájl eleje, közepe és vége (egy olvasás mindegyikre, a teljes fájl nem kerül memóriába)"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if size <= 3 * sample_size:
+            return f.read(), []
+        head = f.read(sample_size)
+        tails = []
+        for offset in (size // 2, size - sample_size):
+            f.seek(offset)
+            tails.append(f.read(sample_size))
+        return head, tails
+
+
+def _decodes(encoding, head, tails):
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(head, final=not tails)
+        for position, block in enumerate(tails):
+            # Fájl közepéről induló minta: a félbevágott több bájtos karakter folytatása kimarad
+            skip = 0
+            while encoding == 'utf-8' and skip < min(3, len(block)) and 0x80 <= block[skip] < 0xC0:
+                skip += 1
+            codecs.getincrementaldecoder(encoding)().decode(block[skip:], final=position == len(tails) - 1)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def detect_encoding(path, sample_size=SAMPLE_SIZE):
+    """Encoding felismerés: BOM, különben az első encoding, amellyel a minták hibátlanul dekódolhatók"""
+    head, tails = _sample_blocks(path, sample_size)
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    for encoding in FALLBACK_ENCODINGS:
+        if _decodes(encoding, head, tails):
+            return encoding
+    return FALLBACK_ENCODINGS[-1]
+
+
+# Az éppen dekódoló olvasó (szálanként) - a hibakezelő ennél számolja a cp1250-ként dekódolt bájtokat
+_decoding = threading.local()
+
+
+def _cp1250_fallback(error):
+    """codecs hibakezelő: az érvénytelen bájtok cp1250-ként (a cp1250-ben sem létezők U+FFFD-ként)"""
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    invalid = error.object[error.start:error.end]
+    reader = getattr(_decoding, 'reader', None)
+    if reader is not None:
+        reader.fallback_bytes += len(invalid)
+    return bytes(invalid).decode(FALLBACK_DECODE_ENCODING, errors='replace'), error.end
+
+
+codecs.register_error(FALLBACK_ERRORS, _cp1250_fallback)
+
+
+class RepairingTextReader:
+    """Olvasható szöveg folyam (pd.read_csv-nek): inkrementális dekódolás + repair_text blokkonként
+
+    A blokkhatáron félbevágott szó a következő blokkal együtt javul. A mintákon kívüli, a
+    felismert encodinggal érvénytelen bájtok cp1250-ként dekódolódnak (fallback_bytes számolja),
+    a fájl végén figyelmeztetés jelzi - nem szakítják meg a betöltést, és nem vesznek el némán.
+    """
+
+    def __init__(self, path, encoding=None, repair=True, block_size=READ_BLOCK_SIZE):
+        self.encoding = encoding or detect_encoding(path)
+        self.repair = repair
+        self.block_size = block_size
+        self._raw = open(path, 'rb')
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors=FALLBACK_ERRORS)
+        self.fallback_bytes = 0
+        self._pending = ''
+        self._buffer = ''
+        self._eof = False
+
+    def _fill(self, size):
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            block = self._raw.read(self.block_size)
+            self._eof = not block
+            _decoding.reader = self
+            try:
+                text = self._pending + self._decoder.decode(block, final=self._eof)
+            finally:
+                _decoding.reader = None
+            if self._eof and self.fallback_bytes:
+                logger.warning(f"⚠️ {self._raw.name}: {self.fallback_bytes} bájt nem érvényes {self.encoding}, "
+                               f"{FALLBACK_DECODE_ENCODING}-ként dekódolva")
+            cut = len(text) if self._eof else max(text.rfind('\n'), text.rfind(' ')) + 1
+            # A '?'-re végződő szó utáni karakter dönti el, hogy mondatvégi-e: az is a következő blokkal megy
+            while not self._eof and cut > 1 and text[cut - 2] == '?':
+                cut = max(text.rfind('\n', 0, cut - 1), text.rfind(' ', 0, cut - 1)) + 1
+            self._pending = text[cut:]
+            self._buffer += repair_text(text[:cut]) if self.repair else text[:cut]
+
+    def read(self, size=-1):
+        self._fill(size)
+        if size < 0 or size >= len(self._buffer):
+            data, self._buffer = self._buffer, ''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def readline(self):
+        while '\n' not in self._buffer and not self._eof:
+            self._fill(len(self._buffer) + self.block_size)
+        end = self._buffer.find('\n') + 1 or len(self._buffer)
+        line, self._buffer = self._buffer[:end], self._buffer[end:]
+        return line
+
+    def close(self):
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_csv(path, encoding=None, repair=True, **kwargs):
+    """pd.read_csv egyetlen parse-szal; visszatér (DataFrame, encoding) párral"""
+    import pandas as pd
+
+    with RepairingTextReader(path, encoding=encoding, repair=repair) as stream:
+        return pd.read_csv(stream, **kwargs), stream.encoding
+
+
+def iter_csv_chunks(path, chunksize, encoding=None, repair=True, **kwargs):
+    """Darabonkénti olvasás (pd.read_csv chunksize) ugyanazzal a dekódolással; a fájl a végén bezárul"""
+    import pandas as pd
+
+    with RepairingTextReader(path, encoding=encoding, repair=repair) as stream:
+        with pd.read_csv(stream, chunksize=chunksize, **kwargs) as chunks:
+            yield from chunks
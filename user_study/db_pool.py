@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+SQLite kapcsolat pool - szálanként egy tartós kapcsolat
+WAL napló, synchronous=NORMAL, busy timeout és prepared statement cache
+"""
+
+import os
+import sqlite3
+import threading
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',        # olvasók nem blokkolják az írót
+    'synchronous': 'NORMAL',      # WAL mellett biztonságos, commit-onként nincs fsync
+    'busy_timeout': 5000,         # ms - párhuzamos írók várnak, nem "database is locked"
+    'temp_store': 'MEMORY',
+}
+
+
+class ConnectionPool:
+    """Szálanként újrahasznosított sqlite3 kapcsolatok
+
+    Egy kapcsolat csak a létrehozó szálban használható, így zárolás nem kell;
+    a sqlite3 statement cache (cached_statements) kapcsolatonként él, ezért a
+    tartós kapcsolat a prepared statementeket is újrahasznosítja. Fork után
+    (más PID) új kapcsolat nyílik.
+    """
+
+    def __init__(self, db_path, timeout=5.0, cached_statements=256, pragmas=None):
+        self.db_path = str(db_path)
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        self.pragmas.update(pragmas or {})
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # check_same_thread=False csak a close_all miatt; használat szálanként marad
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout,
+                               cached_statements=self.cached_statements, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def connection(self):
+        """A hívó szál kapcsolata (szükség esetén megnyitva) - nem szabad lezárni"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @property
+    def size(self):
+        with self._lock:
+            return len(self._connections)
+
+    def close_all(self):
+        """Minden kapcsolat lezárása (leállításkor)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Előre számított magyarázat tábla (v2/v3)
+Receptenként egy bitkód a küszöbökből, a szövegek kis táblákból kereshetők ki
+"""
+
+import numpy as np
+
+# (oszlop, magyarázat szöveg) - a bit sorrend a lista sorrendje
+EXPLANATION_RULES = [
+    ('HSI', "💚 Magas tápérték és egészséges összetevők"),
+    ('ESI', "🌱 Környezetbarát ingrediensek"),
+    ('PPI', "⭐ Népszerű és kipróbált recept"),
+]
+DEFAULT_EXPLANATION_THRESHOLDS = {'HSI': 70, 'ESI': 70, 'PPI': 80}
+FALLBACK_EXPLANATION = "🍽️ Kiegyensúlyozott összetétel"
+
+
+def explanation_text(code):
+    """v2 magyarázat egy bitkódhoz"""
+    explanations = [text for bit, (_, text) in enumerate(EXPLANATION_RULES) if code & (1 << bit)]
+    if not explanations:
+        explanations.append(FALLBACK_EXPLANATION)
+    return " • ".join(explanations)
+
+
+def detailed_explanation_text(code, score):
+    """v3 magyarázat: pontszám + v2 szöveg"""
+    detailed = f"Ez a recept {score:.0f}/100 pontot ért el összesített értékelésünkben. "
+    return detailed + explanation_text(code)
+
+
+class ExplanationTable:
+    """Magyarázatok a teljes katalógusra, sorindex szerint kikereshetően"""
+
+    def __init__(self, recipes, thresholds=None):
+        self.thresholds = dict(DEFAULT_EXPLANATION_THRESHOLDS)
+        self.thresholds.update(thresholds or {})
+
+        # recipes: DataFrame vagy RecipeStore (oszlop név -> tömb)
+        self._scores = {col: np.asarray(recipes[col], dtype=np.float64) for col, _ in EXPLANATION_RULES}
+        self.codes = np.zeros(len(recipes), dtype=np.uint8)
+        for bit, (col, _) in enumerate(EXPLANATION_RULES):
+            self.codes |= (self._scores[col] > self.thresholds[col]).astype(np.uint8) << bit
+
+        # v3 pontszám a szövegben egészre kerekítve: kompakt int16 oszlop
+        composite = np.asarray(recipes['composite_score'], dtype=np.float64)
+        self.rounded_scores = np.rint(np.nan_to_num(composite)).astype(np.int16)
+
+        # 2^3 lehetséges v2 szöveg, v3-hoz (pontszám, kód) párok
+        self.v2_texts = [explanation_text(code) for code in range(1 << len(EXPLANATION_RULES))]
+        self._v3_texts = {}
+
+    def _v3_text(self, score, code):
+        key = (score, code)
+        text = self._v3_texts.get(key)
+        if text is None:
+            text = detailed_explanation_text(code, score)
+            self._v3_texts[key] = text
+        return text
+
+    def lookup(self, row_index, version, score=None):
+        """Magyarázat egy sorhoz; score: kérésenkénti (pl. egyedi súlyú) pontszám v3-hoz"""
+        code = int(self.codes[row_index])
+        if version == 'v3':
+            if score is None:
+                return self._v3_text(int(self.rounded_scores[row_index]), code)
+            return detailed_explanation_text(code, score)
+        return self.v2_texts[code]
+
+    def set_thresholds(self, **thresholds):
+        """Küszöbök módosítása - csak a változott oszlop bitje és csak az érintett sorok frissülnek"""
+        changed_rows = np.empty(0, dtype=np.int64)
+        for bit, (col, _) in enumerate(EXPLANATION_RULES):
+            if col not in thresholds or thresholds[col] == self.thresholds[col]:
+                continue
+
+            new_mask = self._scores[col] > thresholds[col]
+            old_mask = (self.codes & (1 << bit)).astype(bool)
+            flipped = np.flatnonzero(new_mask != old_mask)
+            self.codes[flipped] ^= np.uint8(1 << bit)
+            self.thresholds[col] = thresholds[col]
+            changed_rows = np.union1d(changed_rows, flipped)
+
+        return len(changed_rows)
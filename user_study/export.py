@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Nyers tanulmány adatok streamelt exportja (CSV / NDJSON)
+fetchmany kötegek generátorból - a memóriahasználat a sorok számától független,
+a folytatás az utolsó látott ID-tól (after_id) lehetséges
+"""
+
+import csv
+import io
+import json
+import sqlite3
+
+# Tábla -> elsődleges kulcs (ez szerint rendezünk és folytatunk)
+EXPORT_TABLES = {
+    'participants': 'user_id',
+    'interactions': 'id',
+    'questionnaire': 'id',
+}
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def open_readonly(db_path):
+    """Külön, csak olvasható kapcsolat az exporthoz (a pool kapcsolatait nem foglalja)"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def iter_batches(conn, table, after_id=None, batch_size=1000):
+    """(oszlopok, sorok) kötegek elsődleges kulcs szerinti sorrendben, after_id utántól"""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Ismeretlen tábla: {table} (lehetséges: {sorted(EXPORT_TABLES)})")
+
+    key = EXPORT_TABLES[table]
+    # A rendezés az INTEGER PRIMARY KEY (rowid) mentén megy, külön rendezés nélkül
+    cursor = conn.execute(f'SELECT * FROM {table} WHERE {key} > ? ORDER BY {key}',
+                          (-1 if after_id is None else int(after_id),))
+    columns = [description[0] for description in cursor.description]
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield columns, rows
+    finally:
+        cursor.close()
+
+
+def stream_export(conn, table, fmt='csv', after_id=None, batch_size=1000, header=None):
+    """Szöveg darabok generátora; CSV fejléc alapból csak az első (nem folytatott) kérésben"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Ismeretlen formátum: {fmt} (lehetséges: {sorted(EXPORT_FORMATS)})")
+    if header is None:
+        header = after_id is None
+
+    batches = iter_batches(conn, table, after_id, batch_size)
+    if fmt == 'ndjson':
+        for columns, rows in batches:
+            yield ''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows)
+        return
+
+    header_written = not header
+    for columns, rows in batches:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+    # Üres eredménynél is legyen fejléc
+    if not header_written:
+        columns = [description[1] for description in conn.execute(f'PRAGMA table_info({table})')]
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerow(columns)
+        yield buffer.getvalue()
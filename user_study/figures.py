@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Elemzési ábrák renderelése
+Mutatónként külön ábra, Agg backenddel, process poolban párhuzamosan.
+Az ábra csak akkor készül újra, ha a bemenő adatainak hash-e (vagy a dpi) megváltozott.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Növelni kell, ha a rajzolás módja változik (így a régi ábrák is újrarenderelődnek)
+FIGURE_STYLE_VERSION = 2
+FIGURE_DPI = {'full': 300, 'preview': 72}
+MANIFEST_NAME = "figures.json"
+
+
+def figure_specs(merged, participants, metrics):
+    """Ábra leírások egyszerű (picklelhető) adatokkal: mutatónként verziónkénti boxplot + verzió eloszlás"""
+    specs = []
+    versions = sorted(merged['version'].dropna().unique())
+    for metric in metrics:
+        specs.append({
+            'name': metric,
+            'kind': 'box',
+            'title': metric.replace("_", " ").title(),
+            'xlabel': 'Version',
+            'ylabel': 'Rating (1-5)',
+            'data': {str(version): merged.loc[merged['version'] == version, metric].dropna().tolist()
+                     for version in versions},
+        })
+    specs.append({
+        'name': 'version_distribution',
+        'kind': 'bar',
+        'title': 'Version Distribution',
+        'xlabel': 'Version',
+        'ylabel': 'Count',
+        'data': {str(version): int(count) for version, count in participants['version'].value_counts().items()},
+    })
+    return specs
+
+
+def spec_hash(spec, dpi):
+    payload = json.dumps({'spec': spec, 'dpi': dpi, 'style': FIGURE_STYLE_VERSION}, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def render_figure(spec, path, dpi):
+    """Egy ábra kirajzolása fájlba (a worker folyamatban fut)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    started = time.perf_counter()
+    plt.style.use('seaborn-v0_8')
+    fig, ax = plt.subplots(figsize=(6, 6))
+    labels = list(spec['data'])
+    # A pandas rajzoló függvényei, mint a korábbi közös ábrán (dobozok/medián színe, oszlopszélesség,
+    # elforgatott feliratok); a verziók sorrendje a spec szerinti
+    if spec['kind'] == 'box':
+        frame = pd.DataFrame({
+            'version': pd.Categorical([label for label in labels for _ in spec['data'][label]], categories=labels),
+            'value': [value for label in labels for value in spec['data'][label]],
+        })
+        frame.boxplot(column='value', by='version', ax=ax)
+        # A pandas által beállított "Boxplot grouped by version" felirat helyett csak a cím marad
+        fig.suptitle('')
+    else:
+        pd.Series([spec['data'][label] for label in labels], index=labels).plot(kind='bar', ax=ax)
+    ax.set_title(spec['title'])
+    ax.set_xlabel(spec['xlabel'])
+    ax.set_ylabel(spec['ylabel'])
+
+    fig.tight_layout()
+    tmp_path = f"{path}.tmp.png"
+    fig.savefig(tmp_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    os.replace(tmp_path, path)
+    return time.perf_counter() - started
+
+
+def _load_manifest(output_dir):
+    manifest_path = output_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(output_dir, manifest):
+    manifest_path = output_dir / MANIFEST_NAME
+    tmp_path = manifest_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def render_figures(specs, output_dir, dpi=FIGURE_DPI['full'], jobs=None, force=False):
+    """Változott ábrák renderelése; visszatér {név: (útvonal, 'rendered' | 'cached')} szótárral
+
+    jobs=None: annyi worker, ahány ábra változott (legfeljebb CPU szám); jobs=1: a hívó folyamatban.
+    A workerek spawn-nal indulnak, így szálakat futtató folyamatból (Flask) is biztonságos.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(output_dir)
+
+    results = {}
+    stale = []
+    for spec in specs:
+        path = output_dir / f"{spec['name']}.png"
+        digest = spec_hash(spec, dpi)
+        if not force and manifest.get(spec['name']) == digest and path.exists():
+            results[spec['name']] = (path, 'cached')
+        else:
+            stale.append((spec, path, digest))
+
+    if not stale:
+        return results
+
+    workers = min(jobs or os.cpu_count() or 1, len(stale))
+    if workers <= 1:
+        for spec, path, _ in stale:
+            render_figure(spec, str(path), dpi)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(render_figure, spec, str(path), dpi) for spec, path, _ in stale]
+            for future in futures:
+                future.result()
+
+    for spec, path, digest in stale:
+        manifest[spec['name']] = digest
+        results[spec['name']] = (path, 'rendered')
+    _save_manifest(output_dir, manifest)
+    return results
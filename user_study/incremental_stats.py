@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Inkrementális verzió összehasonlítás
+Verziónként és mutatónként futó elégséges statisztikák (darab, átlag, M2 - Welford/Chan),
+plusz egy vízállásjel (az utolsó feldolgozott kérdőív ID) JSON-ban perzisztálva.
+Frissítéskor csak az új sorokat kell beolvasni; az ANOVA F az összesítőkből számolható.
+"""
+
+import json
+import math
+import os
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+from scipy import stats
+
+from user_study.migrations import QUESTIONNAIRE_METRICS
+
+STATE_FORMAT_VERSION = 1
+DEFAULT_STATE_PATH = Path("results") / "incremental_state.json"
+
+# Új kérdőív sorok a résztvevő verziójával, ID sorrendben a vízállásjel után
+NEW_ROWS_QUERY = f'''
+    SELECT q.id, p.version, {', '.join(f'q.{metric}' for metric in QUESTIONNAIRE_METRICS)}
+    FROM questionnaire q JOIN participants p ON p.user_id = q.user_id
+    WHERE q.id > ?
+    ORDER BY q.id
+'''
+
+
+class RunningStats:
+    """Darab, átlag és négyzetes eltérés összeg (M2) - numerikusan stabil, kötegenként is bővíthető"""
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = int(count)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+
+    def update(self, values):
+        """Köteg hozzáadása (Chan-féle párhuzamos összevonás; egy elemre a Welford lépés)"""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        batch = RunningStats(len(values), values.mean(), ((values - values.mean()) ** 2).sum())
+        return self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        return self
+
+    @property
+    def variance(self):
+        """Mintavariancia (ddof=1, mint a pandas std); egy elemnél NaN"""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['count'], data['mean'], data['m2'])
+
+
+def anova_from_stats(groups):
+    """Egyutas ANOVA (stats.f_oneway-jel egyező F és p) csoport összesítőkből"""
+    groups = [group for group in groups if group.count > 0]
+    total = sum(group.count for group in groups)
+    df_between = len(groups) - 1
+    df_within = total - len(groups)
+    if df_between < 1 or df_within < 1:
+        return math.nan, math.nan
+
+    grand_mean = sum(group.count * group.mean for group in groups) / total
+    ss_between = sum(group.count * (group.mean - grand_mean) ** 2 for group in groups)
+    ss_within = sum(group.m2 for group in groups)
+    if ss_within == 0:
+        return (math.inf, 0.0) if ss_between > 0 else (math.nan, math.nan)
+
+    f_stat = (ss_between / df_between) / (ss_within / df_within)
+    return f_stat, float(stats.f.sf(f_stat, df_between, df_within))
+
+
+class IncrementalVersionStats:
+    """Verziónkénti futó statisztikák + vízállásjel, JSON állapotfájllal"""
+
+    def __init__(self, state_path=DEFAULT_STATE_PATH, metrics=QUESTIONNAIRE_METRICS):
+        self.state_path = Path(state_path)
+        self.metrics = tuple(metrics)
+        self.reset()
+
+    def reset(self):
+        self.watermark = 0
+        self.db_path = None
+        self.groups = {metric: {} for metric in self.metrics}
+
+    def load(self):
+        """Korábbi állapot betöltése; hiányzó vagy eltérő formátumú fájlnál üres állapot"""
+        self.reset()
+        if not self.state_path.exists():
+            return False
+        with open(self.state_path, encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('format_version') != STATE_FORMAT_VERSION or tuple(state['metrics']) != self.metrics:
+            return False
+        self.watermark = state['watermark']
+        self.db_path = state['db_path']
+        self.groups = {metric: {version: RunningStats.from_dict(data) for version, data in versions.items()}
+                       for metric, versions in state['groups'].items()}
+        return True
+
+    def save(self):
+        """Atomikus mentés (ideiglenes fájl + átnevezés)"""
+        state = {
+            'format_version': STATE_FORMAT_VERSION,
+            'db_path': self.db_path,
+            'watermark': self.watermark,
+            'metrics': list(self.metrics),
+            'groups': {metric: {version: running.to_dict() for version, running in versions.items()}
+                       for metric, versions in self.groups.items()},
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def update(self, conn, db_path=None):
+        """Új kérdőív sorok beolvasása a vízállásjel után; visszatér a feldolgozott sorok számával
+
+        Ha a vízállásjel nagyobb, mint az adatbázis legnagyobb ID-ja (új / visszaállított
+        adatbázis), vagy másik adatbázisról van szó, az állapot elölről épül.
+        """
+        conn.execute('BEGIN')
+        try:
+            max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM questionnaire').fetchone()[0]
+            if max_id < self.watermark or (db_path is not None and self.db_path not in (None, db_path)):
+                print("⚠️ Az inkrementális állapot nem illik az adatbázishoz - újraépítés")
+                self.reset()
+            rows = conn.execute(NEW_ROWS_QUERY, (self.watermark,)).fetchall()
+        finally:
+            conn.execute('COMMIT')
+
+        if db_path is not None:
+            self.db_path = db_path
+        if not rows:
+            return 0
+
+        ids = np.array([row[0] for row in rows])
+        versions = np.array([row[1] for row in rows])
+        values = np.array([row[2:] for row in rows], dtype=float)
+        for version in np.unique(versions):
+            version_values = values[versions == version]
+            for column, metric in enumerate(self.metrics):
+                self.groups[metric].setdefault(str(version), RunningStats()).update(version_values[:, column])
+
+        self.watermark = int(ids.max())
+        return len(rows)
+
+    def update_from_db(self, db_path):
+        """update() egy saját, csak olvasható kapcsolattal"""
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return self.update(conn, db_path=str(db_path))
+        finally:
+            conn.close()
+
+    def comparison(self):
+        """Ugyanaz a szerkezet, mint UserStudyAnalyzer.compare_versions eredménye"""
+        version_comparison = {}
+        statistical_tests = {}
+        for metric in self.metrics:
+            groups = self.groups[metric]
+            version_comparison[metric] = {
+                version: {'mean': round(running.mean, 3), 'std': round(running.std, 3), 'count': running.count}
+                for version, running in sorted(groups.items()) if running.count > 0
+            }
+
+            compared = [groups.get(version, RunningStats()) for version in ('v1', 'v2', 'v3')]
+            if all(running.count > 1 for running in compared):
+                f_stat, p_value = anova_from_stats(compared)
+                statistical_tests[metric] = {
+                    'f_statistic': round(f_stat, 4),
+                    'p_value': round(p_value, 4),
+                    'significant': p_value < 0.05
+                }
+
+        return {
+            'version_comparison': version_comparison,
+            'statistical_tests': statistical_tests
+        }
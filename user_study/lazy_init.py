@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Késleltetett inicializálás a modul szintű globális objektumokhoz
+Az import gyors marad (a port azonnal megnyílik), a betöltés első használatkor
+vagy egy háttér bemelegítő szálban történik
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LazyResource:
+    """Proxy, amely első hozzáféréskor hozza létre a mögöttes objektumot
+
+    Az attribútum hozzáférések a létrehozott példányra delegálódnak, így a
+    hívási helyeken (pl. db.create_user(...)) nem kell változtatni. Egyidejű
+    kérések a létrehozásig várnak, a factory legfeljebb egyszer fut sikeresen.
+    """
+
+    def __init__(self, name, factory):
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+        self._error = None
+        self._init_seconds = None
+
+    @property
+    def is_ready(self):
+        return self._instance is not None
+
+    def get(self):
+        """A példány (szükség esetén létrehozva); hiba esetén a következő hívás újrapróbálja"""
+        instance = self._instance
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if self._instance is None:
+                started = time.perf_counter()
+                try:
+                    self._instance = self._factory()
+                except Exception as e:
+                    self._error = e
+                    raise
+                self._error = None
+                self._init_seconds = time.perf_counter() - started
+                logger.info(f"⏱️ {self._name} inicializálva: {self._init_seconds * 1000:.0f} ms")
+        return self._instance
+
+    def status(self):
+        return {
+            'ready': self.is_ready,
+            'init_ms': round(self._init_seconds * 1000, 1) if self._init_seconds is not None else None,
+            'error': str(self._error) if self._error is not None else None,
+        }
+
+    def __getattr__(self, name):
+        # Csak a proxy saját (aláhúzásos) attribútumai nem delegálódnak
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __repr__(self):
+        state = 'ready' if self.is_ready else 'pending'
+        return f"LazyResource({self._name!r}, {state})"
+
+
+def warm_up(resources, background=True):
+    """Erőforrások előzetes létrehozása (alapból daemon szálban)
+
+    Megjegyzés: gunicorn --preload esetén a szálat a worker folyamatban kell
+    indítani (fork után), különben a zár a master folyamatban ragadhat.
+    """
+    def run():
+        started = time.perf_counter()
+        for resource in resources:
+            try:
+                resource.get()
+            except Exception as e:
+                logger.warning(f"⚠️ Bemelegítési hiba ({resource._name}): {e}")
+        logger.info(f"🔥 Bemelegítés kész: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    if not background:
+        run()
+        return None
+
+    thread = threading.Thread(target=run, name='user-study-warmup', daemon=True)
+    thread.start()
+    return thread
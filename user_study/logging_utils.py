@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Naplózás a user study alkalmazáshoz
+A 'user_study' logger rekordjai egy QueueHandler-rel sorba kerülnek, a kiírást egy háttérszálon
+futó QueueListener végzi - a kérés szál nem vár a stdout/stderr I/O-ra.
+A kérésenkénti DEBUG sorok mintavételezettek: a kérés elején egyszer dől el, hogy az adott
+kérés debug kimenete megjelenik-e. A szint és a mintavételi arány futás közben állítható.
+"""
+
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import random
+import sys
+import threading
+
+LOGGER_NAME = 'user_study'
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+# Kezdeti beállítások környezeti változóból (futás közben: set_log_level / set_debug_sample_rate)
+DEFAULT_LEVEL = os.environ.get('USER_STUDY_LOG_LEVEL', 'INFO')
+DEFAULT_DEBUG_SAMPLE_RATE = float(os.environ.get('USER_STUDY_DEBUG_SAMPLE_RATE', '0.05'))
+# Futás közben (admin felületről) legfeljebb ekkora mintavételi arány állítható be
+MAX_DEBUG_SAMPLE_RATE = float(os.environ.get('USER_STUDY_MAX_DEBUG_SAMPLE_RATE', '0.25'))
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+# Az aktuális kérés debug sorai megjelennek-e (kérésen kívül, pl. CLI-ből: mindig)
+_request_sampled = contextvars.ContextVar('user_study_request_sampled', default=True)
+
+_lock = threading.Lock()
+_state = {'listener': None, 'pid': None, 'queue': None, 'debug_sample_rate': DEFAULT_DEBUG_SAMPLE_RATE}
+
+
+class RequestSampleFilter(logging.Filter):
+    """DEBUG rekordok csak a mintába került kérésekből (a magasabb szintek mindig átmennek)"""
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or _request_sampled.get()
+
+
+def setup_logging(level=None, stream=None):
+    """QueueHandler a 'user_study' loggerre + háttér QueueListener; többször hívható
+
+    Forkolt folyamatban (pl. gunicorn --preload) a listener szál nem öröklődik, ezért
+    folyamatonként újraindul ugyanarra a sorra.
+    """
+    with _lock:
+        logger = logging.getLogger(LOGGER_NAME)
+        if level is not None or _state['queue'] is None:
+            logger.setLevel(level or DEFAULT_LEVEL)
+
+        if _state['queue'] is None:
+            _state['queue'] = queue.SimpleQueue()
+            handler = logging.handlers.QueueHandler(_state['queue'])
+            handler.addFilter(RequestSampleFilter())
+            logger.addHandler(handler)
+            logger.propagate = False
+
+        if _state['listener'] is None or _state['pid'] != os.getpid():
+            if _state['listener'] is not None:
+                # A szülő folyamat listenere: a szála itt nem fut, kilépéskor sem kell leállítani
+                atexit.unregister(_state['listener'].stop)
+            output = logging.StreamHandler(stream or sys.stderr)
+            output.setFormatter(logging.Formatter(LOG_FORMAT))
+            listener = logging.handlers.QueueListener(_state['queue'], output, respect_handler_level=True)
+            listener.start()
+            _state['listener'], _state['pid'] = listener, os.getpid()
+            atexit.register(listener.stop)
+    return logger
+
+
+def shutdown_logging():
+    """A sorban maradt rekordok kiírása és a listener leállítása"""
+    with _lock:
+        listener = _state['listener']
+        if listener is not None and _state['pid'] == os.getpid():
+            listener.stop()
+            atexit.unregister(listener.stop)
+        _state['listener'] = None
+
+
+def set_log_level(level):
+    """A 'user_study' logger szintje futás közben (pl. 'DEBUG' vagy logging.DEBUG)"""
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    return logging.getLevelName(logger.level)
+
+
+def set_debug_sample_rate(rate):
+    """A kérések ekkora hányada (0..1) kap debug kimenetet"""
+    rate = float(rate)
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"A mintavételi arány 0 és 1 közötti: {rate}")
+    _state['debug_sample_rate'] = rate
+    return rate
+
+
+def parse_log_level(level):
+    """Naplózási szint név ellenőrzése (kis-nagybetű független); ismeretlen névre ValueError"""
+    name = str(level).strip().upper()
+    if name not in LOG_LEVELS:
+        raise ValueError(f"Ismeretlen naplózási szint: {level!r} (lehetséges: {', '.join(LOG_LEVELS)})")
+    return name
+
+
+def parse_debug_sample_rate(rate, maximum=None):
+    """Mintavételi arány ellenőrzése: véges, nem negatív szám, a maximumra (MAX_DEBUG_SAMPLE_RATE) vágva"""
+    try:
+        value = float(rate)
+    except (TypeError, ValueError):
+        raise ValueError(f"A mintavételi arány szám: {rate!r}")
+    if not math.isfinite(value) or value < 0.0:
+        raise ValueError(f"A mintavételi arány nem negatív, véges szám: {rate!r}")
+    return min(value, MAX_DEBUG_SAMPLE_RATE if maximum is None else maximum, 1.0)
+
+
+def logging_config():
+    return {
+        'level': logging.getLevelName(logging.getLogger(LOGGER_NAME).level),
+        'debug_sample_rate': _state['debug_sample_rate'],
+        'max_debug_sample_rate': MAX_DEBUG_SAMPLE_RATE,
+    }
+
+
+def begin_request():
+    """Kérés eleji mintavétel: eldől, hogy a kérés DEBUG sorai megjelennek-e"""
+    rate = _state['debug_sample_rate']
+    sampled = rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+    _request_sampled.set(sampled)
+    return sampled
+
+
+def debug_sampled(logger):
+    """Igaz, ha a logger DEBUG szinten ír és az aktuális kérés a mintában van
+
+    Drága debug kimenet (pl. soronkénti lista) előtt érdemes ellenőrizni, hogy a formázás
+    se fusson feleslegesen.
+    """
+    return logger.isEnabledFor(logging.DEBUG) and _request_sampled.get()
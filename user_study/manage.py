@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+User study adatbázis karbantartó parancsok
+Használat: python -m user_study.manage <parancs> [--db user_study.db]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from user_study.user_study import UserStudyDatabase
+from user_study.export import EXPORT_TABLES, EXPORT_FORMATS, open_readonly, stream_export
+
+
+def rebuild_stats(args):
+    """Összesítő táblák újraszámítása a nyers táblákból, majd konzisztencia ellenőrzés"""
+    database = UserStudyDatabase(args.db, write_behind=False)
+
+    if not args.verify_only:
+        database.rebuild_summary_tables()
+        print(f"🔄 Összesítő táblák újraszámítva: {args.db}")
+
+    differences = database.verify_summary_tables()
+    database.close()
+
+    if differences:
+        print(f"❌ Eltérés az összesítők és a nyers táblák között ({len(differences)}):")
+        for difference in differences:
+            print(f"   {difference}")
+        return 1
+
+    print("✅ Az összesítő táblák konzisztensek a nyers táblákkal")
+    return 0
+
+
+def export(args):
+    """Tábla streamelt exportja fájlba vagy stdout-ra (after_id-vel folytatható)"""
+    conn = open_readonly(args.db)
+    # Folytatásnál (--after-id, a 0 is) hozzáfűzés fejléc nélkül - mint a stream_export fejléc döntése
+    resuming = args.after_id is not None
+    output = sys.stdout if args.output == '-' else open(args.output, 'a' if resuming else 'w',
+                                                       encoding='utf-8', newline='')
+    try:
+        for chunk in stream_export(conn, args.table, args.format, args.after_id, args.batch_size):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        conn.close()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='user_study.db', help='SQLite adatbázis fájl')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = subparsers.add_parser('rebuild-stats', help='Összesítő táblák újraszámítása és ellenőrzése')
+    rebuild.add_argument('--verify-only', action='store_true', help='Csak ellenőrzés, újraszámítás nélkül')
+    rebuild.set_defaults(func=rebuild_stats)
+
+    exporter = subparsers.add_parser('export', help='Nyers tábla streamelt exportja (CSV / NDJSON)')
+    exporter.add_argument('table', choices=sorted(EXPORT_TABLES))
+    exporter.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+    exporter.add_argument('--after-id', type=int, default=None,
+                          help='Folytatás az utolsó látott ID után (a kimeneti fájlhoz hozzáfűz)')
+    exporter.add_argument('--batch-size', type=int, default=1000)
+    exporter.add_argument('--output', '-o', default='-', help='Kimeneti fájl (alapértelmezés: stdout)')
+    exporter.set_defaults(func=export)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
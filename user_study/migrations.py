@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Verziózott séma migrációk a user study adatbázishoz
+Az aktuális verzió a PRAGMA user_version-ben; minden migráció egyszer, tranzakcióban fut
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Kérdőív mutatók, amelyekhez verziónként összeg és darabszám készül (AVG = összeg / darab)
+QUESTIONNAIRE_METRICS = ('system_usability', 'recommendation_quality', 'trust_level',
+                         'explanation_clarity', 'overall_satisfaction')
+
+_METRIC_COLUMNS = ',\n'.join(f'        {metric}_sum REAL NOT NULL DEFAULT 0,\n'
+                             f'        {metric}_count INTEGER NOT NULL DEFAULT 0'
+                             for metric in QUESTIONNAIRE_METRICS)
+
+
+def _metric_delta(row, sign):
+    return ', '.join(f'{metric}_sum = {metric}_sum {sign} COALESCE({row}.{metric}, 0), '
+                     f'{metric}_count = {metric}_count {sign} ({row}.{metric} IS NOT NULL)'
+                     for metric in QUESTIONNAIRE_METRICS)
+
+
+# Összesítő táblák: verziónként egy sor + egy globális sor; a triggerek az író tranzakción belül frissítik
+SUMMARY_TABLES = [
+    f'''
+    CREATE TABLE IF NOT EXISTS version_stats (
+        version TEXT PRIMARY KEY,
+        participants INTEGER NOT NULL DEFAULT 0,
+        completed INTEGER NOT NULL DEFAULT 0,
+        rating_sum REAL NOT NULL DEFAULT 0,
+        rating_count INTEGER NOT NULL DEFAULT 0,
+        questionnaires INTEGER NOT NULL DEFAULT 0,
+{_METRIC_COLUMNS}
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS study_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        interactions INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+]
+
+SUMMARY_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_participants_insert AFTER INSERT ON participants BEGIN
+        INSERT OR IGNORE INTO version_stats (version) VALUES (NEW.version);
+        UPDATE version_stats SET participants = participants + 1, completed = completed + (NEW.is_completed = 1)
+        WHERE version = NEW.version;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_participants_completed AFTER UPDATE OF is_completed ON participants BEGIN
+        UPDATE version_stats SET completed = completed - (OLD.is_completed = 1) + (NEW.is_completed = 1)
+        WHERE version = NEW.version;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_participants_delete AFTER DELETE ON participants BEGIN
+        UPDATE version_stats SET participants = participants - 1, completed = completed - (OLD.is_completed = 1)
+        WHERE version = OLD.version;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_interactions_insert AFTER INSERT ON interactions BEGIN
+        UPDATE study_totals SET interactions = interactions + 1 WHERE id = 1;
+        UPDATE version_stats SET rating_sum = rating_sum + COALESCE(NEW.rating, 0),
+                                 rating_count = rating_count + (NEW.rating IS NOT NULL)
+        WHERE version = (SELECT version FROM participants WHERE user_id = NEW.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_interactions_delete AFTER DELETE ON interactions BEGIN
+        UPDATE study_totals SET interactions = interactions - 1 WHERE id = 1;
+        UPDATE version_stats SET rating_sum = rating_sum - COALESCE(OLD.rating, 0),
+                                 rating_count = rating_count - (OLD.rating IS NOT NULL)
+        WHERE version = (SELECT version FROM participants WHERE user_id = OLD.user_id);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_questionnaire_insert AFTER INSERT ON questionnaire BEGIN
+        UPDATE version_stats SET questionnaires = questionnaires + 1, {_metric_delta('NEW', '+')}
+        WHERE version = (SELECT version FROM participants WHERE user_id = NEW.user_id);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_questionnaire_delete AFTER DELETE ON questionnaire BEGIN
+        UPDATE version_stats SET questionnaires = questionnaires - 1, {_metric_delta('OLD', '-')}
+        WHERE version = (SELECT version FROM participants WHERE user_id = OLD.user_id);
+    END
+    ''',
+]
+
+# Összesítők újraszámítása a nyers táblákból (migrációkor és a rebuild parancsnál)
+SUMMARY_REBUILD = [
+    'DELETE FROM version_stats',
+    'DELETE FROM study_totals',
+    'INSERT INTO study_totals (id, interactions) SELECT 1, COUNT(*) FROM interactions',
+    '''
+    INSERT INTO version_stats (version, participants, completed)
+    SELECT version, COUNT(*), SUM(is_completed = 1) FROM participants GROUP BY version
+    ''',
+    '''
+    UPDATE version_stats SET (rating_sum, rating_count) = (
+        SELECT COALESCE(SUM(i.rating), 0), COUNT(i.rating)
+        FROM participants p JOIN interactions i ON p.user_id = i.user_id
+        WHERE p.version = version_stats.version
+    )
+    ''',
+    f'''
+    UPDATE version_stats SET (questionnaires, {', '.join(f'{m}_sum, {m}_count' for m in QUESTIONNAIRE_METRICS)}) = (
+        SELECT COUNT(*), {', '.join(f'COALESCE(SUM(q.{m}), 0), COUNT(q.{m})' for m in QUESTIONNAIRE_METRICS)}
+        FROM participants p JOIN questionnaire q ON p.user_id = q.user_id
+        WHERE p.version = version_stats.version
+    )
+    ''',
+]
+
+# (verzió, leírás, SQL utasítások) - csak a lista végére szabad újat felvenni
+MIGRATIONS = [
+    (1, 'Alap táblák', [
+        '''
+        CREATE TABLE IF NOT EXISTS participants (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            age_group TEXT NOT NULL,
+            education TEXT NOT NULL,
+            cooking_frequency TEXT NOT NULL,
+            sustainability_awareness INTEGER NOT NULL,
+            version TEXT NOT NULL,
+            is_completed BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            recipe_id INTEGER,
+            rating INTEGER,
+            explanation_helpful INTEGER,
+            view_time_seconds REAL,
+            interaction_order INTEGER,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES participants (user_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS questionnaire (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            system_usability INTEGER,
+            recommendation_quality INTEGER,
+            trust_level INTEGER,
+            explanation_clarity INTEGER,
+            sustainability_importance INTEGER,
+            overall_satisfaction INTEGER,
+            additional_comments TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES participants (user_id)
+        )
+        ''',
+    ]),
+    (2, 'Másodlagos indexek (join user_id-n, csoportosítás verzió/befejezés szerint)', [
+        'CREATE INDEX IF NOT EXISTS idx_interactions_user_id ON interactions (user_id)',
+        'CREATE INDEX IF NOT EXISTS idx_interactions_recipe_id ON interactions (recipe_id)',
+        'CREATE INDEX IF NOT EXISTS idx_questionnaire_user_id ON questionnaire (user_id)',
+        'CREATE INDEX IF NOT EXISTS idx_participants_version_completed ON participants (version, is_completed)',
+    ]),
+    (3, 'Trigger által karbantartott összesítő táblák (/admin/stats)',
+     SUMMARY_TABLES + SUMMARY_TRIGGERS + SUMMARY_REBUILD),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    """Függő migrációk futtatása; visszatér az alkalmazott verziók listájával
+
+    BEGIN IMMEDIATE: párhuzamosan induló workerek közül egyszerre csak egy
+    migrál, a többi a zár után már a friss user_version-t látja.
+    """
+    if schema_version(conn) >= migrations[-1][0]:
+        return []
+
+    applied = []
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        current = schema_version(conn)
+        for version, description, statements in migrations:
+            if version <= current:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            applied.append(version)
+            logger.info(f"🗃️ Migráció {version}: {description}")
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return applied
+
+
+def full_table_scans(conn, sql, params=(), allowed_scans=()):
+    """EXPLAIN QUERY PLAN tábla hozzáférési sorai, amelyek nem index kereséssel (SEARCH) olvasnak
+
+    A 'SCAN <tábla> USING COVERING INDEX ...' is a teljes indexet bejárja (O(N)), ezért az is
+    találat; szándékos bejárás csak az allowed_scans táblákon megengedett. A nem tábla
+    hozzáférési sorok (pl. USE TEMP B-TREE FOR ORDER BY) nem számítanak.
+    """
+    offenders = []
+    for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params):
+        detail = row[3]
+        if not detail.startswith('SCAN ') or detail == 'SCAN CONSTANT ROW':
+            continue
+        if detail.split()[1] not in allowed_scans:
+            offenders.append(detail)
+    return offenders
+
+
+def rebuild_summary_tables(conn):
+    """Összesítő táblák újraszámítása egy tranzakcióban (író zárral)"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for statement in SUMMARY_REBUILD:
+            conn.execute(statement)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
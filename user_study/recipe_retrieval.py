@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Recept visszakeresés - összetevő hasonlóság (v1) és hibrid pontozás (v2/v3)
+Ritka TF-IDF koszinusz top-k, illetve súlyozott ESI/HSI/PPI top-k argpartition-nel
+"""
+
+import re
+
+import numpy as np
+from scipy import sparse
+
+# Összetevő tokenek: betűkből álló szavak (ékezetes karakterekkel együtt)
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]{2,}")
+
+
+def tokenize_ingredients(text):
+    """Összetevő szöveg tokenizálása kisbetűs szavakra"""
+    if not isinstance(text, str):
+        return []
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def top_k_indices(scores, k):
+    """A k legnagyobb érték indexei csökkenő sorrendben (argpartition, nem teljes rendezés)"""
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+
+    # Stabil sorrend: pontszám szerint csökkenő, egyezésnél kisebb index előre
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def top_k_rows(score_matrix, k):
+    """Soronkénti top-k egy (m, N) pontszám mátrixon, soronként csökkenő sorrendben"""
+    n_rows, n = score_matrix.shape
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((n_rows, 0), dtype=np.int64)
+
+    if k < n:
+        candidates = np.argpartition(-score_matrix, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(n), (n_rows, 1))
+
+    candidate_scores = np.take_along_axis(score_matrix, candidates, axis=1)
+    order = np.lexsort((candidates, -candidate_scores), axis=-1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class IngredientSimilarityEngine:
+    """Összetevő alapú hasonlósági kereső ritka TF-IDF mátrixszal"""
+
+    def __init__(self, ingredient_texts=None):
+        self.vocabulary = {}
+        self.idf = None
+        self.matrix = None
+        self._postings = None
+        if ingredient_texts is not None:
+            self._build(ingredient_texts)
+
+    def to_arrays(self):
+        """Az index tömbjei (bináris snapshot mentéshez)"""
+        tokens = sorted(self.vocabulary, key=self.vocabulary.get)
+        encoded = [token.encode('utf-8') for token in tokens]
+        vocab_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        vocab_offsets[1:] = np.cumsum([len(token) for token in encoded])
+
+        return {
+            'vocab_blob': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            'vocab_offsets': vocab_offsets,
+            'idf': self.idf,
+            'shape': np.asarray(self.matrix.shape, dtype=np.int64),
+            'csr_data': self.matrix.data,
+            'csr_indices': self.matrix.indices,
+            'csr_indptr': self.matrix.indptr,
+            'csc_data': self._postings.data,
+            'csc_indices': self._postings.indices,
+            'csc_indptr': self._postings.indptr,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Index visszaállítása tömbökből másolás nélkül (memmap-elt tömbökkel is)"""
+        engine = cls()
+        blob = bytes(arrays['vocab_blob'])
+        offsets = arrays['vocab_offsets'].tolist()
+        engine.vocabulary = {blob[start:end].decode('utf-8'): i
+                             for i, (start, end) in enumerate(zip(offsets[:-1], offsets[1:]))}
+        engine.idf = arrays['idf']
+
+        shape = tuple(int(v) for v in arrays['shape'])
+        engine.matrix = sparse.csr_matrix(
+            (arrays['csr_data'], arrays['csr_indices'], arrays['csr_indptr']), shape=shape, copy=False)
+        engine._postings = sparse.csc_matrix(
+            (arrays['csc_data'], arrays['csc_indices'], arrays['csc_indptr']), shape=shape, copy=False)
+        return engine
+
+    def _build(self, ingredient_texts):
+        """TF-IDF mátrix felépítése (sorok L2-normalizálva)"""
+        indptr = [0]
+        indices = []
+        vocabulary = self.vocabulary
+
+        for text in ingredient_texts:
+            # Bináris TF: egy összetevő szó receptenként egyszer számít
+            term_ids = {vocabulary.setdefault(token, len(vocabulary))
+                        for token in tokenize_ingredients(text)}
+            indices.extend(sorted(term_ids))
+            indptr.append(len(indices))
+
+        n_docs = len(indptr) - 1
+        indices = np.asarray(indices, dtype=np.int32)
+        indptr = np.asarray(indptr, dtype=np.int64)
+
+        # Simított IDF (sklearn TfidfVectorizer kompatibilis képlet)
+        doc_freq = np.bincount(indices, minlength=len(vocabulary))
+        self.idf = (np.log((1 + n_docs) / (1 + doc_freq)) + 1).astype(np.float32)
+
+        data = self.idf[indices]
+        row_ids = np.repeat(np.arange(n_docs), np.diff(indptr))
+        row_norms = np.sqrt(np.bincount(row_ids, weights=data ** 2, minlength=n_docs))
+        row_norms[row_norms == 0] = 1
+        data = (data / row_norms[row_ids]).astype(np.float32)
+
+        self.matrix = sparse.csr_matrix((data, indices, indptr),
+                                        shape=(n_docs, len(vocabulary)), dtype=np.float32)
+        # Invertált index (CSC): a lekérdezés csak az érintett oszlopokat olvassa
+        self._postings = self.matrix.tocsc()
+
+    @property
+    def n_recipes(self):
+        return self.matrix.shape[0]
+
+    def query_vector(self, ingredients):
+        """Lekérdezés TF-IDF vektora (term indexek és L2-normalizált súlyok)"""
+        if isinstance(ingredients, (list, tuple)):
+            ingredients = ', '.join(str(item) for item in ingredients)
+
+        term_ids = sorted({self.vocabulary[token] for token in tokenize_ingredients(ingredients)
+                           if token in self.vocabulary})
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        weights = self.idf[term_ids]
+        norm = np.sqrt(np.dot(weights, weights))
+        if norm > 0:
+            weights = weights / norm
+        return term_ids, weights
+
+    def scores_for_terms(self, term_ids, weights):
+        """Koszinusz hasonlóság az összes recepthez (ritka mátrix-vektor szorzás)"""
+        if len(term_ids) == 0:
+            return np.zeros(self.n_recipes, dtype=np.float32)
+        return self._postings[:, term_ids] @ weights
+
+    def top_k_by_ingredients(self, ingredients, k=5, exclude=None):
+        """Top-k recept egy összetevő listához: (sorindexek, pontszámok)"""
+        term_ids, weights = self.query_vector(ingredients)
+        scores = self.scores_for_terms(term_ids, weights)
+        return self._top_k(scores, k, exclude)
+
+    def top_k_by_recipe(self, row_index, k=5):
+        """Top-k hasonló recept egy adott recepthez (önmagát kihagyva)"""
+        row = self.matrix.getrow(row_index)
+        scores = self.scores_for_terms(row.indices, row.data)
+        return self._top_k(scores, k, exclude=[row_index])
+
+    def query_for_row(self, row_index):
+        """Egy recept saját TF-IDF vektora lekérdezésként"""
+        row = self.matrix.getrow(row_index)
+        return row.indices.astype(np.int64), row.data
+
+    def top_k_batch(self, queries, k=5, exclude_rows=None):
+        """Több lekérdezés egy ritka mátrixszorzással: soronként (sorindexek, pontszámok)"""
+        indptr = np.zeros(len(queries) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(term_ids) for term_ids, _ in queries])
+        indices = np.concatenate([term_ids for term_ids, _ in queries] + [np.empty(0, dtype=np.int64)])
+        data = np.concatenate([weights for _, weights in queries] + [np.empty(0, dtype=np.float32)])
+        query_matrix = sparse.csr_matrix((data, indices, indptr),
+                                         shape=(len(queries), self.matrix.shape[1]), dtype=np.float32)
+
+        # _postings.T a mátrix transzponáltja CSR-ként, másolás nélkül
+        scores = (query_matrix @ self._postings.T).toarray()
+        if exclude_rows is not None:
+            for i, row_index in enumerate(exclude_rows):
+                if row_index is not None:
+                    scores[i, row_index] = -np.inf
+
+        top = top_k_rows(scores, k)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        return [(row[np.isfinite(row_scores)], row_scores[np.isfinite(row_scores)])
+                for row, row_scores in zip(top, top_scores)]
+
+    def _top_k(self, scores, k, exclude=None):
+        scores = np.asarray(scores, dtype=np.float32).ravel()
+        if exclude is not None and len(exclude) > 0:
+            scores = scores.copy()
+            scores[np.asarray(exclude, dtype=np.int64)] = -np.inf
+
+        top = top_k_indices(scores, k)
+        top = top[np.isfinite(scores[top])]
+        return top, scores[top]
+
+
+# Alapértelmezett súlyok: Környezet 40%, Egészség 40%, Népszerűség 20%
+SCORE_COLUMNS = ('ESI', 'HSI', 'PPI')
+DEFAULT_SCORE_WEIGHTS = {'ESI': 0.4, 'HSI': 0.4, 'PPI': 0.2}
+
+
+def normalize_weights(weights=None):
+    """Súlyvektor (ESI, HSI, PPI) validálása és 1-re normálása"""
+    if weights is None:
+        weights = DEFAULT_SCORE_WEIGHTS
+
+    if isinstance(weights, dict):
+        weights = [float(weights.get(col, 0.0)) for col in SCORE_COLUMNS]
+
+    vector = np.asarray(weights, dtype=np.float64).reshape(-1)
+    if vector.shape != (len(SCORE_COLUMNS),):
+        raise ValueError(f"A súlyvektor hossza {len(SCORE_COLUMNS)} kell legyen (ESI, HSI, PPI)")
+    if not np.all(np.isfinite(vector)) or np.any(vector < 0) or vector.sum() <= 0:
+        raise ValueError("A súlyok nemnegatív véges számok, legalább egy pozitív")
+
+    return vector / vector.sum()
+
+
+class HybridScorer:
+    """Súlyozott ESI/HSI/PPI pontozás kérésenkénti súlyokkal"""
+
+    def __init__(self, recipes):
+        # recipes: DataFrame vagy RecipeStore (oszlop név -> tömb)
+        # (3, N) C-folytonos mátrix: minden index egy folytonos sor
+        matrix = getattr(recipes, 'score_matrix', None)
+        if matrix is None:
+            matrix = np.vstack([np.asarray(recipes[col], dtype=np.float64) for col in SCORE_COLUMNS])
+        if np.isnan(matrix).any():
+            matrix = np.nan_to_num(matrix)
+        # RecipeStore (memmap snapshot) esetén másolás nélküli nézet
+        self.index_matrix = matrix if matrix.flags['C_CONTIGUOUS'] else np.ascontiguousarray(matrix)
+        self.esi, self.hsi, self.ppi = self.index_matrix
+
+    @property
+    def n_recipes(self):
+        return self.index_matrix.shape[1]
+
+    def scores(self, weights=None):
+        """Kompozit pontszám az összes receptre (0-100 skála)"""
+        return normalize_weights(weights) @ self.index_matrix
+
+    def top_k(self, weights=None, k=5):
+        """Top-k recept a megadott súlyokkal: (sorindexek, pontszámok)"""
+        scores = self.scores(weights)
+        top = top_k_indices(scores, k)
+        return top, scores[top]
+
+    def top_k_batch(self, weights_list, k=5):
+        """Több súlyvektor egy mátrixszorzással: (m, k) sorindexek és pontszámok"""
+        weight_matrix = np.vstack([normalize_weights(w) for w in weights_list])
+        # Azonos súlyú profilok (pl. alapértelmezett) csak egyszer pontozódnak
+        unique_weights, inverse = np.unique(weight_matrix, axis=0, return_inverse=True)
+        scores = unique_weights @ self.index_matrix
+        top = top_k_rows(scores, k)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        inverse = inverse.reshape(-1)
+        return top[inverse], top_scores[inverse]
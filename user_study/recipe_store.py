@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Oszlopos recept tár a kérés útvonalhoz
+NumPy tömbök a pontszámokhoz és ID-khoz, internált string táblák (UTF-8 blob), __slots__ rekord nézetek
+Bináris snapshot: .npy fájlok egy könyvtárban, a workerek np.memmap-pel (mmap_mode='r') töltik be
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+# Az első három sor sorrendje egyezik a hibrid pontozó (ESI, HSI, PPI) sorrendjével
+NUMERIC_COLUMNS = ('ESI', 'HSI', 'PPI', 'composite_score')
+STRING_COLUMNS = ('title', 'ingredients', 'instructions', 'images')
+
+SNAPSHOT_FORMAT_VERSION = 1
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent / "data" / "recipe_snapshot"
+
+
+class StringTable:
+    """Internált string oszlop: egyedi értékek egy UTF-8 blobban (offsetekkel) + int32 kódok
+
+    Nincs soronkénti Python str objektum; az érték hozzáféréskor dekódolódik.
+    """
+
+    __slots__ = ('blob', 'offsets', 'codes')
+
+    def __init__(self, blob, offsets, codes):
+        self.blob = blob
+        self.offsets = offsets
+        self.codes = codes
+
+    @classmethod
+    def from_iterable(cls, items):
+        lookup = {}
+        encoded = []
+        codes = []
+        for item in items:
+            item = '' if item is None or item != item else str(item)  # NaN -> ''
+            code = lookup.get(item)
+            if code is None:
+                code = lookup[item] = len(encoded)
+                encoded.append(item.encode('utf-8'))
+            codes.append(code)
+
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(value) for value in encoded])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(blob, offsets, np.asarray(codes, dtype=np.int32))
+
+    @property
+    def n_unique(self):
+        return len(self.offsets) - 1
+
+    def value(self, code):
+        start, end = self.offsets[code], self.offsets[code + 1]
+        return self.blob[start:end].tobytes().decode('utf-8')
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        return self.value(self.codes[row])
+
+    def __iter__(self):
+        return (self.value(code) for code in self.codes.tolist())
+
+
+class RecipeView:
+    """Egy recept sor nézete a tárban (dict-szerű és attribútum hozzáférés)"""
+
+    __slots__ = ('_store', '_row', 'hybrid_score', 'explanation')
+
+    def __init__(self, store, row, hybrid_score=None, explanation=None):
+        self._store = store
+        self._row = row
+        if hybrid_score is not None:
+            self.hybrid_score = hybrid_score
+        if explanation is not None:
+            self.explanation = explanation
+
+    @property
+    def row(self):
+        return self._row
+
+    @property
+    def recipeid(self):
+        return int(self._store.recipe_ids[self._row])
+
+    @property
+    def title(self):
+        return self._store.strings['title'][self._row]
+
+    @property
+    def ingredients(self):
+        return self._store.strings['ingredients'][self._row]
+
+    @property
+    def instructions(self):
+        return self._store.strings['instructions'][self._row]
+
+    @property
+    def images(self):
+        return self._store.strings['images'][self._row]
+
+    @property
+    def HSI(self):
+        return float(self._store.numeric['HSI'][self._row])
+
+    @property
+    def ESI(self):
+        return float(self._store.numeric['ESI'][self._row])
+
+    @property
+    def PPI(self):
+        return float(self._store.numeric['PPI'][self._row])
+
+    @property
+    def composite_score(self):
+        return float(self._store.numeric['composite_score'][self._row])
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        names = ['recipeid', *STRING_COLUMNS, *NUMERIC_COLUMNS]
+        return [name for name in names + ['hybrid_score', 'explanation'] if hasattr(self, name)]
+
+    def to_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self):
+        return f"RecipeView(recipeid={self.recipeid}, title={self.title!r})"
+
+
+class RecipeStore:
+    """Receptek oszlopos tárolása: a kérés útvonal nem használ pandas-t"""
+
+    def __init__(self, recipe_ids, numeric_matrix, strings, id_order=None, catalogue=None):
+        self.recipe_ids = recipe_ids
+        # catalogue_fingerprint(recipe_ids) - snapshotból a manifestben tárolt érték
+        self._catalogue = catalogue
+        # (len(NUMERIC_COLUMNS), N) mátrix; oszloponként folytonos sor nézetek
+        self.numeric_matrix = numeric_matrix
+        self.numeric = dict(zip(NUMERIC_COLUMNS, numeric_matrix))
+        self.strings = strings
+        # recipeid -> sor keresés rendezett ID-kkal (searchsorted)
+        self._id_order = np.argsort(recipe_ids, kind='stable') if id_order is None else id_order
+        self._sorted_ids = recipe_ids[self._id_order]
+
+    @classmethod
+    def from_dataframe(cls, df):
+        recipe_ids = np.ascontiguousarray(df['recipeid'].to_numpy(dtype=np.int64))
+        numeric_matrix = np.ascontiguousarray(np.vstack([
+            df[col].to_numpy(dtype=np.float64) if col in df.columns
+            else np.zeros(len(df), dtype=np.float64)
+            for col in NUMERIC_COLUMNS
+        ]))
+        strings = {
+            col: StringTable.from_iterable(df[col] if col in df.columns else [''] * len(df))
+            for col in STRING_COLUMNS
+        }
+        return cls(recipe_ids, numeric_matrix, strings)
+
+    @property
+    def score_matrix(self):
+        """(3, N) ESI/HSI/PPI nézet másolás nélkül"""
+        return self.numeric_matrix[:3]
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    def __getitem__(self, column):
+        """Teljes oszlop: numerikus NumPy tömb vagy StringTable"""
+        if column == 'recipeid':
+            return self.recipe_ids
+        if column in self.numeric:
+            return self.numeric[column]
+        return self.strings[column]
+
+    @property
+    def columns(self):
+        return ['recipeid', *STRING_COLUMNS, *NUMERIC_COLUMNS]
+
+    @property
+    def catalogue(self):
+        """A recept katalógus azonosítója (sorok száma + recipeid hash) - az ANN index párosításához"""
+        if self._catalogue is None:
+            self._catalogue = catalogue_fingerprint(self.recipe_ids)
+        return self._catalogue
+
+    def rows_for_ids(self, recipe_ids):
+        """recipeid-k sorindexei; hiányzó ID esetén -1"""
+        recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        positions = np.searchsorted(self._sorted_ids, recipe_ids)
+        positions = np.clip(positions, 0, max(len(self._sorted_ids) - 1, 0))
+        if len(self._sorted_ids) == 0:
+            return np.full(len(recipe_ids), -1, dtype=np.int64)
+        found = self._sorted_ids[positions] == recipe_ids
+        return np.where(found, self._id_order[positions], -1)
+
+    def view(self, row, hybrid_score=None, explanation=None):
+        return RecipeView(self, int(row), hybrid_score, explanation)
+
+    def views(self, rows):
+        return [RecipeView(self, row) for row in np.asarray(rows, dtype=np.int64).tolist()]
+
+    def save_snapshot(self, directory=DEFAULT_SNAPSHOT_DIR, source_path=None, extra_arrays=None):
+        """Bináris snapshot írása (ideiglenes könyvtárba, majd atomikus átnevezés)"""
+        directory = Path(directory)
+        tmp_dir = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        arrays = {
+            'recipe_ids': self.recipe_ids,
+            'id_order': self._id_order,
+            'numeric': self.numeric_matrix,
+        }
+        for col, table in self.strings.items():
+            arrays[f'{col}.blob'] = table.blob
+            arrays[f'{col}.offsets'] = table.offsets
+            arrays[f'{col}.codes'] = table.codes
+        for name, array in (extra_arrays or {}).items():
+            arrays[f'extra.{name}'] = array
+
+        for name, array in arrays.items():
+            np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(array))
+
+        manifest = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'n_recipes': len(self),
+            'numeric_columns': list(NUMERIC_COLUMNS),
+            'string_columns': list(STRING_COLUMNS),
+            'arrays': sorted(arrays),
+            'source': _source_signature(source_path),
+            'catalogue': self.catalogue,
+        }
+        with open(tmp_dir / "manifest.json", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        # Régi snapshot félretétele, új a helyére; párhuzamos író esetén az egyik nyer
+        old_dir = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+        try:
+            if directory.exists():
+                directory.rename(old_dir)
+            tmp_dir.rename(directory)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        finally:
+            shutil.rmtree(old_dir, ignore_errors=True)
+        return directory
+
+    @classmethod
+    def load_snapshot(cls, directory=DEFAULT_SNAPSHOT_DIR, mmap=True):
+        """Snapshot betöltése; mmap=True esetén a lapokat az OS page cache osztja meg a workerek között"""
+        directory = Path(directory)
+        manifest = read_snapshot_manifest(directory)
+        if manifest is None or manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Érvénytelen vagy elavult snapshot: {directory}")
+        if tuple(manifest['numeric_columns']) != NUMERIC_COLUMNS:
+            raise ValueError("A snapshot oszlop sorrendje eltér")
+
+        load = lambda name: _load_array(directory, name, mmap)
+        strings = {
+            col: StringTable(load(f'{col}.blob'), load(f'{col}.offsets'), load(f'{col}.codes'))
+            for col in manifest['string_columns']
+        }
+        return cls(load('recipe_ids'), load('numeric'), strings, id_order=load('id_order'),
+                   catalogue=manifest.get('catalogue'))
+
+
+def catalogue_fingerprint(recipe_ids):
+    """Katalógus azonosító: sorok száma + a recipeid-k (sorrendben) SHA-1 hash-e
+
+    A snapshot és az ANN index is tárolja; együtt csak egyező katalógusból épült pár használható.
+    """
+    recipe_ids = np.ascontiguousarray(np.asarray(recipe_ids, dtype=np.int64))
+    return {'rows': int(len(recipe_ids)), 'hash': hashlib.sha1(recipe_ids.tobytes()).hexdigest()}
+
+
+def _load_array(directory, name, mmap=True):
+    return np.load(Path(directory) / f"{name}.npy", mmap_mode='r' if mmap else None, allow_pickle=False)
+
+
+def _source_signature(source_path):
+    if source_path is None or not Path(source_path).exists():
+        return None
+    stat = Path(source_path).stat()
+    return {'path': str(source_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_snapshot_manifest(directory=DEFAULT_SNAPSHOT_DIR):
+    manifest_path = Path(directory) / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def snapshot_is_current(directory=DEFAULT_SNAPSHOT_DIR, source_path=None):
+    """Igaz, ha a snapshot létezik és a forrás CSV azóta nem változott"""
+    manifest = read_snapshot_manifest(directory)
+    if manifest is None or manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        return False
+    if source_path is None:
+        return True
+    signature = _source_signature(source_path)
+    recorded = manifest.get('source') or {}
+    return (signature is not None and recorded.get('size') == signature['size']
+            and recorded.get('mtime_ns') == signature['mtime_ns'])
+
+
+def load_snapshot_extra_arrays(directory=DEFAULT_SNAPSHOT_DIR, mmap=True):
+    """A snapshot mellé mentett kiegészítő tömbök (pl. TF-IDF index) névvel"""
+    manifest = read_snapshot_manifest(directory) or {}
+    return {name[len('extra.'):]: _load_array(directory, name, mmap)
+            for name in manifest.get('arrays', []) if name.startswith('extra.')}
+
+
+def write_recipe_snapshot(df, directory=DEFAULT_SNAPSHOT_DIR, source_path=None):
+    """Feldolgozott receptek + TF-IDF index snapshot írása (előfeldolgozási lépés)"""
+    from user_study.recipe_retrieval import IngredientSimilarityEngine
+
+    store = RecipeStore.from_dataframe(df)
+    engine = IngredientSimilarityEngine(store['ingredients'])
+    return store.save_snapshot(directory, source_path=source_path, extra_arrays=engine.to_arrays())
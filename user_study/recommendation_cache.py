@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Folyamaton belüli ajánlás cache - LRU kiszorítás + TTL lejárat
+Kulcs: (verzió, ajánlások száma, profil jellemzők)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_profile_key(version, n_recommendations, **profile):
+    """Hashelhető cache kulcs a kérés paramétereiből"""
+    features = []
+    for name in sorted(profile):
+        value = profile[name]
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            value = tuple(sorted(value.items()))
+        elif isinstance(value, (list, tuple)):
+            value = tuple(value)
+        elif hasattr(value, 'tolist'):
+            value = tuple(value.tolist())
+        features.append((name, value))
+    return (version, int(n_recommendations), tuple(features))
+
+
+class RecommendationCache:
+    """Korlátos méretű, szálbiztos LRU cache lejárati idővel"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+
+    def get(self, key):
+        """Érték lekérése; lejárt vagy hiányzó kulcs esetén None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation=None):
+        """Érték tárolása, a legrégebben használt elem kiszorításával
+
+        generation: a számítás kezdetekor olvasott generáció; ha azóta
+        invalidálás történt, az (elavult) érték nem kerül tárolásra.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Teljes ürítés (pl. recept adatok újratöltésekor)"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'generation': self.generation,
+            }
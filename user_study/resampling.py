@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Újramintavételezéses tesztek a verzió összehasonlításhoz
+Bootstrap konfidencia intervallum a verziónkénti átlagokra és permutációs teszt a
+verzió párok különbségére. Egy index mátrix egyszerre mind az öt mutatót mintavételezi;
+a mátrix memória korlát szerinti darabokban készül, a darabok process poolba is szétoszthatók.
+"""
+
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Egy darab súly / maszk mátrixában legfeljebb ennyi elem (újramintavételezés × sor, 8 bájt / elem)
+DEFAULT_MAX_ELEMENTS = 4_000_000
+# Ennyi újramintavételezés egy feladat (saját seed-del) - a jobs számától független, reprodukálható eredmény
+TASK_RESAMPLES = 2000
+
+
+def _chunk_rows(n_rows, max_elements):
+    return max(1, max_elements // max(1, n_rows))
+
+
+def _weighted_means(weights, filled, valid):
+    """(darab, sorok) súly mátrix -> (darab, mutatók) átlagok, egyetlen mátrixszorzással"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (weights @ filled) / (weights @ valid)
+
+
+def bootstrap_means(values, n_resamples, rng, max_elements=DEFAULT_MAX_ELEMENTS):
+    """(n_resamples, mutatók) átlag mátrix visszatevéses mintavételből; NaN-ok kihagyásával
+
+    Az index mátrixból soronkénti előfordulás szám (bincount) lesz, az átlag ezzel súlyozott összeg.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = (~np.isnan(values)).astype(float)
+    filled = np.nan_to_num(values)
+    n_rows = len(values)
+
+    means = np.empty((n_resamples, values.shape[1]))
+    chunk = _chunk_rows(n_rows, max_elements)
+    for start in range(0, n_resamples, chunk):
+        rows = min(chunk, n_resamples - start)
+        idx = rng.integers(0, n_rows, size=(rows, n_rows))
+        idx += np.arange(rows)[:, None] * n_rows
+        weights = np.bincount(idx.ravel(), minlength=rows * n_rows).reshape(rows, n_rows).astype(float)
+        means[start:start + rows] = _weighted_means(weights, filled, valid)
+    return means
+
+
+def permutation_exceedances(a, b, n_resamples, rng, max_elements=DEFAULT_MAX_ELEMENTS):
+    """Mutatónként hány permutációban |átlag(a) - átlag(b)| >= a megfigyelt különbség
+
+    Permutációnként egy 0/1 maszk jelöli az "a" csoportba kerülő sorokat (véletlen kulcsok
+    argpartition-je); az "a" összeg maszk @ értékek, a "b" összeg a teljes összegből adódik.
+    """
+    pooled = np.vstack([np.asarray(a, dtype=float), np.asarray(b, dtype=float)])
+    valid = (~np.isnan(pooled)).astype(float)
+    filled = np.nan_to_num(pooled)
+    n_a, n_rows = len(a), len(pooled)
+    total_sum, total_count = filled.sum(axis=0), valid.sum(axis=0)
+
+    sum_a, count_a = filled[:n_a].sum(axis=0), valid[:n_a].sum(axis=0)
+    observed = np.abs(sum_a / count_a - (total_sum - sum_a) / (total_count - count_a))
+    # Lebegőpontos kerekítés miatt az egyenlő különbségek is beszámítanak
+    threshold = observed - 1e-9 * np.maximum(1.0, observed)
+
+    exceedances = np.zeros(pooled.shape[1], dtype=np.int64)
+    chunk = _chunk_rows(n_rows, max_elements)
+    for start in range(0, n_resamples, chunk):
+        rows = min(chunk, n_resamples - start)
+        chosen = rng.random((rows, n_rows), dtype=np.float32).argpartition(n_a - 1, axis=1)[:, :n_a]
+        mask = np.zeros((rows, n_rows))
+        np.put_along_axis(mask, chosen, 1.0, axis=1)
+        sum_a, count_a = mask @ filled, mask @ valid
+        with np.errstate(invalid='ignore', divide='ignore'):
+            diff = sum_a / count_a - (total_sum - sum_a) / (total_count - count_a)
+        exceedances += (np.abs(diff) >= threshold).sum(axis=0)
+    return exceedances
+
+
+def _run_task(task):
+    kind, arrays, n_resamples, seed, max_elements = task
+    rng = np.random.default_rng(seed)
+    if kind == 'bootstrap':
+        return bootstrap_means(arrays[0], n_resamples, rng, max_elements)
+    return permutation_exceedances(arrays[0], arrays[1], n_resamples, rng, max_elements)
+
+
+def resampling_comparison(merged, metrics, versions=('v1', 'v2', 'v3'), n_resamples=10000,
+                          confidence=0.95, jobs=None, seed=0, max_elements=DEFAULT_MAX_ELEMENTS):
+    """Bootstrap CI verziónként és permutációs teszt verzió páronként, minden mutatóra
+
+    jobs=None vagy 1: a hívó folyamatban; jobs>1: spawn alapú process pool.
+    """
+    metrics = list(metrics)
+    groups = {version: merged.loc[merged['version'] == version, metrics].to_numpy(dtype=float)
+              for version in versions}
+    groups = {version: values for version, values in groups.items() if len(values) > 0}
+    pairs = list(itertools.combinations(groups, 2))
+
+    # Feladatok: (típus, kulcs) -> TASK_RESAMPLES méretű szeletek, mindegyik saját seed-del
+    jobs_spec = [('bootstrap', (version,), (groups[version],)) for version in groups]
+    jobs_spec += [('permutation', pair, (groups[pair[0]], groups[pair[1]])) for pair in pairs]
+    sizes = [min(TASK_RESAMPLES, n_resamples - start) for start in range(0, n_resamples, TASK_RESAMPLES)]
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(jobs_spec) * len(sizes)))
+    tasks, owners = [], []
+    for kind, key, arrays in jobs_spec:
+        for size in sizes:
+            tasks.append((kind, arrays, size, next(seeds), max_elements))
+            owners.append((kind, key))
+
+    if jobs is not None and jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            outputs = list(pool.map(_run_task, tasks))
+    else:
+        outputs = [_run_task(task) for task in tasks]
+
+    collected = {}
+    for owner, output in zip(owners, outputs):
+        collected.setdefault(owner, []).append(output)
+
+    alpha = (1 - confidence) / 2
+    bootstrap_ci = {metric: {} for metric in metrics}
+    for version, values in groups.items():
+        means = np.vstack(collected[('bootstrap', (version,))])
+        low, high = np.nanpercentile(means, [alpha * 100, (1 - alpha) * 100], axis=0)
+        point = np.nanmean(values, axis=0)
+        for column, metric in enumerate(metrics):
+            bootstrap_ci[metric][version] = {
+                'mean': round(float(point[column]), 3),
+                'ci_low': round(float(low[column]), 3),
+                'ci_high': round(float(high[column]), 3),
+            }
+
+    permutation_tests = {metric: {} for metric in metrics}
+    for first, second in pairs:
+        exceedances = np.sum(collected[('permutation', (first, second))], axis=0)
+        difference = np.nanmean(groups[first], axis=0) - np.nanmean(groups[second], axis=0)
+        for column, metric in enumerate(metrics):
+            # (b + 1) / (B + 1): a megfigyelt felosztás is egy permutáció, így p sosem 0
+            p_value = (int(exceedances[column]) + 1) / (n_resamples + 1)
+            permutation_tests[metric][f'{first}_vs_{second}'] = {
+                'mean_difference': round(float(difference[column]), 3),
+                'p_value': round(p_value, 4),
+                'significant': p_value < 0.05
+            }
+
+    return {
+        'n_resamples': n_resamples,
+        'confidence': confidence,
+        'bootstrap_ci': bootstrap_ci,
+        'permutation_tests': permutation_tests
+    }
@@ -6,144 +6,361 @@ A `processed_recipes.csv` létrehozása és használata
 
 import os
 import sys
-import sqlite3
 import datetime
+import functools
+import hashlib
+import hmac
+import logging
 import random
-import pandas as pd
+import threading
+import time
 import numpy as np
 from pathlib import Path
-from flask import Blueprint, render_template, request, session, redirect, url_for, jsonify
+from flask import Blueprint, render_template, request, session, redirect, url_for, jsonify, make_response, Response
 
 # Project path setup
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from user_study.recipe_retrieval import IngredientSimilarityEngine, HybridScorer, normalize_weights
+from user_study.ann_index import IVFIndex, DEFAULT_INDEX_PATH
+from user_study.recommendation_cache import RecommendationCache, make_profile_key
+from user_study.recipe_store import (RecipeStore, DEFAULT_SNAPSHOT_DIR, snapshot_is_current,
+                                     load_snapshot_extra_arrays)
+from user_study.db_pool import ConnectionPool
+from user_study.migrations import run_migrations, schema_version, full_table_scans, rebuild_summary_tables
+from user_study.csv_loading import read_csv
+from user_study.export import EXPORT_TABLES, EXPORT_FORMATS, open_readonly, stream_export
+from user_study.lazy_init import LazyResource, warm_up
+from user_study.write_behind import InteractionWriteBuffer, utc_timestamp
+from user_study.explanations import (ExplanationTable, EXPLANATION_RULES, DEFAULT_EXPLANATION_THRESHOLDS,
+                                     explanation_text, detailed_explanation_text)
+from user_study.logging_utils import (setup_logging, begin_request, debug_sampled, logging_config,
+                                      set_log_level, set_debug_sample_rate, parse_log_level,
+                                      parse_debug_sample_rate)
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
 # Blueprint - TEMPLATE PATH FIX
 user_study_bp = Blueprint('user_study', __name__, 
                          url_prefix='',
                          template_folder='templates/user_study')
 
+# Az /admin/stats kérésenkénti lekérdezései (get_stats) - csak az összesítő táblákat olvassák
+STATS_PAGE_QUERIES = {
+    'version_stats': 'SELECT * FROM version_stats ORDER BY version',
+    'study_totals': 'SELECT interactions FROM study_totals WHERE id = 1',
+}
+# Szándékosan megengedett bejárás: verziónként egy sor, a tanulmány méretétől független
+ALLOWED_SCANS = ('version_stats',)
+
+# Ugyanezek a statisztikák nyers aggregátumként (összesítő táblák ellenőrzéséhez, manage rebuild-stats) -
+# szándékosan a teljes táblákat olvassák, ezért kérés közben nem futnak
+STATS_QUERIES = {
+    'total_participants': 'SELECT COUNT(*) as count FROM participants',
+    'completed_participants': 'SELECT COUNT(*) as count FROM participants WHERE is_completed = 1',
+    'version_distribution': '''
+        SELECT version, 
+               COUNT(*) as count,
+               SUM(CASE WHEN is_completed = 1 THEN 1 ELSE 0 END) as completed
+        FROM participants 
+        GROUP BY version
+    ''',
+    'average_ratings': '''
+        SELECT p.version, AVG(i.rating) as avg_rating, COUNT(i.rating) as count
+        FROM participants p
+        JOIN interactions i ON p.user_id = i.user_id
+        WHERE i.rating IS NOT NULL
+        GROUP BY p.version
+    ''',
+    'questionnaire_results': '''
+        SELECT p.version,
+               AVG(q.system_usability) as avg_usability,
+               AVG(q.recommendation_quality) as avg_quality,
+               AVG(q.trust_level) as avg_trust,
+               AVG(q.explanation_clarity) as avg_clarity,
+               AVG(q.overall_satisfaction) as avg_satisfaction
+        FROM participants p
+        JOIN questionnaire q ON p.user_id = q.user_id
+        GROUP BY p.version
+    ''',
+    'interactions_count': 'SELECT COUNT(*) as count FROM interactions',
+}
+
+def _diff_stats(left, right, tolerance, path='stats'):
+    """Két statisztika struktúra rekurzív összevetése (számoknál tűréssel)"""
+    if isinstance(left, dict) and isinstance(right, dict):
+        differences = []
+        for key in sorted(set(left) | set(right)):
+            differences += _diff_stats(left.get(key), right.get(key), tolerance, f'{path}.{key}')
+        return differences
+    if isinstance(left, list) and isinstance(right, list):
+        if len(left) != len(right):
+            return [f'{path}: {len(left)} != {len(right)} sor']
+        differences = []
+        for i, (a, b) in enumerate(zip(left, right)):
+            differences += _diff_stats(a, b, tolerance, f'{path}[{i}]')
+        return differences
+    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+        return [] if abs(left - right) <= tolerance * max(1.0, abs(right)) else [f'{path}: {left} != {right}']
+    return [] if left == right else [f'{path}: {left!r} != {right!r}']
+
 class UserStudyDatabase:
     """Adatbázis kezelő"""
     
-    def __init__(self, db_path="user_study.db"):
+    def __init__(self, db_path="user_study.db", write_behind=None):
         self.db_path = db_path
+        # Minden sikeres írás után nő (folyamaton belüli cache invalidálás)
+        self.generation = 0
+        self._generation_lock = threading.Lock()
+        # Szálanként egy tartós kapcsolat (WAL, synchronous=NORMAL, busy timeout)
+        self.pool = ConnectionPool(db_path)
         self.init_database()
+        
+        # Interakciók write-behind pufferrel: a kérés nem vár a commitra
+        if write_behind is None:
+            write_behind = os.environ.get('INTERACTION_WRITE_BEHIND', '1') != '0'
+        self.write_buffer = InteractionWriteBuffer(
+            self.log_interactions,
+            max_batch=int(os.environ.get('INTERACTION_BATCH_SIZE', 256)),
+            flush_interval=float(os.environ.get('INTERACTION_FLUSH_INTERVAL', 0.25)),
+            max_queue=int(os.environ.get('INTERACTION_QUEUE_SIZE', 10000)),
+            overflow=os.environ.get('INTERACTION_QUEUE_OVERFLOW', 'sync'),
+            max_retries=int(os.environ.get('INTERACTION_MAX_RETRIES', 5)),
+            dead_letter_path=f"{db_path}.dead_letter.ndjson"
+        ) if write_behind else None
+        # Ennyi ideig várnak a flush() hívók (export, összesítők) a puffer kiürülésére
+        self.flush_timeout = float(os.environ.get('INTERACTION_FLUSH_TIMEOUT', 10.0))
     
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """A hívó szál pool-beli kapcsolata - nem kell (és nem szabad) lezárni"""
+        return self.pool.connection()
+    
+    def _bump_generation(self):
+        with self._generation_lock:
+            self.generation += 1
+    
+    def data_version(self):
+        """Olcsó változás token adatbázis lekérdezés nélkül
+        
+        A generáció ennek a folyamatnak az írásait jelzi; a db és -wal fájl
+        mérete/mtime-ja a más workerekben (folyamatokban) történt írásokat.
+        """
+        signature = []
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return (self.generation, *signature)
+    
+    def flush(self, timeout=None):
+        """Pufferelt interakciók kiírásának megvárása (pl. elemzés vagy export előtt)
+        
+        True, ha a puffer kiürült; False, ha timeout (alapból self.flush_timeout) másodperc alatt nem.
+        """
+        if self.write_buffer is None:
+            return True
+        if self.write_buffer.flush(self.flush_timeout if timeout is None else timeout):
+            return True
+        logger.warning(f"⚠️ Az interakció puffer nem ürült ki időben: {self.write_buffer.stats()}")
+        return False
+    
+    def close(self):
+        if self.write_buffer is not None:
+            self.write_buffer.close()
+        self.pool.close_all()
     
     def init_database(self):
+        """Séma létrehozása / frissítése verziózott migrációkkal (PRAGMA user_version)"""
+        run_migrations(self.get_connection())
+    
+    @property
+    def schema_version(self):
+        return schema_version(self.get_connection())
+    
+    def get_stats(self):
+        """Admin statisztikák az összesítő táblákból - néhány sor olvasása, a tanulmány méretétől függetlenül"""
         conn = self.get_connection()
+        rows = conn.execute(STATS_PAGE_QUERIES['version_stats']).fetchall()
+        totals = conn.execute(STATS_PAGE_QUERIES['study_totals']).fetchone()
+        
+        def average(row, column):
+            count = row[f'{column}_count']
+            return row[f'{column}_sum'] / count if count else None
+        
+        stats = {
+            'total_participants': sum(row['participants'] for row in rows),
+            'completed_participants': sum(row['completed'] for row in rows),
+        }
+        
+        if stats['total_participants'] > 0:
+            stats['completion_rate'] = stats['completed_participants'] / stats['total_participants']
+        else:
+            stats['completion_rate'] = 0
+        
+        stats['version_distribution'] = [
+            {'version': row['version'], 'count': row['participants'], 'completed': row['completed']}
+            for row in rows if row['participants'] > 0
+        ]
+        stats['average_ratings'] = [
+            {'version': row['version'], 'avg_rating': average(row, 'rating'), 'count': row['rating_count']}
+            for row in rows if row['rating_count'] > 0
+        ]
+        stats['questionnaire_results'] = [
+            {'version': row['version'],
+             'avg_usability': average(row, 'system_usability'),
+             'avg_quality': average(row, 'recommendation_quality'),
+             'avg_trust': average(row, 'trust_level'),
+             'avg_clarity': average(row, 'explanation_clarity'),
+             'avg_satisfaction': average(row, 'overall_satisfaction')}
+            for row in rows if row['questionnaires'] > 0
+        ]
         
-        # Participants
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS participants (
-                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                age_group TEXT NOT NULL,
-                education TEXT NOT NULL,
-                cooking_frequency TEXT NOT NULL,
-                sustainability_awareness INTEGER NOT NULL,
-                version TEXT NOT NULL,
-                is_completed BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Interactions
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS interactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                recipe_id INTEGER,
-                rating INTEGER,
-                explanation_helpful INTEGER,
-                view_time_seconds REAL,
-                interaction_order INTEGER,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES participants (user_id)
-            )
-        ''')
-        
-        # Questionnaire
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS questionnaire (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                system_usability INTEGER,
-                recommendation_quality INTEGER,
-                trust_level INTEGER,
-                explanation_clarity INTEGER,
-                sustainability_importance INTEGER,
-                overall_satisfaction INTEGER,
-                additional_comments TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES participants (user_id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        interactions_count = totals['interactions'] if totals else 0
+        if stats['total_participants'] > 0:
+            stats['avg_interactions_per_user'] = interactions_count / stats['total_participants']
+        else:
+            stats['avg_interactions_per_user'] = 0
+        
+        return stats
     
-    def create_user(self, age_group, education, cooking_frequency, sustainability_awareness, version):
+    def get_stats_from_raw(self):
+        """Ugyanezek a statisztikák közvetlenül a nyers táblákból (STATS_QUERIES) - ellenőrzéshez"""
         conn = self.get_connection()
-        cursor = conn.execute('''
-            INSERT INTO participants (age_group, education, cooking_frequency, sustainability_awareness, version)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (age_group, education, cooking_frequency, sustainability_awareness, version))
+        stats = {}
+        
+        # Alapstatisztikák
+        stats['total_participants'] = conn.execute(STATS_QUERIES['total_participants']).fetchone()['count']
+        stats['completed_participants'] = conn.execute(STATS_QUERIES['completed_participants']).fetchone()['count']
         
-        user_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return user_id
+        if stats['total_participants'] > 0:
+            stats['completion_rate'] = stats['completed_participants'] / stats['total_participants']
+        else:
+            stats['completion_rate'] = 0
+        
+        # Verzió eloszlás, átlagos értékelések, kérdőív eredmények
+        for key in ('version_distribution', 'average_ratings', 'questionnaire_results'):
+            stats[key] = [dict(row) for row in conn.execute(STATS_QUERIES[key]).fetchall()]
+        
+        # Átlagos interakciók
+        interactions_count = conn.execute(STATS_QUERIES['interactions_count']).fetchone()['count']
+        if stats['total_participants'] > 0:
+            stats['avg_interactions_per_user'] = interactions_count / stats['total_participants']
+        else:
+            stats['avg_interactions_per_user'] = 0
+        
+        return stats
     
-    def log_interaction(self, user_id, recipe_id, rating, explanation_helpful=None, view_time=None, interaction_order=None):
+    def rebuild_summary_tables(self):
+        """Összesítő táblák újraszámítása a nyers táblákból
+        
+        Ha a puffer nem ürül ki időben, az újraszámítás a már kiírt sorokból fut; a később
+        beszúrt sorokat a triggerek vezetik át az összesítőkbe.
+        """
+        self.flush()
+        rebuild_summary_tables(self.get_connection())
+        self._bump_generation()
+    
+    def verify_summary_tables(self, tolerance=1e-9):
+        """Összesítők és nyers aggregátumok összevetése; eltérések listája (üres = konzisztens)"""
+        self.flush()
         conn = self.get_connection()
-        conn.execute('''
-            INSERT INTO interactions (user_id, recipe_id, rating, explanation_helpful, view_time_seconds, interaction_order)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (user_id, recipe_id, rating, explanation_helpful, view_time, interaction_order))
-        conn.commit()
-        conn.close()
+        # Egy olvasó tranzakció: a két oldal ugyanazt a pillanatképet látja
+        conn.execute('BEGIN')
+        try:
+            summary, raw = self.get_stats(), self.get_stats_from_raw()
+        finally:
+            conn.execute('COMMIT')
+        return _diff_stats(summary, raw, tolerance)
     
-    def save_questionnaire(self, user_id, responses):
+    def check_query_plans(self, queries=None, allowed_scans=ALLOWED_SCANS):
+        """Nem index keresésű (SCAN) tábla hozzáférések az /admin/stats lekérdezéseiben: {név: [terv sorok]}"""
         conn = self.get_connection()
-        conn.execute('''
-            INSERT INTO questionnaire 
-            (user_id, system_usability, recommendation_quality, trust_level, 
-             explanation_clarity, sustainability_importance, overall_satisfaction, additional_comments)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            user_id,
-            responses.get('system_usability'),
-            responses.get('recommendation_quality'),
-            responses.get('trust_level'),
-            responses.get('explanation_clarity'),
-            responses.get('sustainability_importance'),
-            responses.get('overall_satisfaction'),
-            responses.get('additional_comments', '')
-        ))
-        
-        conn.execute('UPDATE participants SET is_completed = TRUE WHERE user_id = ?', (user_id,))
-        conn.commit()
-        conn.close()
+        queries = STATS_PAGE_QUERIES if queries is None else queries
+        offenders = {name: full_table_scans(conn, sql, allowed_scans=allowed_scans) for name, sql in queries.items()}
+        return {name: scans for name, scans in offenders.items() if scans}
+    
+    def create_user(self, age_group, education, cooking_frequency, sustainability_awareness, version):
+        # A kapcsolat context managere commitol, hiba esetén visszagörget
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                INSERT INTO participants (age_group, education, cooking_frequency, sustainability_awareness, version)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (age_group, education, cooking_frequency, sustainability_awareness, version))
+        
+        self._bump_generation()
+        return cursor.lastrowid
+    
+    def log_interaction(self, user_id, recipe_id, rating, explanation_helpful=None, view_time=None, interaction_order=None):
+        # Az időbélyeg a kérés ideje, nem a (későbbi) kiírásé
+        row = (user_id, recipe_id, rating, explanation_helpful, view_time, interaction_order, utc_timestamp())
+        if self.write_buffer is not None:
+            self.write_buffer.submit(row)
+        else:
+            self.log_interactions([row])
+    
+    def log_interactions(self, rows):
+        """Interakciók írása egy tranzakcióban (executemany)"""
+        with self.get_connection() as conn:
+            conn.executemany('''
+                INSERT INTO interactions (user_id, recipe_id, rating, explanation_helpful, view_time_seconds,
+                                          interaction_order, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        self._bump_generation()
+    
+    def save_questionnaire(self, user_id, responses):
+        with self.get_connection() as conn:
+            conn.execute('''
+                INSERT INTO questionnaire 
+                (user_id, system_usability, recommendation_quality, trust_level, 
+                 explanation_clarity, sustainability_importance, overall_satisfaction, additional_comments)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                user_id,
+                responses.get('system_usability'),
+                responses.get('recommendation_quality'),
+                responses.get('trust_level'),
+                responses.get('explanation_clarity'),
+                responses.get('sustainability_importance'),
+                responses.get('overall_satisfaction'),
+                responses.get('additional_comments', '')
+            ))
+        
+            conn.execute('UPDATE participants SET is_completed = TRUE WHERE user_id = ?', (user_id,))
+        self._bump_generation()
 
 class CSVProcessor:
     """CSV feldolgozó és processed_recipes.csv létrehozó"""
     
     @staticmethod
     def create_processed_csv():
-        """Létrehozza a processed_recipes.csv fájlt ha nem létezik"""
+        """Létrehozza a processed_recipes.csv fájlt ha nem létezik
+
+        RECIPE_CATALOGUE: másik feldolgozott CSV betöltése, pl. a teljes katalógus
+        (data/processed_recipes_full.csv) - az ANN index ehhez a katalógushoz épül.
+        """
+        catalogue = os.environ.get('RECIPE_CATALOGUE')
+        if catalogue:
+            catalogue_path = Path(catalogue)
+            if not catalogue_path.is_absolute():
+                catalogue_path = project_root / catalogue_path
+            if catalogue_path.exists():
+                logger.info(f"✅ Recept katalógus: {catalogue_path}")
+                return catalogue_path
+            logger.warning(f"⚠️ RECIPE_CATALOGUE nem található: {catalogue_path}, processed_recipes.csv használata")
+
         processed_path = project_root / "data" / "processed_recipes.csv"
-        
+
         # Ha már létezik, ne írjuk felül
         if processed_path.exists():
-            print(f"✅ processed_recipes.csv már létezik: {processed_path}")
+            logger.info(f"✅ processed_recipes.csv már létezik: {processed_path}")
             return processed_path
         
-        print("🔧 processed_recipes.csv létrehozása...")
+        logger.info("🔧 processed_recipes.csv létrehozása...")
         
         # Data mappa létrehozása
         os.makedirs(processed_path.parent, exist_ok=True)
@@ -152,33 +369,21 @@ class CSVProcessor:
         original_csv = project_root / "hungarian_recipes_github.csv"
         
         if original_csv.exists():
-            print(f"📊 Eredeti CSV feldolgozása: {original_csv}")
+            logger.info(f"📊 Eredeti CSV feldolgozása: {original_csv}")
             return CSVProcessor.process_original_csv(original_csv, processed_path)
         else:
-            print("⚠️ hungarian_recipes_github.csv nem található, sample CSV létrehozása")
+            logger.warning("⚠️ hungarian_recipes_github.csv nem található, sample CSV létrehozása")
             return CSVProcessor.create_sample_csv(processed_path)
     
     @staticmethod
     def process_original_csv(original_path, output_path):
         """Eredeti CSV feldolgozása"""
         try:
-            # Többféle encoding próbálása
-            encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-            df = None
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(original_path, encoding=encoding)
-                    print(f"✅ CSV betöltve {encoding} encoding-gal")
-                    break
-                except UnicodeDecodeError:
-                    continue
+            # Encoding felismerés bájt mintából, egyetlen parse (mojibake javítással)
+            df, encoding = read_csv(original_path)
+            logger.info(f"✅ CSV betöltve {encoding} encoding-gal")
             
-            if df is None:
-                print("❌ CSV betöltés sikertelen, sample adatok")
-                return CSVProcessor.create_sample_csv(output_path)
-            
-            print(f"📋 Eredeti CSV: {len(df)} recept, oszlopok: {list(df.columns)}")
+            logger.info(f"📋 Eredeti CSV: {len(df)} recept, oszlopok: {list(df.columns)}")
             
             # Oszlop mapping
             column_mapping = {
@@ -206,12 +411,12 @@ class CSVProcessor:
             
             # Mentés
             df_sample.to_csv(output_path, index=False, encoding='utf-8')
-            print(f"✅ Processed CSV mentve: {output_path} ({len(df_sample)} recept)")
+            logger.info(f"✅ Processed CSV mentve: {output_path} ({len(df_sample)} recept)")
             
             return output_path
             
         except Exception as e:
-            print(f"❌ CSV feldolgozási hiba: {e}")
+            logger.error(f"❌ CSV feldolgozási hiba: {e}")
             return CSVProcessor.create_sample_csv(output_path)
     
     @staticmethod
@@ -248,17 +453,17 @@ class CSVProcessor:
         # Composite score
         df['composite_score'] = (df['ESI'] * 0.4 + df['HSI'] * 0.4 + df['PPI'] * 0.2)
         
-        print(f"📊 Score tartományok:")
-        print(f"   HSI: {df['HSI'].min():.1f} - {df['HSI'].max():.1f}")
-        print(f"   ESI: {df['ESI'].min():.1f} - {df['ESI'].max():.1f}")
-        print(f"   PPI: {df['PPI'].min():.1f} - {df['PPI'].max():.1f}")
+        logger.info(f"📊 Score tartományok:")
+        logger.info(f"   HSI: {df['HSI'].min():.1f} - {df['HSI'].max():.1f}")
+        logger.info(f"   ESI: {df['ESI'].min():.1f} - {df['ESI'].max():.1f}")
+        logger.info(f"   PPI: {df['PPI'].min():.1f} - {df['PPI'].max():.1f}")
         
         return df
     
     @staticmethod
     def create_sample_csv(output_path):
         """Sample CSV létrehozása ha nincs eredeti"""
-        print("🔧 Sample CSV létrehozása külső képekkel...")
+        logger.info("🔧 Sample CSV létrehozása külső képekkel...")
         
         sample_recipes = [
             {
@@ -343,102 +548,380 @@ class CSVProcessor:
             }
         ]
         
+        import pandas as pd
+        
         df = pd.DataFrame(sample_recipes)
         df.to_csv(output_path, index=False, encoding='utf-8')
         
-        print(f"✅ Sample CSV létrehozva: {len(df)} recept")
-        print(f"🖼️ Külső képek Unsplash-ből")
+        logger.info(f"✅ Sample CSV létrehozva: {len(df)} recept")
+        logger.info(f"🖼️ Külső képek Unsplash-ből")
         
         return output_path
 
 class EnhancedRecipeRecommender:
     """Recept ajánló rendszer - JAVÍTOTT"""
     
+    # Ez alatt a katalógus méret alatt a pontos keresés gyors és pontosabb
+    ANN_MIN_RECIPES = int(os.environ.get('ANN_MIN_RECIPES', 50000))
+    # Az építéskor a pontos TF-IDF rangsorhoz mért recall@k alsó határa
+    ANN_MIN_RECALL = float(os.environ.get('ANN_MIN_RECALL', 0.9))
+    
     def __init__(self):
+        # Ajánlás cache: böngésző frissítés ne számoljon újra
+        self.cache = RecommendationCache(
+            max_entries=int(os.environ.get('RECOMMENDATION_CACHE_SIZE', 1024)),
+            ttl_seconds=float(os.environ.get('RECOMMENDATION_CACHE_TTL', 600))
+        )
+        
+        # Magyarázat küszöbök (set_explanation_thresholds-szal módosítható)
+        self.explanation_thresholds = dict(DEFAULT_EXPLANATION_THRESHOLDS)
+        
         # CSV létrehozása/ellenőrzése
         self.csv_path = CSVProcessor.create_processed_csv()
-        self.recipes_df = self.load_recipes()
+        self.build_indexes()
         
-        print(f"🍽️ Recept rendszer inicializálva: {len(self.recipes_df) if self.recipes_df is not None else 0} recept")
+        logger.info(f"🍽️ Recept rendszer inicializálva: {self.recipe_count} recept")
+    
+    def build_indexes(self):
+        """Receptek betöltése és a keresési struktúrák felépítése"""
+        self.store, self.similarity_engine = self.load_snapshot()
+        
+        if self.store is None:
+            df = self.load_recipes()
+            
+            # Oszlopos tár: a DataFrame csak betöltéskor él, a kérés útvonal nem használja
+            self.store = RecipeStore.from_dataframe(df) if df is not None and len(df) > 0 else None
+            del df
+            
+            self.similarity_engine = self.build_similarity_engine()
+            self.save_snapshot()
+        
+        self.ann_index = self.load_ann_index()
+        self.hybrid_scorer = HybridScorer(self.store) if self.store is not None else None
+        self.explanations = (ExplanationTable(self.store, self.explanation_thresholds)
+                             if self.store is not None else None)
+    
+    @property
+    def recipe_count(self):
+        return len(self.store) if self.store is not None else 0
+    
+    def set_explanation_thresholds(self, **thresholds):
+        """Magyarázat küszöbök módosítása (pl. HSI=75) - a tábla inkrementálisan frissül"""
+        unknown = set(thresholds) - set(self.explanation_thresholds)
+        if unknown:
+            raise ValueError(f"Ismeretlen küszöb: {sorted(unknown)}")
+        
+        self.explanation_thresholds.update(thresholds)
+        changed_rows = self.explanations.set_thresholds(**thresholds) if self.explanations is not None else 0
+        self.cache.invalidate()
+        logger.info(f"🔧 Magyarázat küszöbök: {self.explanation_thresholds} ({changed_rows} recept érintett)")
+        return changed_rows
+    
+    def reload_recipes(self):
+        """Recept adatok újratöltése (pl. új feldolgozás után), cache invalidálással"""
+        self.build_indexes()
+        self.cache.invalidate()
+        logger.info(f"🔄 Receptek újratöltve: {self.recipe_count} recept")
+    
+    def load_snapshot(self, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+        """Bináris snapshot memmap betöltése, ha a CSV azóta nem változott"""
+        if not snapshot_is_current(snapshot_dir, self.csv_path):
+            return None, None
+        
+        try:
+            started = time.perf_counter()
+            store = RecipeStore.load_snapshot(snapshot_dir)
+            engine_arrays = load_snapshot_extra_arrays(snapshot_dir)
+            engine = IngredientSimilarityEngine.from_arrays(engine_arrays) if engine_arrays else None
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.info(f"⚡ Recept snapshot betöltve (memmap): {len(store)} recept, {elapsed_ms:.1f} ms")
+            return store, engine
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot betöltési hiba, CSV használata: {e}")
+            return None, None
+    
+    def save_snapshot(self, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+        """Snapshot írása a következő indításokhoz (hiba esetén a CSV marad a forrás)"""
+        if self.store is None:
+            return
+        
+        try:
+            extra_arrays = self.similarity_engine.to_arrays() if self.similarity_engine is not None else None
+            self.store.save_snapshot(snapshot_dir, source_path=self.csv_path, extra_arrays=extra_arrays)
+            logger.info(f"💾 Recept snapshot mentve: {snapshot_dir}")
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot mentési hiba: {e}")
     
     def load_recipes(self):
         """Receptek betöltése CSV-ből"""
+        # pandas csak itt kell (snapshot betöltésnél nem): az import nem lassítja az indulást
+        import pandas as pd
+        
         try:
             if not self.csv_path.exists():
-                print(f"❌ CSV nem található: {self.csv_path}")
+                logger.error(f"❌ CSV nem található: {self.csv_path}")
                 return None
             
             df = pd.read_csv(self.csv_path)
-            print(f"✅ CSV betöltve: {len(df)} recept")
+            logger.info(f"✅ CSV betöltve: {len(df)} recept")
             
             # Kötelező oszlopok ellenőrzése
             required_cols = ['recipeid', 'title', 'ingredients', 'images', 'HSI', 'ESI', 'PPI']
             missing_cols = [col for col in required_cols if col not in df.columns]
             
             if missing_cols:
-                print(f"⚠️ Hiányzó oszlopok: {missing_cols}")
+                logger.warning(f"⚠️ Hiányzó oszlopok: {missing_cols}")
                 return None
             
             # Debug: képek ellenőrzése
-            print(f"🖼️ Képek ellenőrzése:")
-            for i in range(min(3, len(df))):
-                recipe = df.iloc[i]
-                print(f"   {recipe['title']}: {recipe['images']}")
+            if debug_sampled(logger):
+                logger.debug("🖼️ Képek ellenőrzése:")
+                for i in range(min(3, len(df))):
+                    recipe = df.iloc[i]
+                    logger.debug(f"   {recipe['title']}: {recipe['images']}")
             
             return df
             
         except Exception as e:
-            print(f"❌ CSV betöltési hiba: {e}")
+            logger.error(f"❌ CSV betöltési hiba: {e}")
             return None
     
-    def get_recommendations(self, version='v1', n_recommendations=5):
-        """Ajánlások lekérése"""
-        if self.recipes_df is None or len(self.recipes_df) == 0:
-            print("❌ Nincs recept adat!")
-            return []
+    def build_similarity_engine(self):
+        """Összetevő hasonlósági index felépítése betöltéskor"""
+        if self.store is None:
+            return None
+        
+        try:
+            engine = IngredientSimilarityEngine(self.store['ingredients'])
+            logger.info(f"🔎 Összetevő index: {engine.matrix.shape[0]} recept, {engine.matrix.shape[1]} összetevő szó")
+            return engine
+        except Exception as e:
+            logger.warning(f"⚠️ Összetevő index hiba: {e}")
+            return None
+    
+    def load_ann_index(self, index_path=DEFAULT_INDEX_PATH):
+        """Előfeldolgozáskor mentett ANN index betöltése (ha a receptekhez illeszkedik)"""
+        if self.store is None or not Path(index_path).exists():
+            return None
+        if len(self.store) < self.ANN_MIN_RECIPES:
+            return None
         
-        # Sample kiválasztás
-        sample_size = min(n_recommendations, len(self.recipes_df))
-        recommendations = self.recipes_df.sample(n=sample_size, random_state=42).to_dict('records')
+        try:
+            index = IVFIndex.load(index_path)
+            # A snapshot és az index ugyanabból a katalógusból kell, hogy épüljön (sorok száma + recipeid hash)
+            if index.catalogue != self.store.catalogue:
+                logger.warning(f"⚠️ Az ANN index más katalógushoz épült ({index.catalogue['rows']} recept), "
+                               f"mint a betöltött receptek ({self.store.catalogue['rows']}), pontos keresés marad")
+                return None
+            tuning = index.tuning
+            if tuning is None or tuning['recall_at_k'] < self.ANN_MIN_RECALL:
+                logger.warning(f"⚠️ ANN index recall túl alacsony ({tuning}), pontos keresés marad")
+                return None
+            if tuning['avg_query_ms'] >= tuning['avg_exact_ms']:
+                logger.info(f"🔎 A pontos keresés gyorsabb az ANN indexnél ({tuning}), pontos keresés marad")
+                return None
+            
+            rows = self.store.rows_for_ids(index.recipe_ids)
+            if len(rows) != len(self.store) or (rows < 0).any():
+                logger.warning("⚠️ ANN index nem illeszkedik a receptekhez, pontos keresés marad")
+                return None
+            
+            # Index sorok -> DataFrame sorok leképezése
+            self.ann_row_map = rows
+            self.ann_row_lookup = np.argsort(rows)
+            logger.info(f"🧭 ANN index betöltve: {index.n_recipes} recept, {len(index.centroids)} lista, "
+                        f"n_probe={index.n_probe}, recall@{tuning['k']:.0f}={tuning['recall_at_k']:.3f}")
+            return index
+            
+        except Exception as e:
+            logger.warning(f"⚠️ ANN index betöltési hiba: {e}")
+            return None
+    
+    def get_seed_index(self, seed_recipe_id=None):
+        """Kiinduló recept sorindexe: megadott ID vagy determinisztikus minta (mint korábban)"""
+        if seed_recipe_id is not None:
+            position = self.store.rows_for_ids([int(seed_recipe_id)])[0]
+            if position >= 0:
+                return int(position)
         
-        # Magyarázatok hozzáadása
-        for rec in recommendations:
-            if version in ['v2', 'v3']:
-                rec['explanation'] = self.generate_explanation(rec, version)
+        # Ugyanaz a sor, mint a korábbi DataFrame.sample(n=1, random_state=42)
+        return int(np.random.RandomState(42).choice(len(self.store), size=1, replace=False)[0])
+    
+    def get_similar_recipe_indices(self, n_recommendations, query_ingredients=None, seed_recipe_id=None):
+        """v1 baseline: összetevő hasonlóság alapján kiválasztott sorindexek"""
+        if n_recommendations <= 0:
+            return np.empty(0, dtype=np.int64)
         
-        print(f"✅ {len(recommendations)} ajánlás generálva ({version})")
+        engine = self.similarity_engine
+        ann = self.ann_index
         
-        # Debug: ajánlások ellenőrzése
-        print("🔍 Ajánlás debug:")
-        for i, rec in enumerate(recommendations):
-            print(f"   {i+1}. {rec['title']} - Kép: {rec.get('images', 'NINCS')[:60]}...")
+        if query_ingredients:
+            if ann is not None:
+                rows, _ = ann.search_by_ingredients(query_ingredients, k=n_recommendations)
+                return self.ann_row_map[rows]
+            indices, _ = engine.top_k_by_ingredients(query_ingredients, k=n_recommendations)
+            return indices
         
+        seed_index = self.get_seed_index(seed_recipe_id)
+        if ann is not None:
+            rows, _ = ann.search_by_row(self.ann_row_lookup[seed_index], k=n_recommendations - 1)
+            similar = self.ann_row_map[rows]
+        else:
+            similar, _ = engine.top_k_by_recipe(seed_index, k=n_recommendations - 1)
+        return np.concatenate(([seed_index], similar)).astype(np.int64)
+    
+    def get_recommendations(self, version='v1', n_recommendations=5, query_ingredients=None,
+                            seed_recipe_id=None, weights=None):
+        """Ajánlások lekérése (weights: kérésenkénti ESI/HSI/PPI súlyok v2/v3-hoz)"""
+        key = make_profile_key(version, n_recommendations, query_ingredients=query_ingredients,
+                               seed_recipe_id=seed_recipe_id, weights=weights)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
+        generation = self.cache.generation
+        recommendations = self.compute_recommendations(version, n_recommendations, query_ingredients,
+                                                       seed_recipe_id, weights)
+        if recommendations:
+            # A nézetek csak olvashatók, így másolás nélkül megoszthatók
+            self.cache.put(key, tuple(recommendations), generation=generation)
         return recommendations
     
-    def generate_explanation(self, recipe, version):
-        """Magyarázat generálása"""
-        explanations = []
+    def compute_recommendations(self, version='v1', n_recommendations=5, query_ingredients=None,
+                                seed_recipe_id=None, weights=None):
+        """Ajánlások számítása cache nélkül"""
+        if self.store is None:
+            logger.error("❌ Nincs recept adat!")
+            return []
+        
+        sample_size = min(n_recommendations, len(self.store))
+        if sample_size <= 0:
+            return []
+        
+        if version == 'v1' and self.similarity_engine is not None:
+            # Baseline: összetevő hasonlóság
+            indices = self.get_similar_recipe_indices(sample_size, query_ingredients, seed_recipe_id)
+            recommendations = self.store.views(indices)
+        elif version in ['v2', 'v3'] and self.hybrid_scorer is not None:
+            # Hibrid: súlyozott top-k a teljes katalógus rendezése nélkül
+            indices, scores = self.hybrid_scorer.top_k(weights, k=sample_size)
+            
+            # Magyarázatok az előre számított táblából
+            recommendations = []
+            for row, score in zip(indices.tolist(), scores.tolist()):
+                hybrid_score = score if weights is not None else None
+                explanation = self.explanations.lookup(row, version, hybrid_score)
+                recommendations.append(self.store.view(row, hybrid_score, explanation))
+        else:
+            # Sample kiválasztás (mint a korábbi DataFrame.sample(random_state=42))
+            rows = np.random.RandomState(42).choice(len(self.store), size=sample_size, replace=False)
+            recommendations = self.store.views(rows)
+        
+        # Debug: ajánlások ellenőrzése (csak a mintába került kéréseknél formázódik)
+        if debug_sampled(logger):
+            logger.debug(f"✅ {len(recommendations)} ajánlás generálva ({version})")
+            for i, rec in enumerate(recommendations):
+                logger.debug(f"   {i+1}. {rec['title']} - Kép: {rec.get('images', 'NINCS')[:60]}...")
+        
+        return recommendations
+    
+    def get_recommendations_batch(self, profiles, n_recommendations=5):
+        """Ajánlások sok résztvevőnek egyszerre
+        
+        profiles: dict-ek listája (version, weights, query_ingredients, seed_recipe_id kulcsokkal).
+        A v2/v3 profilok egy súlymátrix-szorzással, a v1 profilok egy ritka mátrixszorzással
+        kerülnek pontozásra; az eredmény profilonként egy ajánlás lista.
+        """
+        if self.store is None or not profiles:
+            return [[] for _ in profiles]
+        
+        k = min(n_recommendations, len(self.store))
+        if k <= 0:
+            return [[] for _ in profiles]
+        slates = [None] * len(profiles)
+        slate_scores = [None] * len(profiles)
         
-        if recipe['HSI'] > 70:
-            explanations.append("💚 Magas tápérték és egészséges összetevők")
-        if recipe['ESI'] > 70:
-            explanations.append("🌱 Környezetbarát ingrediensek")
-        if recipe['PPI'] > 80:
-            explanations.append("⭐ Népszerű és kipróbált recept")
+        hybrid = [i for i, p in enumerate(profiles) if p.get('version', 'v1') in ['v2', 'v3']]
+        similar = [i for i, p in enumerate(profiles) if p.get('version', 'v1') == 'v1']
         
-        if not explanations:
-            explanations.append("🍽️ Kiegyensúlyozott összetétel")
+        # Pontszám mátrix darabolása: legfeljebb ~64 MB egyszerre
+        chunk = max(1, (64 * 1024 * 1024) // (len(self.store) * 8))
+        
+        for start in range(0, len(hybrid), chunk):
+            block = hybrid[start:start + chunk]
+            top, scores = self.hybrid_scorer.top_k_batch([profiles[i].get('weights') for i in block], k=k)
+            for row, i in enumerate(block):
+                slates[i] = top[row]
+                if profiles[i].get('weights') is not None:
+                    slate_scores[i] = scores[row]
+        
+        if self.ann_index is not None:
+            # ANN lekérdezésenként is ms alatti
+            for i in similar:
+                p = profiles[i]
+                slates[i] = self.get_similar_recipe_indices(k, p.get('query_ingredients'), p.get('seed_recipe_id'))
+        else:
+            engine = self.similarity_engine
+            for start in range(0, len(similar), chunk):
+                block = similar[start:start + chunk]
+                queries, seeds = [], []
+                for i in block:
+                    p = profiles[i]
+                    if p.get('query_ingredients'):
+                        queries.append(engine.query_vector(p['query_ingredients']))
+                        seeds.append(None)
+                    else:
+                        seed_index = self.get_seed_index(p.get('seed_recipe_id'))
+                        queries.append(engine.query_for_row(seed_index))
+                        seeds.append(seed_index)
+                
+                results = engine.top_k_batch(queries, k=k, exclude_rows=seeds)
+                for i, seed_index, (rows, _) in zip(block, seeds, results):
+                    if seed_index is not None:
+                        rows = np.concatenate(([seed_index], rows[:k - 1]))
+                    slates[i] = rows
+        
+        results = []
+        for profile, rows, scores in zip(profiles, slates, slate_scores):
+            version = profile.get('version', 'v1')
+            recommendations = []
+            for j, row in enumerate(np.asarray(rows).tolist()):
+                hybrid_score = float(scores[j]) if scores is not None else None
+                explanation = (self.explanations.lookup(row, version, hybrid_score)
+                               if version in ['v2', 'v3'] else None)
+                recommendations.append(self.store.view(row, hybrid_score, explanation))
+            results.append(recommendations)
+        
+        logger.debug(f"✅ {len(results)} ajánlás lista generálva (batch)")
+        return results
+    
+    def generate_explanation(self, recipe, version):
+        """Magyarázat generálása egy recept dict-hez (a kérés útvonal az ExplanationTable-t használja)"""
+        code = 0
+        for bit, (col, _) in enumerate(EXPLANATION_RULES):
+            if recipe[col] > self.explanation_thresholds[col]:
+                code |= 1 << bit
         
         if version == 'v3':
-            detailed = f"Ez a recept {recipe['composite_score']:.0f}/100 pontot ért el összesített értékelésünkben. "
-            detailed += " • ".join(explanations)
-            return detailed
+            return detailed_explanation_text(code, recipe.get('hybrid_score', recipe['composite_score']))
         else:
-            return " • ".join(explanations)
+            return explanation_text(code)
+
+# Global objektumok - késleltetett létrehozás (első kéréskor vagy háttér bemelegítéskor)
+db = LazyResource('Adatbázis', UserStudyDatabase)
+recommender = LazyResource('Recept ajánló', EnhancedRecipeRecommender)
 
-# Global objektumok
-db = UserStudyDatabase()
-recommender = EnhancedRecipeRecommender()
+def start_warmup(background=True):
+    """Adatbázis és recept index betöltése a háttérben, miután az app elindult"""
+    return warm_up([db, recommender], background=background)
+
+def readiness():
+    """Bemelegítés állapota (health check / load balancer számára)"""
+    resources = {'database': db.status(), 'recommender': recommender.status()}
+    return {
+        'ready': all(status['ready'] for status in resources.values()),
+        'resources': resources,
+    }
 
 def get_user_version():
     if 'version' not in session:
@@ -446,8 +929,43 @@ def get_user_version():
         session['version'] = random.choice(versions)
     return session['version']
 
+MAX_BATCH_INTERACTIONS = 100
+
+def parse_interaction(data):
+    """Egy értékelés JSON validálása -> (recipe_id, rating, explanation_helpful, view_time, interaction_order)
+    
+    A rating lehet null (pl. csak a magyarázat értékelése érkezett meg); hibás adat esetén ValueError.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Érvénytelen interakció')
+    
+    def optional(name, cast, default=None):
+        value = data.get(name)
+        if value is None:
+            return default
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'Érvénytelen {name}: {value!r}') from None
+    
+    recipe_id = optional('recipe_id', int)
+    if recipe_id is None:
+        raise ValueError('recipe_id kötelező')
+    
+    rating = optional('rating', int)
+    if rating is not None and not 1 <= rating <= 5:
+        raise ValueError(f'Érvénytelen rating: {rating}')
+    
+    return (recipe_id, rating, optional('explanation_helpful', int),
+            optional('view_time_seconds', float, 0), optional('interaction_order', int, 0))
+
 # ROUTES
 
+@user_study_bp.before_app_request
+def sample_request_logging():
+    """Kérésenkénti debug mintavétel (a DEBUG sorok csak a mintába került kérésekből íródnak ki)"""
+    begin_request()
+
 @user_study_bp.route('/')
 def welcome():
     return render_template('welcome.html')
@@ -471,7 +989,7 @@ def register():
             return redirect(url_for('user_study.instructions'))
             
         except Exception as e:
-            print(f"Registration error: {e}")
+            logger.error(f"Registration error: {e}")
             return render_template('register.html', error='Regisztráció sikertelen')
     
     return render_template('register.html')
@@ -492,13 +1010,22 @@ def study():
     
     version = session.get('version', 'v1')
     
+    # Résztvevőnkénti súlyozás (pl. ?weights=0.5,0.3,0.2 sorrend: ESI,HSI,PPI)
+    if request.args.get('weights'):
+        try:
+            weights = normalize_weights([float(w) for w in request.args['weights'].split(',')])
+            session['score_weights'] = weights.tolist()
+        except ValueError as e:
+            logger.warning(f"⚠️ Érvénytelen súlyok: {e}")
+    
     # Ajánlások lekérése
-    recommendations = recommender.get_recommendations(version=version, n_recommendations=5)
+    recommendations = recommender.get_recommendations(version=version, n_recommendations=5,
+                                                      weights=session.get('score_weights'))
     
     if not recommendations:
         return "❌ Hiba: Nem sikerült betölteni a recepteket. Ellenőrizd a CSV fájlokat.", 500
     
-    print(f"🔍 Template-nek átadott {len(recommendations)} ajánlás ({version})")
+    logger.debug(f"🔍 Template-nek átadott {len(recommendations)} ajánlás ({version})")
     
     return render_template('study.html', 
                          recommendations=recommendations, 
@@ -510,18 +1037,80 @@ def rate_recipe():
         return jsonify({'error': 'Unauthorized'}), 401
     
     user_id = session['user_id']
-    data = request.get_json()
     
-    recipe_id = int(data.get('recipe_id'))
-    rating = int(data.get('rating'))
-    explanation_helpful = data.get('explanation_helpful')
-    view_time = data.get('view_time_seconds', 0)
-    interaction_order = data.get('interaction_order', 0)
+    try:
+        recipe_id, rating, explanation_helpful, view_time, interaction_order = parse_interaction(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     db.log_interaction(user_id, recipe_id, rating, explanation_helpful, view_time, interaction_order)
     
     return jsonify({'status': 'success'})
 
+@user_study_bp.route('/rate_recipes', methods=['POST'])
+def rate_recipes():
+    """Összegyűjtött értékelések egy kérésben, egy tranzakcióban (study.html kötegelt küldés)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    user_id = session['user_id']
+    # sendBeacon esetén a Content-Type nem mindig application/json
+    data = request.get_json(silent=True, force=True)
+    interactions = data.get('interactions') if isinstance(data, dict) else data
+    
+    if not isinstance(interactions, list) or not interactions:
+        return jsonify({'error': 'interactions: nem üres lista szükséges'}), 400
+    if len(interactions) > MAX_BATCH_INTERACTIONS:
+        return jsonify({'error': f'Legfeljebb {MAX_BATCH_INTERACTIONS} interakció küldhető egyszerre'}), 400
+    
+    try:
+        rows = [(user_id, *parse_interaction(item), utc_timestamp()) for item in interactions]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    db.log_interactions(rows)
+    
+    return jsonify({'status': 'success', 'saved': len(rows)})
+
+@user_study_bp.route('/api/recommendations/batch', methods=['POST'])
+def recommendations_batch():
+    """Ajánlás listák előszámítása egy kohorsz számára (JSON)"""
+    data = request.get_json(silent=True) or {}
+    profiles = data.get('profiles')
+    
+    if not isinstance(profiles, list) or not profiles:
+        return jsonify({'error': 'profiles: nem üres lista szükséges'}), 400
+    if len(profiles) > 10000:
+        return jsonify({'error': 'Legfeljebb 10000 profil kérhető egyszerre'}), 400
+    if any(not isinstance(p, dict) or p.get('version', 'v1') not in ['v1', 'v2', 'v3'] for p in profiles):
+        return jsonify({'error': 'Érvénytelen profil vagy verzió'}), 400
+    
+    try:
+        n_recommendations = int(data.get('n_recommendations', 5))
+        slates = recommender.get_recommendations_batch(profiles, n_recommendations=n_recommendations)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'status': 'success',
+        'slates': [
+            {
+                'participant_id': profile.get('participant_id'),
+                'version': profile.get('version', 'v1'),
+                'recommendations': [
+                    {
+                        'recipeid': int(rec['recipeid']),
+                        'title': rec['title'],
+                        'score': round(float(rec.get('hybrid_score', rec.get('composite_score', 0))), 2),
+                        'explanation': rec.get('explanation')
+                    }
+                    for rec in slate
+                ]
+            }
+            for profile, slate in zip(profiles, slates)
+        ]
+    })
+
 @user_study_bp.route('/questionnaire', methods=['GET', 'POST'])
 def questionnaire():
     if 'user_id' not in session:
@@ -551,77 +1140,115 @@ def thank_you():
     version = session.get('version', 'v1')
     return render_template('thank_you.html', version=version)
 
+# Utoljára renderelt /admin/stats oldal: {'version': db.data_version(), 'body': ..., 'etag': ...}
+_stats_page_cache = {}
+_stats_page_lock = threading.Lock()
+
 @user_study_bp.route('/admin/stats')
 def admin_stats():
-    """Admin statisztikák"""
+    """Admin statisztikák - renderelt oldal cache-elve, ETag / If-None-Match támogatással"""
     try:
-        conn = db.get_connection()
-        
-        stats = {}
+        version = db.data_version()
+        with _stats_page_lock:
+            cached = _stats_page_cache if _stats_page_cache.get('version') == version else None
         
-        # Alapstatisztikák
-        result = conn.execute('SELECT COUNT(*) as count FROM participants').fetchone()
-        stats['total_participants'] = result['count'] if result else 0
-        
-        result = conn.execute('SELECT COUNT(*) as count FROM participants WHERE is_completed = 1').fetchone()
-        stats['completed_participants'] = result['count'] if result else 0
+        if cached is None:
+            body = render_template('admin_stats.html', stats=db.get_stats())
+            # Tartalom alapú ETag: ha a statisztika nem változott, az új generáció is 304-et ad
+            cached = {'version': version, 'body': body,
+                      'etag': hashlib.sha1(body.encode('utf-8')).hexdigest()}
+            with _stats_page_lock:
+                _stats_page_cache.clear()
+                _stats_page_cache.update(cached)
         
-        if stats['total_participants'] > 0:
-            stats['completion_rate'] = stats['completed_participants'] / stats['total_participants']
-        else:
-            stats['completion_rate'] = 0
-        
-        # Verzió eloszlás
-        version_results = conn.execute('''
-            SELECT version, 
-                   COUNT(*) as count,
-                   SUM(CASE WHEN is_completed = 1 THEN 1 ELSE 0 END) as completed
-            FROM participants 
-            GROUP BY version
-        ''').fetchall()
-        
-        stats['version_distribution'] = [dict(row) for row in version_results]
-        
-        # Átlagos értékelések
-        rating_results = conn.execute('''
-            SELECT p.version, AVG(i.rating) as avg_rating, COUNT(i.rating) as count
-            FROM participants p
-            JOIN interactions i ON p.user_id = i.user_id
-            WHERE i.rating IS NOT NULL
-            GROUP BY p.version
-        ''').fetchall()
-        
-        stats['average_ratings'] = [dict(row) for row in rating_results]
-        
-        # Kérdőív eredmények
-        questionnaire_results = conn.execute('''
-            SELECT p.version,
-                   AVG(q.system_usability) as avg_usability,
-                   AVG(q.recommendation_quality) as avg_quality,
-                   AVG(q.trust_level) as avg_trust,
-                   AVG(q.explanation_clarity) as avg_clarity,
-                   AVG(q.overall_satisfaction) as avg_satisfaction
-            FROM participants p
-            JOIN questionnaire q ON p.user_id = q.user_id
-            GROUP BY p.version
-        ''').fetchall()
-        
-        stats['questionnaire_results'] = [dict(row) for row in questionnaire_results]
-        
-        # Átlagos interakciók
-        interactions_count = conn.execute('SELECT COUNT(*) as count FROM interactions').fetchone()
-        if stats['total_participants'] > 0:
-            stats['avg_interactions_per_user'] = interactions_count['count'] / stats['total_participants']
+        if request.if_none_match.contains(cached['etag']):
+            response = make_response('', 304)
         else:
-            stats['avg_interactions_per_user'] = 0
-        
-        conn.close()
-        
-        return render_template('admin_stats.html', stats=stats)
+            response = make_response(cached['body'])
+        response.set_etag(cached['etag'])
+        # A böngésző mindig újraellenőriz (304), de elavult oldalt nem mutat
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         return f"Stats error: {e}", 500
 
+def admin_authorized():
+    """Admin token ellenőrzés: X-Admin-Token vagy 'Authorization: Bearer <token>' fejléc
+    
+    Az ADMIN_TOKEN környezeti változóval összevetve (időben állandó összehasonlítás);
+    beállított token nélkül minden kérés elutasításra kerül.
+    """
+    expected = os.environ.get('ADMIN_TOKEN', '')
+    supplied = request.headers.get('X-Admin-Token', '')
+    authorization = request.headers.get('Authorization', '')
+    if not supplied and authorization.startswith('Bearer '):
+        supplied = authorization[len('Bearer '):]
+    return bool(expected) and hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
+def admin_required(view):
+    """Admin route dekorátor: érvényes token nélkül 403"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not admin_authorized():
+            logger.warning(f"🔒 Elutasított admin kérés: {request.path} ({request.remote_addr})")
+            return jsonify({'error': 'Admin jogosultság szükséges'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@user_study_bp.route('/admin/export/<table>')
+@admin_required
+def admin_export(table):
+    """Nyers tábla streamelt exportja: ?format=csv|ndjson&after_id=<utolsó látott ID>"""
+    fmt = request.args.get('format', 'csv')
+    if table not in EXPORT_TABLES or fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'Tábla: {sorted(EXPORT_TABLES)}, formátum: {sorted(EXPORT_FORMATS)}'}), 400
+    
+    try:
+        after_id = int(request.args['after_id']) if request.args.get('after_id') else None
+    except ValueError:
+        return jsonify({'error': 'after_id: egész szám szükséges'}), 400
+    
+    # Pufferelt interakciók is kerüljenek bele; az export külön, csak olvasható kapcsolatot használ
+    if not db.flush():
+        response = jsonify({'error': 'Az interakció puffer nem ürült ki időben, próbáld újra később'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    conn = open_readonly(db.db_path)
+    
+    response = Response(stream_export(conn, table, fmt, after_id), mimetype=EXPORT_FORMATS[fmt])
+    response.call_on_close(conn.close)
+    response.headers['Content-Disposition'] = f'attachment; filename={table}.{fmt}'
+    response.headers['X-Export-Resume-Key'] = EXPORT_TABLES[table]
+    return response
+
+@user_study_bp.route('/admin/logging', methods=['GET', 'POST'])
+@admin_required
+def admin_logging():
+    """Naplózási szint és debug mintavételi arány lekérdezése / módosítása futás közben
+
+    POST (JSON vagy form): level=DEBUG|INFO|..., debug_sample_rate=0..1 - az arány a
+    MAX_DEBUG_SAMPLE_RATE értékre vágódik; hibás érték esetén 400 és semmi nem módosul.
+    A beállítás folyamatonként él (több gunicorn worker esetén workerenként).
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            data = request.form
+        # Előbb mindkét érték ellenőrzése, csak utána a beállítás
+        try:
+            level = parse_log_level(data['level']) if data.get('level') not in (None, '') else None
+            rate = (parse_debug_sample_rate(data['debug_sample_rate'])
+                    if data.get('debug_sample_rate') not in (None, '') else None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if level is not None:
+            set_log_level(level)
+        if rate is not None:
+            set_debug_sample_rate(rate)
+        logger.info(f"🔧 Naplózás: {logging_config()}")
+    return jsonify(logging_config())
+
 # DEBUG route CSV ellenőrzéshez
 @user_study_bp.route('/debug/csv')
 def debug_csv():
@@ -635,17 +1262,16 @@ def debug_csv():
         result += f"Path: {csv_path}<br>"
         result += f"Exists: {'✅ YES' if csv_path.exists() else '❌ NO'}<br>"
         
-        if csv_path.exists():
+        if csv_path.exists() and recommender.store is not None:
             try:
-                df = pd.read_csv(csv_path)
-                result += f"Rows: {len(df)}<br>"
-                result += f"Columns: {list(df.columns)}<br><br>"
+                store = recommender.store
+                result += f"Rows: {len(store)}<br>"
+                result += f"Columns: {store.columns}<br><br>"
                 
                 result += "<h3>🖼️ Image URLs (first 3):</h3>"
-                for i in range(min(3, len(df))):
-                    recipe = df.iloc[i]
-                    result += f"<b>{recipe['title']}:</b><br>"
-                    result += f"Image: {recipe.get('images', 'NINCS')}<br><br>"
+                for recipe in store.views(range(min(3, len(store)))):
+                    result += f"<b>{recipe.title}:</b><br>"
+                    result += f"Image: {recipe.images or 'NINCS'}<br><br>"
                 
             except Exception as e:
                 result += f"CSV read error: {e}<br>"
@@ -658,6 +1284,7 @@ def debug_csv():
         
         if original_csv.exists():
             try:
+                import pandas as pd
                 df_orig = pd.read_csv(original_csv)
                 result += f"Rows: {len(df_orig)}<br>"
                 result += f"Columns: {list(df_orig.columns)}<br>"
@@ -666,7 +1293,8 @@ def debug_csv():
         
         # Recommender status
         result += f"<h3>🤖 Recommender Status:</h3>"
-        result += f"Recipes loaded: {len(recommender.recipes_df) if recommender.recipes_df is not None else 0}<br>"
+        result += f"Recipes loaded: {recommender.recipe_count}<br>"
+        result += f"Recommendation cache: {recommender.cache.stats()}<br>"
         
         # Test recommendation
         try:
@@ -684,4 +1312,4 @@ def debug_csv():
         return f"Debug error: {e}"
 
 # Export
-__all__ = ['user_study_bp']
+__all__ = ['user_study_bp', 'start_warmup', 'readiness']
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Write-behind puffer az interakció naplózáshoz
+A kérés csak sorba tesz, egy háttérszál méret vagy idő szerint kötegelve
+(executemany, egy tranzakció) írja az adatbázisba
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('sync', 'block', 'drop')
+
+
+class InteractionWriteBuffer:
+    """Korlátos sor + háttér flusher szál
+
+    overflow (tele sor esetén):
+      'sync'  - a kérés szálában azonnali írás (nincs adatvesztés, lassabb kérés)
+      'block' - várakozás helyre legfeljebb block_timeout másodpercig, utána 'sync'
+      'drop'  - eldobás és számlálás (a kérés sosem lassul)
+
+    Egy köteg legfeljebb max_retries újrapróbálás után a dead_letter_path NDJSON fájlba kerül
+    (soronként egy JSON objektum), így egy tartósan hibás köteg nem akasztja meg a flusher szálat.
+    """
+
+    def __init__(self, write_batch, max_batch=256, flush_interval=0.25, max_queue=10000,
+                 overflow='sync', block_timeout=0.05, retry_delay=0.5, max_retries=5,
+                 dead_letter_path=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Ismeretlen overflow szabály: {overflow} (lehetséges: {OVERFLOW_POLICIES})")
+
+        self._write_batch = write_batch
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.dead_letter_path = dead_letter_path
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.sync_writes = 0
+        self.failed_attempts = 0
+        self.dead_lettered = 0
+
+        self._thread = threading.Thread(target=self._run, name='interaction-writer', daemon=True)
+        self._thread.start()
+        # Leállításkor (normál kilépés, gunicorn graceful shutdown) a sor kiürül
+        atexit.register(self.close)
+
+    def submit(self, row):
+        """Egy sor sorba állítása; False, ha a sor eldobásra került"""
+        if self._closed:
+            self._write_sync([row])
+            return True
+
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            pass
+
+        if self.overflow == 'block':
+            try:
+                self._queue.put(row, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                pass
+        elif self.overflow == 'drop':
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        self._write_sync([row])
+        return True
+
+    def _write_sync(self, rows):
+        self._write_batch(rows)
+        with self._lock:
+            self.sync_writes += len(rows)
+
+    def _drain(self, first):
+        """Köteg gyűjtése: max_batch sorig vagy flush_interval lejártáig"""
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Ami már a sorban van, az is mehet ebbe a kötegbe
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush_batch(self, batch):
+        """Köteg írása; átmeneti hiba (pl. zárolás) esetén legfeljebb max_retries újrapróbálás"""
+        attempts = 0
+        while True:
+            try:
+                self._write_batch(batch)
+                with self._lock:
+                    self.written += len(batch)
+                    self.batches += 1
+                return
+            except Exception as e:
+                attempts += 1
+                with self._lock:
+                    self.failed_attempts += 1
+                # Leállításkor nincs idő a teljes újrapróbálási körre
+                limit = min(self.max_retries, 3) if self._stop.is_set() else self.max_retries
+                if attempts > limit:
+                    self._dead_letter(batch, e)
+                    return
+                logger.warning(f"⚠️ Interakció köteg írási hiba ({len(batch)} sor), újrapróbálás: {e}")
+                time.sleep(self.retry_delay)
+
+    def _dead_letter(self, batch, error):
+        """Véglegesen sikertelen köteg mentése a dead letter fájlba (utólagos visszatöltéshez)"""
+        with self._lock:
+            self.dead_lettered += len(batch)
+        if self.dead_letter_path is None:
+            logger.error(f"❌ {len(batch)} interakció nem írható, eldobva: {error}")
+            return
+        failed_at = utc_timestamp()
+        try:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                for row in batch:
+                    f.write(json.dumps({'row': list(row), 'error': str(error), 'failed_at': failed_at},
+                                       ensure_ascii=False) + '\n')
+            logger.error(f"❌ {len(batch)} interakció nem írható, dead letter fájlba mentve "
+                         f"({self.dead_letter_path}): {error}")
+        except OSError as e:
+            logger.error(f"❌ {len(batch)} interakció elveszett (dead letter fájl sem írható: {e}): {error}")
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+
+            batch = self._drain(first)
+            try:
+                self._flush_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Várakozás, amíg minden addig sorba állított sor kiíródik (vagy dead letterbe kerül)
+
+        True, ha a sor kiürült; False, ha timeout másodperc alatt nem (None: korlát nélkül).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=10.0):
+        """Tartós leállítás: a sor kiürítése, majd a szál leállítása"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._thread.join(timeout)
+        # Ha a szál nem végzett (vagy már nem fut), a maradék a hívó szálban íródik ki
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+                self._queue.task_done()
+            except queue.Empty:
+                break
+        if leftover:
+            self._write_sync(leftover)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'written': self.written,
+                'batches': self.batches,
+                'dropped': self.dropped,
+                'sync_writes': self.sync_writes,
+                'failed_attempts': self.failed_attempts,
+                'dead_lettered': self.dead_lettered,
+                'overflow': self.overflow,
+            }
+
+
+def utc_timestamp():
+    """Az SQLite CURRENT_TIMESTAMP formátuma - a kérés idejét rögzíti, nem a kiírásét"""
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S')